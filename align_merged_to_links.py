@@ -2,6 +2,9 @@
 import json
 from pathlib import Path
 
+from breeds_schema import write_breeds
+from stage_profile import StageProfiler
+
 LINKS_FILE   = "breeds_links_resorted.json"   # { "breeds": [ {id, breed, url?}, ... ] }
 MERGED_FILE  = "breeds_merged_final.json"     # { "breeds": [ {id, breed, alias, features{...}}, ... ] }
 OUT_FILE     = "breeds_merged_aligned.json"
@@ -24,11 +27,13 @@ def empty_entry(id_: int, breed_name: str) -> dict:
     }
 
 def main():
+    prof = StageProfiler("align_merged_to_links")
     links_data  = json.loads(Path(LINKS_FILE).read_text(encoding="utf-8"))
     merged_data = json.loads(Path(MERGED_FILE).read_text(encoding="utf-8"))
 
     links  = links_data.get("breeds", [])
     merged = merged_data.get("breeds", [])
+    prof.lap("load")
 
     # index merged par id
     merged_by_id = {}
@@ -38,6 +43,7 @@ def main():
         if bid in merged_by_id:
             dup_ids.add(bid)
         merged_by_id[bid] = e
+    prof.lap("index")
 
     added = 0
     renamed = 0
@@ -72,9 +78,12 @@ def main():
             # Si tu veux les conserver quand même, décommente la ligne suivante :
             # output_by_id[bid] = e
 
+    prof.lap("merge")
+
     # 3) trier par id et écrire
     out_list = [output_by_id[i] for i in sorted(output_by_id.keys())]
-    Path(OUT_FILE).write_text(json.dumps({"breeds": out_list}, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_breeds(OUT_FILE, out_list)
+    prof.lap("write")
 
     # 4) rapport
     report = {
@@ -87,6 +96,7 @@ def main():
         "entries_in_merged_not_in_links_examples": not_in_links[:20],
         "output_file": OUT_FILE
     }
+    prof.attach(report)
     Path(REPORT_FILE).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
 
     # console
@@ -4,6 +4,9 @@ import re
 import unicodedata
 from pathlib import Path
 
+from breeds_schema import write_breeds
+from stage_profile import StageProfiler
+
 LINKS_FILE = "breeds_links_resorted.json"   # source de vérité des IDs
 MERGED_FILE = "breeds_merged.json"          # à corriger
 OUT_FILE = "breeds_merged_with_global_ids.json"
@@ -23,6 +26,7 @@ def norm_key(s: str) -> str:
     return s
 
 def main():
+    prof = StageProfiler("apply_global_ids_to_merged")
     # 1) Charger les fichiers
     links_data = json.loads(Path(LINKS_FILE).read_text(encoding="utf-8"))
     merged_data = json.loads(Path(MERGED_FILE).read_text(encoding="utf-8"))
@@ -30,10 +34,14 @@ def main():
     links = links_data.get("breeds", [])
     merged = merged_data.get("breeds", [])
 
+    prof.lap("load")
+
     # 2) Mapping nom normalisé -> ID global (+ nom d’origine pour log)
     name_to_id = {norm_key(b["breed"]): int(b["id"])
                   for b in links if b.get("breed") and b.get("id") is not None}
 
+    prof.lap("index")
+
     # 3) Appliquer / corriger les IDs
     updated = 0
     already_ok = 0
@@ -63,12 +71,15 @@ def main():
             else:
                 already_ok += 1
 
+    prof.lap("merge")
+
     # 4) Tri optionnel par ID (puis nom)
     if SORT_BY_ID:
         merged.sort(key=lambda x: (x.get("id") is None, x.get("id") or 0, norm_key(x.get("breed",""))))
 
     # 5) Écrire la sortie + rapport
-    Path(OUT_FILE).write_text(json.dumps({"breeds": merged}, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_breeds(OUT_FILE, merged)
+    prof.lap("write")
 
     report = {
         "updated_count": updated,
@@ -78,6 +89,7 @@ def main():
         "changes": mismatches[:50],  # on tronque l’aperçu
         "output_file": OUT_FILE
     }
+    prof.attach(report)
     Path(REPORT_FILE).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
 
     # 6) Console summary
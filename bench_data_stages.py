@@ -0,0 +1,119 @@
+# bench_data_stages.py
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from generate_synthetic_breeds import OUT_ROOT, generate
+
+RESULTS_FILE = "bench_results.json"
+DEFAULT_SIZES = [1000, 100_000]       # 1_000_000 à la demande (long)
+REPEAT = 3
+
+# étape -> fichiers d'entrée (noms par défaut des constantes du script)
+STAGES = {
+    "merge_breeds_json":              ["breeds_clean_post.json", "breeds_incomplete_subset.json"],
+    "merge_two_breed_jsons":          ["breeds_with_origin_list_and_type_updated.json",
+                                       "breeds_remaining_incomplete_structured.json"],
+    "merge_placeholders_into_merged": ["breeds_merged_with_global_ids.json", "breeds_placeholders_for_gaps.json"],
+    "align_merged_to_links":          ["breeds_links_resorted.json", "breeds_merged_final.json"],
+    "resort_reassign_and_diff":       ["breeds_links_resorted.json", "breeds_merged_aligned.json"],
+    "verify_links_vs_merged":         ["breeds_links_resorted.json", "breeds_merged_aligned.json"],
+    "normalize_origins_and_add_type": ["breeds_with_global_ids_extended.json", "origins_index.json"],
+}
+
+def prepare_run_dir(data_dir: Path, run_dir: Path, inputs):
+    """Copie fraîche des entrées : chaque étape écrit ses sorties sans abîmer le jeu de données."""
+    if run_dir.exists():
+        shutil.rmtree(run_dir)
+    run_dir.mkdir(parents=True)
+    for name in inputs:
+        shutil.copyfile(data_dir / name, run_dir / name)
+
+def run_stage(module_name: str, run_dir: Path, trace_memory: bool) -> dict:
+    mod = importlib.import_module(module_name)
+    cwd = os.getcwd()
+    os.chdir(run_dir)
+    try:
+        if trace_memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            mod.main()
+        wall = time.perf_counter() - t0
+        peak = None
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        os.chdir(cwd)
+    return {"wall_s": wall, "peak_bytes": peak}
+
+def bench_size(n: int, stages, repeat: int, trace_memory: bool, regen: bool) -> dict:
+    data_dir = OUT_ROOT / str(n)
+    if regen or not (data_dir / "breeds_links_resorted.json").exists():
+        print(f"… génération du jeu synthétique {n}")
+        generate(n, data_dir)
+    input_bytes = {p.name: p.stat().st_size for p in data_dir.glob("*.json")}
+
+    results = {}
+    for stage in stages:
+        inputs = STAGES[stage]
+        run_dir = data_dir / "run" / stage
+        walls = []
+        for _ in range(repeat):
+            prepare_run_dir(data_dir, run_dir, inputs)
+            walls.append(run_stage(stage, run_dir, False)["wall_s"])
+        entry = {
+            "wall_s_min": round(min(walls), 4),
+            "wall_s_median": round(statistics.median(walls), 4),
+            "runs": len(walls),
+            "input_bytes": sum(input_bytes.get(x, 0) for x in inputs),
+        }
+        # mesure mémoire séparée : tracemalloc ralentit fortement l'exécution
+        if trace_memory:
+            prepare_run_dir(data_dir, run_dir, inputs)
+            entry["peak_traced_bytes"] = run_stage(stage, run_dir, True)["peak_bytes"]
+        shutil.rmtree(run_dir, ignore_errors=True)
+        results[stage] = entry
+        peak = entry.get("peak_traced_bytes")
+        peak_txt = f", pic {peak / 1e6:.1f} Mo" if peak else ""
+        print(f"   {stage:<32} {entry['wall_s_median']:>9.3f} s{peak_txt}")
+    shutil.rmtree(data_dir / "run", ignore_errors=True)
+    return results
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark des étapes de traitement sur données synthétiques.")
+    ap.add_argument("sizes", nargs="*", type=int, default=DEFAULT_SIZES)
+    ap.add_argument("--stages", nargs="*", default=list(STAGES), choices=list(STAGES))
+    ap.add_argument("--repeat", type=int, default=REPEAT)
+    ap.add_argument("--no-memory", action="store_true", help="ne pas mesurer le pic mémoire (tracemalloc)")
+    ap.add_argument("--regen", action="store_true", help="régénérer les jeux synthétiques")
+    ap.add_argument("--out", default=RESULTS_FILE)
+    args = ap.parse_args()
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    for n in args.sizes:
+        print(f"▶ {n} races")
+        report["sizes"][str(n)] = bench_size(n, args.stages, args.repeat, not args.no_memory, args.regen)
+
+    Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"→ Résultats : {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# bench_scrapers.py
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from mediawiki_standin import (FixtureStore, StandinConfig, StandinServer,
+                               build_synthetic_fixtures, route_to_standin)
+
+RESULTS_FILE = "bench_scrapers_results.json"
+STAGES = ("scrape_wiki_dog_infobox", "download_breed_images", "redownload_images_follow_file_link")
+
+def run_stage(name: str, workdir: Path, srv: StandinServer, keep_pauses: bool) -> dict:
+    mod = importlib.import_module(name)
+    if not keep_pauses and hasattr(mod, "PAUSE_SECONDS"):
+        mod.PAUSE_SECONDS = 0
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    srv.stats.reset()
+    try:
+        t0 = time.perf_counter()
+        with route_to_standin(srv.base_url), contextlib.redirect_stdout(io.StringIO()):
+            mod.main()
+        wall = time.perf_counter() - t0
+    finally:
+        os.chdir(cwd)
+    st = srv.stats.snapshot()
+    pages = st["requests"]["page"] + st["requests"]["api"]
+    total_bytes = sum(st["bytes"].values())
+    return {
+        "wall_s": round(wall, 3),
+        "pages_per_s": round(pages / wall, 2) if wall else None,
+        "bytes_per_s": round(total_bytes / wall) if wall else None,
+        "image_bytes_per_s": round(st["bytes"]["image"] / wall) if wall else None,
+        "server": st,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark des scripts de scraping contre le stand-in MediaWiki.")
+    ap.add_argument("--breeds", type=int, default=50, help="nombre de races synthétiques")
+    ap.add_argument("--fixtures", default=None, help="dossier de fixtures enregistrées (remplace le synthétique)")
+    ap.add_argument("--stages", nargs="*", default=list(STAGES), choices=list(STAGES))
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--jitter", type=float, default=0.02)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=float, default=1)
+    ap.add_argument("--keep-pauses", action="store_true", help="garder les pauses de politesse des scripts")
+    ap.add_argument("--out", default=RESULTS_FILE)
+    args = ap.parse_args()
+
+    if args.fixtures:
+        store, breeds = FixtureStore.load(Path(args.fixtures)), None
+    else:
+        store, breeds = build_synthetic_fixtures(args.breeds)
+    cfg = StandinConfig(args.latency, args.jitter, args.error_rate, retry_after=args.retry_after)
+
+    results = {}
+    with StandinServer(store, cfg) as srv:
+        print(f"▶ Stand-in {srv.base_url} ({len(store.entries)} fixtures)")
+        for name in args.stages:
+            workdir = Path(tempfile.mkdtemp(prefix=f"bench_{name}_"))
+            try:
+                if breeds is not None:
+                    (workdir / "breeds_links.json").write_text(
+                        json.dumps({"breeds": breeds}, ensure_ascii=False, indent=2), encoding="utf-8")
+                elif Path("breeds_links.json").exists():
+                    shutil.copyfile("breeds_links.json", workdir / "breeds_links.json")
+                res = run_stage(name, workdir, srv, args.keep_pauses)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            results[name] = res
+            print(f"   {name:<36} {res['wall_s']:>8.2f} s  {res['pages_per_s']:>7} pages/s  "
+                  f"{(res['bytes_per_s'] or 0) / 1e6:.2f} Mo/s  (erreurs injectées: {res['server']['injected_errors']})")
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {"breeds": args.breeds if breeds is not None else None, "fixtures": args.fixtures,
+                   "latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate,
+                   "retry_after": args.retry_after, "keep_pauses": args.keep_pauses},
+        "stages": results,
+    }
+    Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"→ Résultats : {args.out}")
+
+if __name__ == "__main__":
+    main()
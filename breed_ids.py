@@ -0,0 +1,95 @@
+# breed_ids.py
+"""
+Registre d'ids stables des races (append-only) + rang d'affichage précalculé.
+
+- un id est attribué une fois pour toutes à un nom normalisé (sans accents, casse, espaces)
+  et n'est jamais réutilisé : ajouter une race = un nouvel id en fin de registre,
+  aucun décalage des ids existants, donc aucun renommage d'images NNN_*.jpg
+- l'ordre alphabétique d'affichage va dans le champ `sort_rank` (1..N), recalculé à chaque étape
+- premier passage (registre absent) : les ids déjà présents dans les fichiers sont repris tels quels
+
+Usage :
+    reg = IdRegistry.load()
+    reg.assign(breeds)        # b["id"] stable pour chaque race
+    assign_sort_rank(breeds)  # b["sort_rank"] + tri de la liste
+    reg.save()
+"""
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+
+REGISTRY_FILE = "breed_ids_registry.json"
+
+def strip_accents(s: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", str(s or "")) if unicodedata.category(c) != "Mn")
+
+def norm_key(name: str) -> str:
+    s = strip_accents(name).casefold()
+    return re.sub(r"\s+", " ", s).strip()
+
+class IdRegistry:
+    def __init__(self, path=REGISTRY_FILE, ids=None, names=None, next_id=1):
+        self.path = Path(path)
+        self.ids = dict(ids or {})          # nom normalisé -> id
+        self.names = dict(names or {})      # id (str) -> nom d'affichage à l'attribution
+        self.next_id = next_id
+        self.allocated = []                 # (id, nom) attribués pendant ce run
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path=REGISTRY_FILE) -> "IdRegistry":
+        p = Path(path)
+        if not p.exists():
+            return cls(path)
+        data = json.loads(p.read_text(encoding="utf-8"))
+        return cls(path, data.get("ids"), data.get("names"), data.get("next_id", 1))
+
+    def save(self):
+        if not self.dirty:
+            return
+        data = {"next_id": self.next_id, "ids": dict(sorted(self.ids.items(), key=lambda kv: kv[1])),
+                "names": self.names}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def _taken(self, bid: int) -> bool:
+        return str(bid) in self.names
+
+    def _bind(self, key: str, bid: int, name: str):
+        self.ids[key] = bid
+        self.names[str(bid)] = name
+        self.next_id = max(self.next_id, bid + 1)
+        self.dirty = True
+
+    def id_for(self, name: str, current_id=None) -> int:
+        """Id stable de `name` ; adopte `current_id` s'il est libre (amorçage), sinon en alloue un."""
+        key = norm_key(name)
+        if key in self.ids:
+            return self.ids[key]
+        if isinstance(current_id, int) and current_id > 0 and not self._taken(current_id):
+            bid = current_id
+        else:
+            bid = self.next_id
+            self.allocated.append((bid, name))
+        self._bind(key, bid, name)
+        return bid
+
+    def assign(self, breeds, name_field: str = "breed"):
+        """Pose b["id"] pour chaque race ; les ids existants servent d'amorce au premier passage."""
+        # d'abord les races déjà connues ou porteuses d'un id, pour qu'elles gardent le leur
+        order = sorted(breeds, key=lambda b: (norm_key(b.get(name_field, "")) not in self.ids,
+                                              not isinstance(b.get("id"), int)))
+        for b in order:
+            b["id"] = self.id_for(b.get(name_field, ""), b.get("id"))
+        return breeds
+
+def assign_sort_rank(breeds, name_field: str = "breed"):
+    """Trie la liste par nom (sans accents / casse) et pose b["sort_rank"] = 1..N."""
+    breeds.sort(key=lambda b: norm_key(b.get(name_field, "")))
+    for i, b in enumerate(breeds, start=1):
+        b["sort_rank"] = i
+    return breeds
@@ -0,0 +1,178 @@
+# breeds_schema.py
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# Schéma cible d'une race (fichiers {"breeds": [...]} "complets")
+# - list = liste de chaînes
+SCHEMA = {
+    "id":    int,
+    "breed": str,
+    "alias": list,
+    "features": {
+        "origin": list,
+        "type":   list,
+        "robe":   list,
+        "size":   str,
+        "weight": str,
+        "poil":   str,
+        "energy": str,
+    },
+}
+
+CACHE_FILE = ".breeds_schema_cache.json"   # empreintes des races déjà validées, par fichier
+STRICT = os.environ.get("FURIOUS_SCHEMA_STRICT", "") not in ("", "0")
+
+Check = Callable[[Any, List[str]], None]
+
+# ---------- compilation ----------
+def _type_name(v: Any) -> str:
+    return "null" if v is None else type(v).__name__
+
+def _leaf_check(key: str, path: str, expected: type) -> Check:
+    if expected is int:
+        # bool est un int en Python : on le refuse explicitement
+        def check(d, errors):
+            v = d.get(key)
+            if type(v) is not int:
+                errors.append(f"{path}: attendu int, reçu {_type_name(v)}")
+    elif expected is list:
+        def check(d, errors):
+            v = d.get(key)
+            if not isinstance(v, list):
+                errors.append(f"{path}: attendu list, reçu {_type_name(v)}")
+            elif not all(isinstance(x, str) for x in v):
+                errors.append(f"{path}: éléments non-chaînes")
+    else:
+        def check(d, errors):
+            v = d.get(key)
+            if not isinstance(v, expected):
+                errors.append(f"{path}: attendu {expected.__name__}, reçu {_type_name(v)}")
+    return check
+
+def _dict_check(key: str, path: str, sub: Tuple[Check, ...]) -> Check:
+    def check(d, errors):
+        v = d.get(key)
+        if not isinstance(v, dict):
+            errors.append(f"{path}: attendu dict, reçu {_type_name(v)}")
+            return
+        for c in sub:
+            c(v, errors)
+    return check
+
+def compile_schema(schema: Dict[str, Any], prefix: str = "") -> Tuple[Check, ...]:
+    """Transforme le schéma déclaratif en une suite de fonctions de contrôle (une fois pour toutes)."""
+    checks = []
+    for key, spec in schema.items():
+        path = prefix + key
+        if isinstance(spec, dict):
+            checks.append(_dict_check(key, path, compile_schema(spec, path + ".")))
+        else:
+            checks.append(_leaf_check(key, path, spec))
+    return tuple(checks)
+
+_CHECKS = compile_schema(SCHEMA)
+
+def validate_record(rec: Any) -> List[str]:
+    """Retourne la liste des erreurs de type d'une race (vide si conforme)."""
+    if not isinstance(rec, dict):
+        return [f"race: attendu dict, reçu {_type_name(rec)}"]
+    errors: List[str] = []
+    for c in _CHECKS:
+        c(rec, errors)
+    return errors
+
+def record_hash(rec: Any) -> str:
+    raw = json.dumps(rec, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+# ---------- validation incrémentale ----------
+class SchemaValidator:
+    """
+    Valide une liste de races en ne recontrôlant que celles dont le contenu a changé
+    depuis la dernière validation réussie du même fichier cible.
+    """
+    def __init__(self, cache_file: str | None = CACHE_FILE):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.cache: Dict[str, List[str]] = {}
+        if self.cache_file and self.cache_file.exists():
+            try:
+                self.cache = json.loads(self.cache_file.read_text(encoding="utf-8"))
+            except Exception:
+                self.cache = {}
+
+    def check(self, breeds: List[Any], target: str) -> Dict[str, Any]:
+        known = set(self.cache.get(target, []))
+        valid_hashes = []
+        failures = []
+        skipped = 0
+        for i, rec in enumerate(breeds):
+            h = record_hash(rec)
+            if h in known:
+                skipped += 1
+                valid_hashes.append(h)
+                continue
+            errors = validate_record(rec)
+            if errors:
+                failures.append({
+                    "index": i,
+                    "id": rec.get("id") if isinstance(rec, dict) else None,
+                    "breed": rec.get("breed") if isinstance(rec, dict) else None,
+                    "errors": errors,
+                })
+            else:
+                valid_hashes.append(h)
+        self.cache[target] = valid_hashes
+        return {
+            "total": len(breeds),
+            "checked": len(breeds) - skipped,
+            "skipped_unchanged": skipped,
+            "failures": failures,
+        }
+
+    def save(self):
+        if not self.cache_file:
+            return
+        self.cache_file.write_text(json.dumps(self.cache, separators=(",", ":")), encoding="utf-8")
+
+def check_breeds(breeds: List[Any], target: str, strict: bool = STRICT) -> List[Dict[str, Any]]:
+    """Valide (incrémentalement) et affiche un résumé ; lève SystemExit en mode strict."""
+    validator = SchemaValidator()
+    res = validator.check(breeds, str(target))
+    validator.save()
+    failures = res["failures"]
+    if failures:
+        print(f"   ⚠️ Schéma : {len(failures)} race(s) invalide(s) dans {target}")
+        for f in failures[:5]:
+            print(f"     - {f['id']}: {f['breed']} -> {'; '.join(f['errors'])}")
+        if strict:
+            raise SystemExit(f"❌ Schéma invalide ({target}), écriture annulée.")
+    return failures
+
+def write_breeds(path, breeds: List[Any], strict: bool = STRICT) -> List[Dict[str, Any]]:
+    """Valide puis écrit {"breeds": [...]} au format habituel du dépôt."""
+    failures = check_breeds(breeds, str(path), strict=strict)
+    Path(path).write_text(json.dumps({"breeds": breeds}, ensure_ascii=False, indent=2), encoding="utf-8")
+    return failures
+
+def main():
+    files = sys.argv[1:] or ["breeds_merged_aligned.json"]
+    bad = 0
+    for f in files:
+        breeds = json.loads(Path(f).read_text(encoding="utf-8")).get("breeds", [])
+        validator = SchemaValidator()
+        res = validator.check(breeds, f)
+        validator.save()
+        bad += len(res["failures"])
+        print(f"✔ {f}: {res['total']} races, {res['checked']} contrôlées, "
+              f"{res['skipped_unchanged']} inchangées, {len(res['failures'])} invalides")
+        for fl in res["failures"][:10]:
+            print(f"   - {fl['id']}: {fl['breed']} -> {'; '.join(fl['errors'])}")
+    if bad:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
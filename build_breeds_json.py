@@ -2,7 +2,6 @@
 import re
 import json
 import unicodedata
-import pandas as pd
 from typing import List
 
 INFILE  = "dog_breeds_selected.csv"
@@ -43,7 +42,7 @@ def norm_text(s: str) -> str:
     return s
 
 def is_empty(val: str) -> bool:
-    if pd.isna(val): return True
+    if val is None or val != val: return True   # None / NaN
     s = str(val).strip()
     return s == "" or s in {"-", "—", "n/a", "na", "none", "null"}
 
@@ -80,6 +79,7 @@ def extract_colors(raw_robe: str) -> List[str]:
     return found
 
 def main():
+    import pandas as pd   # chargé seulement pour la construction (ALLOWED_COLORS reste importable sans)
     df = pd.read_csv(INFILE, dtype=str).fillna("")
     # garde uniquement les lignes complètes
     required = ["Nom", "Région", "Taille", "Poids", "Robe"]
@@ -5,7 +5,9 @@ import re
 import json
 from pathlib import Path
 
-INFILE = "dog_breeds_structured.csv"
+from infobox_keys import LONG_FILE, iter_long_breeds
+
+INFILE = "dog_breeds_structured.csv"   # seulement si dog_breeds_long.csv est absent
 OUTFILE = "breeds_links.json"
 
 def strip_accents(s: str) -> str:
@@ -19,7 +21,11 @@ def norm_sort_key(s: str) -> str:
     return s
 
 def main():
-    df = pd.read_csv(INFILE, dtype=str).fillna("")
+    if Path(LONG_FILE).exists():
+        # format long du scraper en priorité : la vue large n'est réécrite qu'avec --wide
+        df = pd.DataFrame([{"Nom": b, "URL": u} for b, u, _ in iter_long_breeds(LONG_FILE)])
+    else:
+        df = pd.read_csv(INFILE, dtype=str).fillna("")
 
     # Vérifie colonnes attendues
     if not {"Nom", "URL"}.issubset(df.columns):
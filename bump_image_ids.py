@@ -2,6 +2,8 @@
 import re
 from pathlib import Path
 
+from rename_journal import RenameTransaction, RenameError
+
 IMAGES_DIR = Path("images")  # dossier des images
 MIN_ID = 114    # inclut 114_Carolina_Dog.jpg
 MAX_ID = 148    # inclut 148_Chien_de_Castro_Laboreiro.jpg
@@ -43,29 +45,19 @@ def main():
         print("Rien à renommer pour l’intervalle demandé.")
         return
 
-    # 2) Phase temporaire (éviter les collisions)
-    temp_map = []
-    for src, dst in plans:
-        tmp = src.with_name(f"__tmp__{src.name}")
-        if DRY_RUN:
-            print(f"[DRY] {src.name} -> {dst.name}")
-        else:
-            src.rename(tmp)
-        temp_map.append((tmp, dst))
+    # 2) Une seule transaction journalisée : ordre sans collision, JSON de références à jour
+    tx = RenameTransaction(IMAGES_DIR)
+    try:
+        for src, dst in plans:
+            tx.add(src.name, dst.name)
+        renamed = tx.commit(dry_run=DRY_RUN)
+    except RenameError as e:
+        print(f"❌ {e}")
+        return
 
     if DRY_RUN:
-        print(f"[DRY] {len(plans)} fichiers seraient renommés.")
+        print(f"[DRY] {renamed} fichiers seraient renommés.")
         return
-
-    # 3) Phase finale
-    renamed = 0
-    for tmp, dst in temp_map:
-        if dst.exists():
-            dst.unlink()  # overwrite si besoin
-        tmp.rename(dst)
-        renamed += 1
-        print(f"✓ {dst.name}")
-
     print(f"✔ Fini : {renamed} fichiers renommés (+{DELTA}).")
 
 if __name__ == "__main__":
@@ -2,18 +2,23 @@
 import json
 import os
 import re
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse, unquote
-import requests
-from bs4 import BeautifulSoup
+
+import wiki_http
+from html_pool import ParsePool
+from http_metrics import METRICS
+from image_phash import placeholder_match_bytes
+from stage_profile import StageProfiler
 
 # ---------------- Config ----------------
 BREEDS_JSON = "breeds_links.json"   # ou ton fichier qui contient "breeds": [{ "id","breed","url" }, ...]
 OUT_DIR = Path("images")
-PAUSE_SECONDS = 1.0   # délai poli entre requêtes (augmente si tu télécharges bcp d'images)
+PAUSE_SECONDS = 1.0   # délai poli entre requêtes vers un même hôte, tous threads confondus
 TIMEOUT = 20
-MAX_RETRIES = 2
+MAX_RETRIES = 4
+FETCH_WORKERS = wiki_http.CONCURRENCY   # races traitées en parallèle (threads)
 USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
               "AppleWebKit/537.36 (KHTML, like Gecko) "
               "Chrome/124.0 Safari/537.36 furious-scraper/1.0 +https://example.com")
@@ -22,20 +27,12 @@ USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
 THUMB_SIZE = 1000
 
 # ---------------- Helpers ----------------
-session = requests.Session()
-session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "fr,en;q=0.8"})
+session = wiki_http.lazy_session({"User-Agent": USER_AGENT, "Accept-Language": "fr,en;q=0.8"})
+parse_pool = ParsePool()   # analyse HTML dans des processus séparés
 
 def safe_get(url, *, timeout=TIMEOUT, allow_redirects=True):
-    last_exc = None
-    for attempt in range(MAX_RETRIES + 1):
-        try:
-            r = session.get(url, timeout=timeout, allow_redirects=allow_redirects)
-            r.raise_for_status()
-            return r
-        except Exception as e:
-            last_exc = e
-            time.sleep(1.0 + attempt)
-    raise last_exc
+    return wiki_http.request(session, "GET", url, timeout=timeout, allow_redirects=allow_redirects,
+                             retries=MAX_RETRIES)
 
 def filename_from_url(url):
     # essai d'extraire un nom de fichier lisible depuis l'url
@@ -83,10 +80,8 @@ def fetch_image_via_api(page_url):
     }
 
     try:
-        r = safe_get(api_base, timeout=TIMEOUT)
         # use POST to avoid very long URLs
-        r = session.post(api_base, params=params, timeout=TIMEOUT)
-        r.raise_for_status()
+        r = wiki_http.request(session, "POST", api_base, params=params, timeout=TIMEOUT, retries=MAX_RETRIES)
         data = r.json()
         # data["query"]["pages"][0]["thumbnail"]["source"] maybe present
         pages = data.get("query", {}).get("pages", [])
@@ -111,8 +106,12 @@ def fetch_image_via_infobox(page_url):
         r = safe_get(page_url)
     except Exception as e:
         return None, f"http-error:{e}"
+    return parse_pool.run(infobox_image_src, r.text, page_url)
 
-    soup = BeautifulSoup(r.text, "html.parser")
+def infobox_image_src(html, page_url):
+    """Partie CPU de fetch_image_via_infobox (exécutée dans le pool de processus)."""
+    from bs4 import BeautifulSoup   # import paresseux : bs4 n'est chargé que pour analyser
+    soup = BeautifulSoup(html, "html.parser")
     # cherche table infobox
     infobox = None
     for t in soup.find_all("table"):
@@ -163,9 +162,16 @@ def download_image(url, dest_path: Path):
     if not ext:
         ext = Path(urlparse(url).path).suffix or ".jpg"
     # final filename: ensure unique
+    # placeholder connu (silhouette, drapeau...) reconnu par empreinte perceptuelle
+    label = placeholder_match_bytes(r.content)
+    if label:
+        return False, f"placeholder:{label}"
     final = dest_path.with_suffix(ext)
-    with open(final, "wb") as f:
+    # remplacement (pas d'écriture en place) : une vue liée au magasin d'images n'est pas modifiée
+    part = final.with_name(f".part_{final.name}")
+    with open(part, "wb") as f:
         f.write(r.content)
+    os.replace(part, final)
     return True, str(final)
 
 # ---------------- Main flow ----------------
@@ -174,12 +180,14 @@ def main():
         print("❌ Fichier", BREEDS_JSON, "introuvable. Génère d'abord breeds_links.json")
         return
 
+    METRICS.serve_from_env()
+    wiki_http.set_min_interval(PAUSE_SECONDS)
+    prof = StageProfiler("download_breed_images")
     breeds = json.loads(Path(BREEDS_JSON).read_text(encoding="utf-8")).get("breeds", [])
-    report = []
     total = len(breeds)
-    print(f"Starting download for {total} breeds (pause {PAUSE_SECONDS}s)...")
+    print(f"Starting download for {total} breeds (pause {PAUSE_SECONDS}s, {FETCH_WORKERS} threads)...")
 
-    for i, item in enumerate(breeds, start=1):
+    def process(i, item):
         name = item.get("breed") or item.get("name") or f"breed_{i}"
         page_url = item.get("url") or item.get("URL") or ""
         safe_name = re.sub(r"[^\w\-_ ]+", "_", name).strip()
@@ -189,12 +197,10 @@ def main():
         result = {"id": item.get("id", i), "breed": name, "url": page_url, "image": None, "note": None}
         if not page_url:
             result["note"] = "no-url"
-            report.append(result)
-            continue
+            return result
 
         # 1) try API
         img_url, note = fetch_image_via_api(page_url)
-        time.sleep(0.2)
         # 2) fallback to infobox if API fails
         if not img_url:
             img_url, note = fetch_image_via_infobox(page_url)
@@ -202,9 +208,7 @@ def main():
         if not img_url:
             result["note"] = f"no-image-found ({note})"
             print(f"[{i}/{total}] {name} -> NO IMAGE ({note})")
-            report.append(result)
-            time.sleep(PAUSE_SECONDS)
-            continue
+            return result
 
         # Some Wikimedia thumbnails include /thumb/ path with extra parts: prefer original by removing /thumb/.../<filename>
         # but we simply download the URL found (it may be already large)
@@ -220,11 +224,20 @@ def main():
             result["note"] = out
             print(f"[{i}/{total}] {name} -> ERROR {out}")
 
-        report.append(result)
-        time.sleep(PAUSE_SECONDS)
+        return result
+
+    # threads pour le réseau ; ex.map conserve l'ordre du fichier dans le rapport
+    with ThreadPoolExecutor(max_workers=max(1, FETCH_WORKERS)) as ex:
+        report = list(ex.map(process, range(1, total + 1), breeds))
+    parse_pool.shutdown()
 
-    # write a report summary
-    Path("download_report.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    # write a report summary (+ HTTP totals)
+    prof.lap("download")
+    out = prof.attach({"results": report, "http": METRICS.totals(), "parsing": parse_pool.stats()})
+    Path("download_report.json").write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    METRICS.flush()
+    METRICS.print_summary()
+    parse_pool.print_summary()
     print("Done. Report saved to download_report.json")
 
 if __name__ == "__main__":
@@ -1,56 +1,61 @@
 # filter_dogs.py
+import csv
 import sys
-import pandas as pd
+from pathlib import Path
 
-INFILE  = sys.argv[1] if len(sys.argv) > 1 else "dog_breeds_structured.csv"
+from infobox_keys import ALIASES, LONG_FIELDS, LONG_FILE, iter_long_breeds
+
+# Entrée : format long du scraper (par défaut s'il existe) ou CSV large
+INFILE  = sys.argv[1] if len(sys.argv) > 1 else (LONG_FILE if Path(LONG_FILE).exists() else "dog_breeds_structured.csv")
 OUTCSV  = "dog_breeds_selected.csv"
 OUTTXT  = "dog_breeds_selected.txt"   # format "plat" : Nom, Région: ..., Taille: ...
 
-# Aliases possibles rencontrés dans ton CSV
-ALIASES = {
-    "Nom": ["Nom", "Name"],
-    "Région": [
-        "Région", "Région d’origine", "Région d'origine",
-        "Origin", "Země původu", "Région d'élevage"
-    ],
-    "Taille": [
-        "Taille", "Height", "Výška*", "Hauteur"
-    ],
-    "Poids": [
-        "Poids", "Weight", "Hmotnost"
-    ],
-    "Robe": [
-        "Robe", "Color", "Colour", "Barva", "Coat", "Toison"
-    ],
-}
+COLUMNS = ["Nom", "Région", "Taille", "Poids", "Robe"]
 
 def pick_first_nonempty(row, candidates):
     for col in candidates:
-        if col in row and pd.notna(row[col]) and str(row[col]).strip():
-            return str(row[col]).strip()
+        value = row.get(col)
+        if value is not None and value == value and str(value).strip():   # value == value : exclut NaN
+            return str(value).strip()
     return ""
 
-def main():
-    df = pd.read_csv(INFILE, dtype=str).fillna("")
+def records_from_wide(path):
+    import pandas as pd   # seulement pour le CSV large
+    df = pd.read_csv(path, dtype=str).fillna("")
+    for _, r in df.iterrows():
+        yield {c: pick_first_nonempty(r, ALIASES[c]) for c in COLUMNS}
 
-    # Construire un DataFrame propre avec nos 5 colonnes
-    out = pd.DataFrame()
-    out["Nom"]    = df.apply(lambda r: pick_first_nonempty(r, ALIASES["Nom"]), axis=1)
-    out["Région"] = df.apply(lambda r: pick_first_nonempty(r, ALIASES["Région"]), axis=1)
-    out["Taille"] = df.apply(lambda r: pick_first_nonempty(r, ALIASES["Taille"]), axis=1)
-    out["Poids"]  = df.apply(lambda r: pick_first_nonempty(r, ALIASES["Poids"]), axis=1)
-    out["Robe"]   = df.apply(lambda r: pick_first_nonempty(r, ALIASES["Robe"]), axis=1)
+def records_from_long(path):
+    # un bloc par race ; priorité des libellés = ordre de ALIASES (comme pour le CSV large)
+    for breed, _, fields in iter_long_breeds(path):
+        row = {raw: value for raw, _, value in fields}
+        row["Nom"] = breed
+        rec = {c: pick_first_nonempty(row, ALIASES[c]) for c in COLUMNS}
+        for c in COLUMNS[1:]:
+            if not rec[c]:
+                # libellé reconnu par la table compilée mais absent de la liste (variante d'écriture)
+                rec[c] = next((v.strip() for _, canon, v in fields if canon == c and v.strip()), "")
+        yield rec
+
+def main():
+    with open(INFILE, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), [])
+    is_long = tuple(header[:len(LONG_FIELDS)]) == LONG_FIELDS
+    records = records_from_long(INFILE) if is_long else records_from_wide(INFILE)
 
     # Optionnel : retirer les lignes sans Nom
-    out = out[out["Nom"].str.strip() != ""]
+    out = [r for r in records if r["Nom"].strip() != ""]
 
     # Sauvegarde CSV
-    out.to_csv(OUTCSV, index=False, encoding="utf-8")
+    with open(OUTCSV, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=COLUMNS, lineterminator="\n")
+        w.writeheader()
+        w.writerows(out)
     print(f"✔ Écrit {OUTCSV} ({len(out)} lignes)")
 
     # Sauvegarde texte "plat" : Nom, Région: ..., Taille: ...
     with open(OUTTXT, "w", encoding="utf-8") as f:
-        for _, r in out.iterrows():
+        for r in out:
             pieces = [r["Nom"]]
             if r["Région"]: pieces.append(f"Région: {r['Région']}")
             if r["Taille"]: pieces.append(f"Taille: {r['Taille']}")
@@ -2,6 +2,8 @@
 import json, re
 from pathlib import Path
 
+from rename_journal import RenameTransaction, RenameError
+
 IMAGES_DIR = Path("images")
 JSON_FILES = [Path("breeds_links.json")]   # ajoute ici d'autres JSON si besoin
 OUT_SUFFIX = "_fixed"                      # écrit p.ex. breeds_links_fixed.json
@@ -10,13 +12,13 @@ def cap_first(s: str) -> str:
     s = s or ""
     return (s[:1].upper() + s[1:]) if s else s
 
-def rename_images_capfirst(images_dir: Path):
+def rename_images_capfirst(images_dir: Path, tx: RenameTransaction):
     """
-    Renomme ID_nom.ext -> ID_Nom.ext en ne capitalisant que la 1re lettre du segment nom.
-    Compatible Windows (double hop).
+    Planifie ID_nom.ext -> ID_Nom.ext en ne capitalisant que la 1re lettre du segment nom.
+    Les changements de casse seule passent par un nom temporaire (Windows/macOS).
     """
     pat = re.compile(r"^(\d{1,})_([^.]+)\.(jpg|jpeg|png)$", re.IGNORECASE)
-    changed = 0; skipped = 0; problems = 0
+    skipped = 0
 
     if not images_dir.exists():
         print(f"⚠️  Dossier {images_dir} introuvable.")
@@ -37,23 +39,11 @@ def rename_images_capfirst(images_dir: Path):
         if new_name == p.name:
             skipped += 1
             continue
+        tx.add(p.name, new_name)
 
-        try:
-            tmp = p.with_name(f"__tmp__{p.name}")  # double renommage pour forcer la casse
-            p.rename(tmp)
-            dest = p.with_name(new_name)
-            if dest.exists():
-                dest.unlink()  # overwrite
-            tmp.rename(dest)
-            changed += 1
-            print(f"✓ {p.name} -> {dest.name}")
-        except Exception as e:
-            problems += 1
-            print(f"✗ {p.name} : {e}")
-
-    print(f"Images: {changed} renommées, {skipped} inchangées, {problems} erreurs.")
+    print(f"Images: {len(tx)} à renommer, {skipped} inchangées.")
 
-def fix_json_capfirst(json_path: Path):
+def fix_json_capfirst(json_path: Path, tx: RenameTransaction):
     if not json_path.exists():
         print(f"⚠️  {json_path} introuvable.")
         return
@@ -67,10 +57,21 @@ def fix_json_capfirst(json_path: Path):
             b["breed"] = new
             changed += 1
     out_path = json_path.with_name(json_path.stem + OUT_SUFFIX + json_path.suffix)
-    out_path.write_text(json.dumps({"breeds": breeds}, ensure_ascii=False, indent=2), encoding="utf-8")
+    tx.write_json(out_path, {"breeds": breeds})
     print(f"JSON: {changed} noms corrigés → {out_path.name}")
 
-if __name__ == "__main__":
-    rename_images_capfirst(IMAGES_DIR)
+def main():
+    # images et JSON corrigés dans une seule transaction journalisée
+    tx = RenameTransaction(IMAGES_DIR)
+    rename_images_capfirst(IMAGES_DIR, tx)
     for jf in JSON_FILES:
-        fix_json_capfirst(jf)
+        fix_json_capfirst(jf, tx)
+    try:
+        tx.commit()
+    except RenameError as e:
+        print(f"❌ {e}")
+        return
+    print(f"✔ {len(tx)} images renommées, {len(tx.writes)} JSON écrits.")
+
+if __name__ == "__main__":
+    main()
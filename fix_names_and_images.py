@@ -2,6 +2,8 @@ import json
 import re
 from pathlib import Path
 
+from rename_journal import RenameTransaction, RenameError
+
 IMAGES_DIR = Path("images")
 LINKS_FILE = "breeds_links.json"
 OUT_FILE = "breeds_links_fixed.json"
@@ -9,8 +11,7 @@ OUT_FILE = "breeds_links_fixed.json"
 def cap_first(s: str) -> str:
     return (s[:1].upper() + s[1:]) if s else s
 
-def fix_image_names():
-    renamed = []
+def fix_image_names(tx: RenameTransaction):
     for p in IMAGES_DIR.glob("*.*"):
         name = p.name
         m = re.match(r"^(\d+)_([^.]+)(\.[^.]+)$", name)
@@ -20,13 +21,10 @@ def fix_image_names():
         # Majuscule après underscore
         fixed_breed = cap_first(breed)
         new_name = f"{int(bid):03d}_{fixed_breed}{ext.lower()}"
-        new_path = p.with_name(new_name)
-        if new_path != p:
-            p.rename(new_path)
-            renamed.append((p.name, new_path.name))
-    return renamed
+        tx.add(name, new_name)
+    return list(tx.moves.items())
 
-def fix_json_breeds():
+def fix_json_breeds(tx: RenameTransaction):
     data = json.loads(Path(LINKS_FILE).read_text(encoding="utf-8"))
     breeds = data.get("breeds", [])
     changed = []
@@ -36,22 +34,34 @@ def fix_json_breeds():
         if new != old:
             b["breed"] = new
             changed.append((old, new))
-    Path(OUT_FILE).write_text(json.dumps({"breeds": breeds}, ensure_ascii=False, indent=2), encoding="utf-8")
+    tx.write_json(OUT_FILE, {"breeds": breeds})
     return changed
 
 def main():
+    # images et JSON dans une seule transaction journalisée
+    tx = RenameTransaction(IMAGES_DIR)
+    renamed, changed = [], None
     if not IMAGES_DIR.exists():
         print(f"⚠️ Le dossier {IMAGES_DIR} n’existe pas, pas de renommage d’images.")
     else:
-        renamed = fix_image_names()
-        print(f"✔ Renommage d’images terminé ({len(renamed)} fichiers modifiés)")
-        for old,new in renamed[:10]:
-            print(f"   {old} -> {new}")
+        renamed = fix_image_names(tx)
 
     if not Path(LINKS_FILE).exists():
         print(f"⚠️ Fichier {LINKS_FILE} introuvable.")
     else:
-        changed = fix_json_breeds()
+        changed = fix_json_breeds(tx)
+
+    try:
+        tx.commit()
+    except RenameError as e:
+        print(f"❌ {e}")
+        return
+
+    if IMAGES_DIR.exists():
+        print(f"✔ Renommage d’images terminé ({len(renamed)} fichiers modifiés)")
+        for old,new in renamed[:10]:
+            print(f"   {old} -> {new}")
+    if changed is not None:
         print(f"✔ JSON corrigé ({len(changed)} noms modifiés) → {OUT_FILE}")
         for old,new in changed[:10]:
             print(f"   {old} -> {new}")
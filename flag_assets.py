@@ -0,0 +1,238 @@
+# flag_assets.py
+"""
+Drapeaux des origines en local : origins_index_updated.json pointe sur flagcdn.com (PNG 32x24 ou SVG
+selon les entrées) ; ici chaque drapeau distinct est téléchargé une seule fois, normalisé en raster
+de taille fixe et regroupé dans une planche unique.
+
+    flags/af.png, flags/af.webp          # FLAG_SIZE px, fond transparent, proportions conservées
+    flags/flags_sprite.png / .webp       # tous les drapeaux, COLS colonnes
+    flags/flags_sprite.json              # {"cell", "cols", "width", "height", "sprites": {"1": {"x","y","w","h","flag"}}}
+    origins_index_local.json             # image -> fichier local, image_remote = URL d'origine, sprite -> case
+
+- téléchargements via wiki_http (relances, métriques) et son cache disque CACHE_DIR : un second
+  passage ne fait aucune requête ; --refresh revalide (If-None-Match / If-Modified-Since)
+- les URL flagcdn (PNG ou SVG) sont ramenées au PNG FETCH_SIZE du même code : même rendu pour
+  toutes les origines, pas de rastérisation SVG locale ; SVG via cairosvg seulement en repli
+- --standin : exécution contre le serveur local (mediawiki_standin) ; sorties et cache dans
+  --standin-dir (persistant : un second passage exerce le cache, --refresh les réponses 304),
+  sinon dans un dossier temporaire
+
+Nécessite Pillow (pip install pillow).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import wiki_http
+from http_metrics import METRICS
+from stage_profile import StageProfiler
+
+INDEX_IN = "origins_index_updated.json"
+INDEX_OUT = "origins_index_local.json"
+OUT_DIR = Path("flags")
+CACHE_DIR = Path("flags_cache")
+SPRITE_NAME = "flags_sprite"
+FLAG_SIZE = (32, 24)
+FETCH_SIZE = "64x48"        # 2x FLAG_SIZE : réduction propre, et réserve pour un rendu hi-DPI
+COLS = 16
+WEBP_QUALITY = 90
+FETCH_WORKERS = wiki_http.CONCURRENCY
+TIMEOUT = 20
+
+session = wiki_http.lazy_session({"Accept": "image/png,image/svg+xml;q=0.9,*/*;q=0.5"})
+
+# ---------- URL ----------
+def flag_code(url: str) -> str | None:
+    """Code flagcdn ("af", "us-ak", "gb-eng") d'une URL flagcdn.com, sinon None."""
+    p = urlsplit(url)
+    if not (p.hostname or "").endswith("flagcdn.com"):
+        return None
+    stem = Path(p.path).stem.lower()
+    return stem or None
+
+def fetch_url(url: str) -> str:
+    """URL réellement téléchargée : le PNG FETCH_SIZE pour flagcdn, l'URL telle quelle sinon."""
+    code = flag_code(url)
+    return f"https://flagcdn.com/{FETCH_SIZE}/{code}.png" if code else url
+
+def asset_name(url: str) -> str:
+    code = flag_code(url)
+    if code:
+        return code
+    return "x" + hashlib.blake2b(url.encode("utf-8"), digest_size=6).hexdigest()
+
+# ---------- rastérisation ----------
+def rasterize(data: bytes, ctype: str | None):
+    """Octets PNG/JPEG/WebP (ou SVG si cairosvg est installé) -> image PIL RGBA FLAG_SIZE centrée."""
+    from PIL import Image, ImageOps
+    if (ctype or "").endswith("svg+xml") or data.lstrip()[:5] in (b"<svg ", b"<?xml"):
+        try:
+            import cairosvg
+        except ImportError:
+            raise RuntimeError("SVG sans cairosvg (pip install cairosvg)") from None
+        data = cairosvg.svg2png(bytestring=data, output_width=FLAG_SIZE[0] * 2)
+    with Image.open(BytesIO(data)) as im:
+        im = ImageOps.contain(im.convert("RGBA"), FLAG_SIZE, Image.LANCZOS)
+    canvas = Image.new("RGBA", FLAG_SIZE, (0, 0, 0, 0))
+    canvas.paste(im, ((FLAG_SIZE[0] - im.width) // 2, (FLAG_SIZE[1] - im.height) // 2))
+    return canvas
+
+def save_image(im, path: Path):
+    part = path.with_name(f".part_{path.name}")
+    if path.suffix == ".webp":
+        im.save(part, format="WEBP", quality=WEBP_QUALITY, method=6)
+    else:
+        im.save(part, format="PNG", optimize=True)
+    os.replace(part, path)
+
+# ---------- étapes ----------
+def fetch_flags(urls, cache: wiki_http.DiskCache, refresh: bool = False) -> dict:
+    """URL d'origine -> (image PIL | None, erreur | None) ; une requête au plus par cible distincte."""
+    by_target = {}
+    for url in urls:   # PNG et SVG d'un même code -> une seule cible fetch_url()
+        by_target.setdefault(fetch_url(url), []).append(url)
+
+    def get(url):
+        data, ctype = cache.get(session, url, revalidate=refresh, kind="image", timeout=TIMEOUT)
+        return rasterize(data, ctype)
+
+    def one(target):
+        try:
+            im = get(target)
+            return {url: (im, None) for url in by_target[target]}
+        except Exception as e:
+            err = str(e)
+        out = {}
+        for url in by_target[target]:
+            if url == target:
+                out[url] = (None, err)
+                continue
+            # code inconnu au format raster : on retente l'URL d'origine (SVG -> cairosvg)
+            try:
+                out[url] = (get(url), None)
+            except Exception as e2:
+                out[url] = (None, f"{err} ; {e2}")
+        return out
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, FETCH_WORKERS)) as ex:
+        for out in ex.map(one, by_target):
+            results.update(out)
+    return results
+
+def build_sprite(names, images: dict, out_dir: Path) -> tuple:
+    """Une case FLAG_SIZE par drapeau distinct (ordre de `names`) ; -> ({nom: (x, y)}, taille de la planche)."""
+    from PIL import Image
+    rows = max(1, (len(names) + COLS - 1) // COLS)
+    sheet = Image.new("RGBA", (COLS * FLAG_SIZE[0], rows * FLAG_SIZE[1]), (0, 0, 0, 0))
+    cells = {}
+    for pos, name in enumerate(names):
+        xy = ((pos % COLS) * FLAG_SIZE[0], (pos // COLS) * FLAG_SIZE[1])
+        sheet.paste(images[name], xy)
+        cells[name] = xy
+    save_image(sheet, out_dir / f"{SPRITE_NAME}.png")
+    save_image(sheet, out_dir / f"{SPRITE_NAME}.webp")
+    return cells, sheet.size
+
+def run(index_in: Path, index_out: Path, out_dir: Path, cache_dir: Path, refresh: bool = False) -> int:
+    prof = StageProfiler("flag_assets")
+    origins = json.loads(Path(index_in).read_text(encoding="utf-8")).get("origins", [])
+    urls = sorted({o["image"] for o in origins if o.get("image")})
+    print(f"Drapeaux : {len(origins)} origines, {len(urls)} URL distinctes")
+
+    cache = wiki_http.DiskCache(cache_dir)
+    fetched = fetch_flags(urls, cache, refresh)
+    cache.save()
+    errors = [(u, err) for u, (_, err) in fetched.items() if err]
+    prof.lap("fetch")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    images, by_url = {}, {}
+    for url, (im, _) in fetched.items():
+        if im is None:
+            continue
+        name = asset_name(url)
+        by_url[url] = name
+        if name not in images:
+            images[name] = im
+            save_image(im, out_dir / f"{name}.png")
+            save_image(im, out_dir / f"{name}.webp")
+    names = sorted(images)
+    cells, (width, height) = build_sprite(names, images, out_dir)
+    prof.lap("raster")
+
+    sprites, local = {}, []
+    for o in origins:
+        o = dict(o)
+        name = by_url.get(o.get("image"))
+        if name:
+            x, y = cells[name]
+            sprites[str(o["id"])] = {"x": x, "y": y, "w": FLAG_SIZE[0], "h": FLAG_SIZE[1], "flag": name}
+            o["image_remote"] = o["image"]
+            o["image"] = (out_dir / f"{name}.png").as_posix()
+            o["image_webp"] = (out_dir / f"{name}.webp").as_posix()
+            o["sprite"] = sprites[str(o["id"])]
+        local.append(o)   # drapeau en erreur : l'URL distante reste en place
+
+    sprite_map = {"cell": list(FLAG_SIZE), "cols": COLS, "width": width, "height": height,
+                  "png": f"{SPRITE_NAME}.png", "webp": f"{SPRITE_NAME}.webp", "sprites": sprites}
+    tmp = out_dir / f"{SPRITE_NAME}.json.tmp"
+    tmp.write_text(json.dumps(sprite_map, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, out_dir / f"{SPRITE_NAME}.json")
+    sheet = {"png": (out_dir / f"{SPRITE_NAME}.png").as_posix(), "webp": (out_dir / f"{SPRITE_NAME}.webp").as_posix(),
+             "map": (out_dir / f"{SPRITE_NAME}.json").as_posix(), "cell": list(FLAG_SIZE)}
+    tmp = Path(str(index_out) + ".tmp")
+    tmp.write_text(json.dumps({"sprite": sheet, "origins": local}, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, index_out)
+    prof.lap("write")
+
+    st = cache.stats
+    print(f"✔ {len(names)} drapeaux ({st['miss']} téléchargés, {st['hit']} en cache, "
+          f"{st['revalidated']} revalidés), {len(sprites)}/{len(origins)} origines en local → {index_out}")
+    print(f"   ◦ planche {width}x{height} : {out_dir / SPRITE_NAME}.png / .webp")
+    for url, err in errors[:10]:
+        print(f"   ✗ {url} : {err}")
+    METRICS.flush()
+    METRICS.print_summary()
+    prof.dump()
+    return 0
+
+def main():
+    try:
+        from PIL import Image  # vérifie la dispo de Pillow en amont
+    except ImportError:
+        print("⚠️  Installe Pillow avant:  pip install pillow")
+        return 1
+    ap = argparse.ArgumentParser(description="Drapeaux des origines en local + planche unique.")
+    ap.add_argument("--refresh", action="store_true", help="revalider le cache (requêtes conditionnelles)")
+    ap.add_argument("--standin", action="store_true", help="servir les drapeaux depuis le stand-in local")
+    ap.add_argument("--standin-dir", default=None,
+                    help="dossier des sorties et du cache en mode --standin (défaut : dossier temporaire)")
+    args = ap.parse_args()
+    METRICS.serve_from_env()
+
+    if not args.standin:
+        return run(Path(INDEX_IN), Path(INDEX_OUT), OUT_DIR, CACHE_DIR, args.refresh)
+
+    from mediawiki_standin import StandinServer, build_flag_fixtures, route_to_standin
+    origins = json.loads(Path(INDEX_IN).read_text(encoding="utf-8")).get("origins", [])
+    urls = {o["image"] for o in origins if o.get("image")}
+    store = build_flag_fixtures(sorted(urls | {fetch_url(u) for u in urls}))
+    work = Path(args.standin_dir) if args.standin_dir else Path(tempfile.mkdtemp(prefix="flag_assets_"))
+    work.mkdir(parents=True, exist_ok=True)
+    with StandinServer(store) as srv, route_to_standin(srv.base_url):
+        print(f"▶ Stand-in {srv.base_url} ({len(store.entries)} fixtures), sorties dans {work}")
+        code = run(Path(INDEX_IN), work / INDEX_OUT, work / OUT_DIR, work / CACHE_DIR, args.refresh)
+        st = srv.stats.snapshot()
+        print(f"   ◦ stand-in : {st['requests']['image']} requêtes, {st['not_modified']} réponses 304")
+        return code
+
+if __name__ == "__main__":
+    sys.exit(main())
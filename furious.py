@@ -0,0 +1,203 @@
+# furious.py
+"""
+Point d'entrée unique du pipeline : `python furious.py <commande> [args du script]`.
+
+    python furious.py list                      # toutes les commandes
+    python furious.py verify ids
+    python furious.py find-gaps --set INFILE=breeds_merged_aligned.json
+    python furious.py -C data/ scrape infobox --resume
+
+Chaque commande importe son module à la demande (pandas, bs4, requests ne sont chargés
+que par les commandes qui en ont besoin) puis appelle son main().
+
+Surcharges des constantes de module (INFILE, OUT_FILE, IMAGES_DIR, ...) :
+- --set NOM=VALEUR (répétable), converti selon le type de la constante (Path, int, float, bool, liste JSON)
+- fichier furious.json (ou --config) : {"paths": {NOM: valeur, ...}, "commands": {"verify ids": {NOM: valeur}}}
+  "paths" s'applique à toute commande dont le module définit la constante.
+"""
+import importlib
+import json
+import os
+import sys
+import time
+from pathlib import Path, PurePath
+
+CONFIG_FILE = "furious.json"
+
+# commande -> (module, description)
+COMMANDS = {
+    # scraping / ingestion
+    "scrape infobox":        ("scrape_wiki_dog_infobox", "infobox des races listées sur Commons"),
+    "scrape local-names":    ("getwkipedia", "colonne 'Local names' de la liste Commons"),
+    "ingest dump":           ("ingest_wiki_dump", "dump Wikipedia / Wikidata hors ligne"),
+    "filter":                ("filter_dog", "Nom/Région/Taille/Poids/Robe depuis le scraping"),
+    "sort missing":          ("sort_by_missing", "races triées par champs manquants"),
+    "sort names":            ("sort_names_by_missing", "noms triés par champs manquants"),
+    # construction des JSON
+    "build links":           ("build_breeds_links_json", "breeds_links.json depuis le CSV"),
+    "build breeds":          ("build_breeds_json", "breeds JSON structuré"),
+    "build incomplete":      ("build_incomplete_subset_json", "sous-ensemble incomplet"),
+    "build remaining":       ("build_remaining_incomplete_json", "races restant incomplètes"),
+    "build placeholders":    ("build_placeholders_for_gaps", "placeholders pour les trous d'id"),
+    "postprocess":           ("postprocess_breeds_json", "post-traitement du JSON races"),
+    "schema extend":         ("extend_breeds_schema", "étend le schéma"),
+    "schema extend-alias":   ("extend_breeds_schema_list_alias", "étend le schéma (alias en liste)"),
+    "extract names":         ("extract_breed_names", "liste des noms"),
+    "extract names-wrapped": ("extract_breed_names_wrapped", "liste des noms (format encadré)"),
+    "extract types":         ("extract_id_breed_type", "id/race/type"),
+    # fusions
+    "merge two":             ("merge_two_breed_jsons", "fusion de deux JSON races"),
+    "merge breeds":          ("merge_breeds_json", "fusion des JSON races"),
+    "merge placeholders":    ("merge_placeholders_into_merged", "placeholders dans le fusionné"),
+    "merge types":           ("merge_types_into_breeds", "types dans les races"),
+    "merge origins":         ("merge_new_origins_into_index", "nouvelles origines dans l'index"),
+    "merge reconcile":       ("reconcile_remaining_and_merge", "réconciliation des restants"),
+    "align":                 ("align_merged_to_links", "aligne le fusionné sur breeds_links"),
+    # ids
+    "ids apply":             ("apply_global_ids", "ids globaux"),
+    "ids apply-merged":      ("apply_global_ids_to_merged", "ids globaux sur le fusionné"),
+    "ids resort":            ("resort_breeds_and_reassign_ids", "retri + réattribution des ids"),
+    "ids resort-diff":       ("resort_reassign_and_diff", "retri + réattribution + diff"),
+    "find-gaps":             ("find_missing_ids", "ids manquants / trous"),
+    # origines
+    "origins extract":       ("extract_origins_from_breeds", "origines depuis les races"),
+    "origins exact":         ("extract_origins_exact", "origines exactes"),
+    "origins compare":       ("extract_and_compare_origins", "comparaison avec l'index"),
+    "origins split":         ("split_origins_and_index", "découpe + index des origines"),
+    "origins normalize":     ("normalize_origins_and_add_type", "normalise les origines, ajoute le type"),
+    # vérifications
+    "verify ids":            ("verify_images_by_id", "une image par id"),
+    "verify links":          ("verify_links_vs_merged", "liens vs fusionné"),
+    "verify completeness":   ("test_breeds_completeness", "complétude des races"),
+    "verify schema":         ("breeds_schema", "validation du schéma"),
+    # images
+    "images download":       ("download_breed_images", "téléchargement des images"),
+    "images redownload":     ("redownload_images_follow_file_link", "re-téléchargement via la page Fichier:"),
+    "images bump-ids":       ("bump_image_ids", "décale les ids des images"),
+    "images capfirst":       ("fix_capfirst_images_and_json", "majuscule initiale images + JSON"),
+    "images fix-names":      ("fix_names_and_images", "corrige noms et images"),
+    "images recover":        ("rename_journal", "reprise / annulation d'un renommage interrompu"),
+    "images store":          ("image_store", "magasin par contenu + vues NNN_Nom (ingest, names, shift, ...)"),
+    "images derivatives":    ("image_derivatives", "déclinaisons WebP/JPEG/AVIF par largeur (srcset)"),
+    "images manifest":       ("image_manifest", "dimensions, BlurHash, LQIP + jointure sur les races"),
+    "images duplicates":     ("image_phash", "empreintes perceptuelles, doublons, placeholders (block)"),
+    "images atlas":          ("image_atlas", "planches de vignettes + carte des coordonnées"),
+    "images pack":           ("image_pack", "archive unique alignée + index (lecture mmap)"),
+    "images colors":         ("image_colors", "couleurs dominantes vs robe texte"),
+    "flags":                 ("flag_assets", "drapeaux des origines en local + planche"),
+    # outils
+    "synthetic":             ("generate_synthetic_breeds", "jeux de données synthétiques"),
+    "bench data":            ("bench_data_stages", "benchmark des étapes de données"),
+    "bench scrapers":        ("bench_scrapers", "benchmark des scrapers (stand-in)"),
+    "standin":               ("mediawiki_standin", "serveur MediaWiki local"),
+}
+
+def coerce(current, raw: str):
+    """Convertit `raw` selon le type de la valeur actuelle de la constante."""
+    if isinstance(current, PurePath):
+        return Path(raw)
+    if isinstance(current, bool):
+        return raw.strip().lower() in ("1", "true", "yes", "oui", "on")
+    if isinstance(current, int):
+        return int(raw)
+    if isinstance(current, float):
+        return float(raw)
+    if isinstance(current, (list, tuple, dict)):
+        value = json.loads(raw)
+        if isinstance(current, list) and current and isinstance(current[0], PurePath):
+            value = [Path(v) for v in value]
+        return type(current)(value) if not isinstance(current, dict) else value
+    return raw
+
+def apply_overrides(module, overrides: dict, strict: bool):
+    for name, raw in overrides.items():
+        if not hasattr(module, name):
+            if strict:
+                raise SystemExit(f"❌ {module.__name__} ne définit pas {name}")
+            continue
+        value = coerce(getattr(module, name), raw) if isinstance(raw, str) else raw
+        setattr(module, name, value)
+
+def load_config(path):
+    p = Path(path)
+    if not p.exists():
+        return {"paths": {}, "commands": {}}
+    data = json.loads(p.read_text(encoding="utf-8"))
+    return {"paths": data.get("paths", {}), "commands": data.get("commands", {})}
+
+def match_command(words):
+    """Plus long préfixe de `words` qui est une commande connue -> (commande, reste)."""
+    for n in range(min(3, len(words)), 0, -1):
+        name = " ".join(words[:n])
+        if name in COMMANDS:
+            return name, words[n:]
+    return None, words
+
+def print_commands():
+    width = max(len(c) for c in COMMANDS)
+    for name, (module, desc) in COMMANDS.items():
+        print(f"  {name:<{width}}  {desc}  ({module}.py)")
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    workdir, config_path, overrides, timing = None, CONFIG_FILE, {}, False
+    # options globales avant la commande
+    while argv and argv[0].startswith("-"):
+        opt = argv.pop(0)
+        if opt in ("-h", "--help"):
+            print(__doc__)
+            print_commands()
+            return 0
+        if opt == "-C":
+            workdir = argv.pop(0)
+        elif opt == "--config":
+            config_path = argv.pop(0)
+        elif opt == "--set":
+            k, _, v = argv.pop(0).partition("=")
+            overrides[k] = v
+        elif opt == "--time":
+            timing = True
+        else:
+            raise SystemExit(f"❌ option inconnue : {opt}")
+    if not argv or argv[0] == "list":
+        print_commands()
+        return 0
+
+    command, rest = match_command(argv)
+    if command is None:
+        print(f"❌ commande inconnue : {' '.join(argv[:2])}")
+        print_commands()
+        return 2
+    # --set après la commande aussi (retiré des arguments transmis au script)
+    passthrough = []
+    while rest:
+        a = rest.pop(0)
+        if a == "--set" and rest:
+            k, _, v = rest.pop(0).partition("=")
+            overrides[k] = v
+        else:
+            passthrough.append(a)
+
+    if workdir:
+        # le dossier des scripts reste importable après le chdir
+        sys.path.insert(0, str(Path(__file__).resolve().parent))
+        os.chdir(workdir)
+    config = load_config(config_path)
+
+    module_name = COMMANDS[command][0]
+    t0 = time.perf_counter()
+    sys.argv = [f"{module_name}.py"] + passthrough   # les scripts lisent sys.argv à l'import ou dans main()
+    module = importlib.import_module(module_name)
+    t_import = time.perf_counter() - t0
+    apply_overrides(module, config["paths"], strict=False)
+    apply_overrides(module, config["commands"].get(command, {}), strict=True)
+    apply_overrides(module, overrides, strict=True)
+
+    rc = module.main()
+    if timing:
+        print(f"   ⏱ {command} : import {t_import * 1000:.0f} ms, total {time.perf_counter() - t0:.2f} s",
+              file=sys.stderr)
+    return rc if isinstance(rc, int) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+# generate_synthetic_breeds.py
+import argparse
+import json
+import random
+from pathlib import Path
+
+OUT_ROOT = Path("synthetic")          # synthetic/<n>/... (un dossier par taille)
+DEFAULT_SIZES = [1000, 100_000, 1_000_000]
+SEED = 42
+
+# Proportions d'anomalies injectées (calquées sur ce qu'on voit dans les vrais fichiers)
+P_ID_GAP         = 0.02   # ids sautés dans links
+P_DUP_NAME_LINKS = 0.005  # même race en double dans links (variante casse/accents)
+P_MISSING_MERGED = 0.03   # race de links absente de merged
+P_EXTRA_MERGED   = 0.01   # race de merged absente de links
+P_DUP_ID_MERGED  = 0.01   # id en double dans merged
+P_NAME_VARIANT   = 0.05   # même id, nom différent seulement par casse/accents/espaces
+P_NAME_RENAMED   = 0.01   # même id, nom réellement différent
+P_EMPTY_FIELDS   = 0.10   # race incomplète (champs vides)
+
+PREFIXES = ["Berger", "Chien", "Braque", "Épagneul", "Lévrier", "Terrier", "Bouvier", "Griffon",
+            "Basset", "Mâtin", "Spitz", "Laïka", "Bichon", "Bouledogue", "Chien courant", "Retriever"]
+LINKERS = ["de", "du", "des", "d'", "de la"]
+SUFFIXES = ["", "", "", "à poil dur", "à poil ras", "à poil long", "nain", "géant", "tricolore"]
+SYLLABLES = ["ka", "ré", "lo", "mi", "bè", "sa", "tou", "vé", "ni", "dor", "ân", "gué", "pa",
+             "rhô", "zi", "ël", "co", "mé", "tra", "vi", "ï", "sé", "na", "bru"]
+COUNTRIES = ["Allemagne", "Angleterre", "Argentine", "Australie", "Autriche", "Belgique", "Brésil",
+             "Canada", "Chine", "Croatie", "Danemark", "Écosse", "Espagne", "États-Unis", "Finlande",
+             "France", "Grèce", "Hongrie", "Irlande", "Islande", "Italie", "Japon", "Maroc", "Mexique",
+             "Norvège", "Pays-Bas", "Pérou", "Pologne", "Portugal", "Roumanie", "Royaume-Uni", "Russie",
+             "Serbie", "Slovaquie", "Suède", "Suisse", "Tchéquie", "Thaïlande", "Tibet", "Turquie"]
+TYPES = ["Berger", "Chien de chasse", "Compagnie", "Garde", "Lévrier", "Molosse", "Pinscher",
+         "Spitz", "Terrier", "Chien d'eau"]
+COLORS = ["noir", "blanc", "fauve", "gris", "rouge", "bringé", "merle", "chocolat", "sable",
+          "noir et fauve clair", "foie et blanc", "bleu et merle"]
+POILS = ["Court", "Long", "Mi-long", "Dur", "Frisé", "Ras"]
+ENERGIES = ["Calme", "Joueur", "Actif", "Très actif", "Équilibré"]
+
+# ---------- noms ----------
+def pseudo_word(rng: random.Random) -> str:
+    w = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    return w[:1].upper() + w[1:]
+
+def make_names(n: int, rng: random.Random) -> list:
+    names, seen = [], set()
+    while len(names) < n:
+        link = rng.choice(LINKERS)
+        place = pseudo_word(rng)
+        sep = "" if link.endswith("'") else " "
+        name = f"{rng.choice(PREFIXES)} {link}{sep}{place}"
+        suffix = rng.choice(SUFFIXES)
+        if suffix:
+            name += " " + suffix
+        key = name.casefold()
+        if key in seen:
+            continue
+        seen.add(key)
+        names.append(name)
+    return names
+
+def name_variant(name: str, rng: random.Random) -> str:
+    """Variante 'même race' : casse, accents retirés, espaces en trop."""
+    choice = rng.randint(0, 2)
+    if choice == 0:
+        return name.lower()
+    if choice == 1:
+        return (name.replace("é", "e").replace("è", "e").replace("â", "a")
+                    .replace("ï", "i").replace("ô", "o").replace("É", "E"))
+    return "  " + name.replace(" ", "  ", 1) + " "
+
+# ---------- enregistrements ----------
+def make_core(n: int, rng: random.Random) -> list:
+    """Liste de races 'vraies' : (id, nom, alias, origins, types, robe, size, weight, poil, energy)."""
+    names = make_names(n, rng)
+    core = []
+    next_id = 1
+    for name in names:
+        if rng.random() < P_ID_GAP:
+            next_id += rng.randint(1, 3)
+        empty = rng.random() < P_EMPTY_FIELDS
+        lo = rng.randint(20, 70)
+        wlo = rng.randint(3, 50)
+        core.append((
+            next_id,
+            name,
+            [pseudo_word(rng) for _ in range(rng.randint(0, 3))],
+            [] if empty else rng.sample(COUNTRIES, rng.randint(1, 2)),
+            [] if empty else [rng.choice(TYPES)],
+            [] if empty else rng.sample(COLORS, rng.randint(1, 3)),
+            "" if empty else f"{lo} à {lo + rng.randint(2, 10)} cm",
+            "" if empty else f"{wlo} à {wlo + rng.randint(1, 15)} kgs",
+            "" if empty else rng.choice(POILS),
+            "" if empty else rng.choice(ENERGIES),
+        ))
+        next_id += 1
+    return core
+
+def full_entry(c, breed=None) -> dict:
+    bid, name, alias, origin, typ, robe, size, weight, poil, energy = c
+    return {
+        "id": bid,
+        "breed": breed if breed is not None else name,
+        "features": {
+            "origin": list(origin), "size": size, "weight": weight, "robe": list(robe),
+            "poil": poil, "energy": energy, "type": list(typ),
+        },
+        "alias": list(alias),
+    }
+
+def links_file(core, rng) -> dict:
+    out = []
+    for c in core:
+        bid, name = c[0], c[1]
+        url = f"https://fr.wikipedia.org/wiki/{name.replace(' ', '_')}"
+        out.append({"id": bid, "breed": name, "url": url})
+        if rng.random() < P_DUP_NAME_LINKS:
+            out.append({"id": bid + len(core) * 2, "breed": name_variant(name, rng), "url": url})
+    return {"breeds": out}
+
+def merged_file(core, rng) -> dict:
+    out = []
+    extra_id = core[-1][0] + 1 if core else 1
+    for c in core:
+        r = rng.random()
+        if r < P_MISSING_MERGED:
+            continue
+        name = c[1]
+        r = rng.random()
+        if r < P_NAME_RENAMED:
+            name = pseudo_word(rng) + " " + pseudo_word(rng)
+        elif r < P_NAME_RENAMED + P_NAME_VARIANT:
+            name = name_variant(name, rng)
+        out.append(full_entry(c, name))
+        if rng.random() < P_DUP_ID_MERGED:
+            out.append(full_entry(c, name_variant(c[1], rng)))
+        if rng.random() < P_EXTRA_MERGED:
+            out.append(full_entry((extra_id,) + c[1:], pseudo_word(rng) + " " + c[1]))
+            extra_id += 1
+    return {"breeds": out}
+
+def extended_file(core, rng) -> dict:
+    """Entrée de normalize_origins_and_add_type : origin en chaîne, type parfois absent/chaîne."""
+    out = []
+    for c in core:
+        e = full_entry(c)
+        origins = e["features"]["origin"]
+        e["features"]["origin"] = " et ".join(origins) if rng.random() < 0.7 else origins
+        t = e["features"].pop("type")
+        if rng.random() < 0.5:
+            e["features"]["type"] = t[0] if t else ""
+        out.append(e)
+    return {"breeds": out}
+
+def old_schema_file(core, rng) -> dict:
+    """Entrée de merge_breeds_json : ancien schéma (origin chaîne, pas d'alias)."""
+    out = []
+    for c in core:
+        bid, name, _, origin, _, robe, size, weight, _, _ = c
+        out.append({"id": bid, "breed": name if rng.random() > P_NAME_VARIANT else name_variant(name, rng),
+                    "features": {"origin": ", ".join(origin), "size": size, "weight": weight, "robe": list(robe)}})
+    return {"breeds": out}
+
+def origins_file() -> dict:
+    out = []
+    for i, name in enumerate(sorted(COUNTRIES), 1):
+        code = name[:2].lower()
+        ext = "svg" if i % 3 == 0 else "png"
+        url = f"https://flagcdn.com/{code}.svg" if ext == "svg" else f"https://flagcdn.com/32x24/{code}.png"
+        out.append({"id": i, "name": name, "image": url})
+    return {"origins": out}
+
+def subset(core, rng, ratio) -> list:
+    return [c for c in core if rng.random() < ratio]
+
+# ---------- écriture ----------
+def dump(path: Path, payload):
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def generate(n: int, out_dir: Path, seed: int = SEED):
+    """Écrit dans out_dir les fichiers d'entrée de chaque étape, sous leurs noms habituels."""
+    rng = random.Random(seed + n)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    core = make_core(n, rng)
+
+    dump(out_dir / "breeds_links_resorted.json", links_file(core, rng))
+    dump(out_dir / "breeds_merged_final.json", merged_file(core, rng))
+    dump(out_dir / "breeds_merged_aligned.json", merged_file(core, rng))
+    dump(out_dir / "origins_index.json", origins_file())
+    dump(out_dir / "breeds_with_global_ids_extended.json", extended_file(core, rng))
+    # merge_two_breed_jsons : récent (complet) + reste incomplet (recouvrement partiel)
+    dump(out_dir / "breeds_with_origin_list_and_type_updated.json", {"breeds": [full_entry(c) for c in subset(core, rng, 0.8)]})
+    dump(out_dir / "breeds_remaining_incomplete_structured.json", {"breeds": [full_entry(c) for c in subset(core, rng, 0.3)]})
+    # merge_placeholders_into_merged : principal + placeholders pour les trous
+    dump(out_dir / "breeds_merged_with_global_ids.json", merged_file(core, rng))
+    dump(out_dir / "breeds_placeholders_for_gaps.json", {"breeds": [full_entry(c) for c in subset(core, rng, 0.05)]})
+    # merge_breeds_json : ancien schéma
+    dump(out_dir / "breeds_clean_post.json", old_schema_file(core, rng))
+    dump(out_dir / "breeds_incomplete_subset.json", old_schema_file(subset(core, rng, 0.2), rng))
+    return out_dir
+
+def main():
+    ap = argparse.ArgumentParser(description="Génère des jeux de races synthétiques pour les benchmarks.")
+    ap.add_argument("sizes", nargs="*", type=int, default=DEFAULT_SIZES)
+    ap.add_argument("--out", default=str(OUT_ROOT))
+    ap.add_argument("--seed", type=int, default=SEED)
+    args = ap.parse_args()
+
+    for n in args.sizes:
+        d = generate(n, Path(args.out) / str(n), args.seed)
+        print(f"✔ {n} races synthétiques → {d}/")
+
+if __name__ == "__main__":
+    main()
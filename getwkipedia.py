@@ -1,8 +1,8 @@
 # getwikipedia.py
-import requests
-import pandas as pd
 from io import StringIO
 
+import wiki_http
+
 URL = "https://commons.wikimedia.org/wiki/List_of_dog_breeds?uselang=fr"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -12,24 +12,30 @@ HEADERS = {
     "Referer": "https://commons.wikimedia.org/"
 }
 
-resp = requests.get(URL, headers=HEADERS, timeout=20)
-resp.raise_for_status()
+def main():
+    import pandas as pd   # read_html (lxml ou html5lib)
+
+    session = wiki_http.get_session(HEADERS)
+    resp = wiki_http.request(session, "GET", URL, timeout=20)
+
+    # Donne le HTML à pandas (évite l’appel direct à l’URL qui 403)
+    tables = pd.read_html(StringIO(resp.text))  # nécessite lxml ou html5lib
+    print(f"Tables trouvées : {len(tables)}")
 
-# Donne le HTML à pandas (évite l’appel direct à l’URL qui 403)
-tables = pd.read_html(StringIO(resp.text))  # nécessite lxml ou html5lib
-print(f"Tables trouvées : {len(tables)}")
+    # Si la page change, on peut cibler la table par son nombre de colonnes
+    target = next((df for df in tables if df.shape[1] >= 3), None)
+    if target is None:
+        raise SystemExit("Aucune table avec >= 3 colonnes trouvée.")
 
-# Si la page change, on peut cibler la table par son nombre de colonnes
-target = next((df for df in tables if df.shape[1] >= 3), None)
-if target is None:
-    raise SystemExit("Aucune table avec >= 3 colonnes trouvée.")
+    # 3e colonne (index 2) = 'Local names' (noms locaux)
+    col3 = target.iloc[:, 2].astype(str).str.strip()
+    col3 = col3[col3 != ""].drop_duplicates().reset_index(drop=True)
 
-# 3e colonne (index 2) = 'Local names' (noms locaux)
-col3 = target.iloc[:, 2].astype(str).str.strip()
-col3 = col3[col3 != ""].drop_duplicates().reset_index(drop=True)
+    # Sauvegarde
+    out = "local_names_dog_breeds.csv"
+    col3.to_csv(out, index=False, header=["local_names"])
+    print(f"{len(col3)} valeurs sauvegardées dans {out}")
+    print(col3.head(20).to_string(index=False))
 
-# Sauvegarde
-out = "local_names_dog_breeds.csv"
-col3.to_csv(out, index=False, header=["local_names"])
-print(f"{len(col3)} valeurs sauvegardées dans {out}")
-print(col3.head(20).to_string(index=False))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# html_pool.py
+"""
+Pool de processus pour l'analyse HTML (BeautifulSoup) des scripts de scraping.
+
+Les threads de téléchargement restent concurrents ; le HTML brut part dans un
+ProcessPoolExecutor et seul le résultat (paires clé/valeur, lien, src d'image) revient.
+Les fonctions envoyées doivent être définies au niveau module (picklables).
+
+Nombre de processus : FURIOUS_PARSE_WORKERS (défaut : nombre de cœurs) ; 0 = analyse dans le thread appelant.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PARSE_WORKERS = int(os.environ.get("FURIOUS_PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+def _timed(fn, args):
+    t0 = time.process_time()
+    result = fn(*args)
+    return result, time.process_time() - t0
+
+class ParsePool:
+    def __init__(self, workers: int = PARSE_WORKERS):
+        self.workers = workers
+        self.tasks = 0
+        self.cpu_s = 0.0      # CPU consommé par les analyses (dans les workers)
+        self.wait_s = 0.0     # temps passé par les threads appelants à attendre un résultat
+        self.lock = threading.Lock()
+        self._executor = None
+        self._t0_wall = time.perf_counter()
+        self._t0_cpu = time.process_time()
+
+    def _pool(self):
+        with self.lock:
+            if self._executor is None:
+                # spawn : les threads HTTP existent déjà au premier appel, fork serait fragile
+                self._executor = ProcessPoolExecutor(self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def run(self, fn, *args):
+        """fn(*args) dans un worker ; bloque le thread appelant jusqu'au résultat."""
+        t0 = time.perf_counter()
+        if self.workers <= 0:
+            result, cpu = _timed(fn, args)
+        else:
+            result, cpu = self._pool().submit(_timed, fn, args).result()
+        waited = time.perf_counter() - t0
+        with self.lock:
+            self.tasks += 1
+            self.cpu_s += cpu
+            self.wait_s += waited
+        return result
+
+    def stats(self) -> dict:
+        """CPU d'analyse vs attente, plus CPU/mur du processus principal (réseau, E/S)."""
+        with self.lock:
+            return {
+                "parse_workers": self.workers,
+                "parse_tasks": self.tasks,
+                "parse_cpu_s": round(self.cpu_s, 3),
+                "parse_wait_s": round(self.wait_s, 3),
+                "main_cpu_s": round(time.process_time() - self._t0_cpu, 3),
+                "wall_s": round(time.perf_counter() - self._t0_wall, 3),
+            }
+
+    def print_summary(self):
+        s = self.stats()
+        print(f"   ◦ Analyse HTML : {s['parse_tasks']} pages, CPU {s['parse_cpu_s']:.1f} s "
+              f"sur {s['parse_workers']} processus, attente {s['parse_wait_s']:.1f} s "
+              f"(processus principal : CPU {s['main_cpu_s']:.1f} s / {s['wall_s']:.1f} s)")
+
+    def shutdown(self):
+        with self.lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
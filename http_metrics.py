@@ -0,0 +1,245 @@
+# http_metrics.py
+"""
+Instrumentation des requêtes HTTP des scripts de scraping.
+
+Chaque requête logique (retries compris) est enregistrée avec : hôte, type d'endpoint
+(page/api/image), statut, octets, latence, nombre de relances, cache hit/miss.
+Les pauses (politesse, backoff) sont comptées à part pour voir si elles dominent.
+
+Export en cours d'exécution :
+- FURIOUS_METRICS_FILE=metrics.json (ou .prom) → instantané réécrit toutes les METRICS_EXPORT_INTERVAL s
+- FURIOUS_METRICS_PORT=9109 → http://127.0.0.1:9109/metrics (Prometheus) et /metrics.json,
+  démarré par METRICS.serve_from_env() dans le main() des scripts
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)   # secondes
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".tif", ".tiff")
+METRICS_EXPORT_INTERVAL = 5.0
+
+def endpoint_kind(url: str) -> str:
+    p = urlparse(url)
+    path = p.path.lower()
+    if path.endswith("/api.php") or path.startswith("/api/rest_v1/"):
+        return "api"
+    if p.netloc.startswith("upload.") or path.endswith(IMAGE_EXTS):
+        return "image"
+    return "page"
+
+class _Series:
+    """Compteurs + histogramme de latence d'un groupe (type d'endpoint ou hôte)."""
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.retries = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)   # dernier = +Inf
+
+    def add(self, ok: bool, nbytes: int, latency: float, retries: int):
+        self.count += 1
+        self.errors += 0 if ok else 1
+        self.bytes += nbytes
+        self.retries += retries
+        self.latency_sum += latency
+        for i, le in enumerate(LATENCY_BUCKETS):
+            if latency <= le:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def quantile(self, q: float):
+        """Approximation par borne supérieure de bucket."""
+        if not self.count:
+            return None
+        target, acc = q * self.count, 0
+        for i, n in enumerate(self.buckets):
+            acc += n
+            if acc >= target:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float("inf")
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "latency_s_sum": round(self.latency_sum, 4),
+            "latency_s_avg": round(self.latency_sum / self.count, 4) if self.count else None,
+            "latency_s_p50": self.quantile(0.5),
+            "latency_s_p95": self.quantile(0.95),
+            "histogram": {**{str(le): n for le, n in zip(LATENCY_BUCKETS, self.buckets)}, "+Inf": self.buckets[-1]},
+        }
+
+class HttpMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.by_kind: dict[str, _Series] = {}
+        self.by_host: dict[str, _Series] = {}
+        self.by_status: dict[str, int] = {}
+        self.cache = {"hit": 0, "miss": 0}
+        self.sleep_s: dict[str, float] = {}
+        self.export_file = os.environ.get("FURIOUS_METRICS_FILE") or None
+        self._last_export = 0.0
+        self._server = None
+
+    # ----- enregistrement -----
+    def record(self, url: str, status: int, nbytes: int, latency: float,
+               retries: int = 0, cache: str | None = None, kind: str | None = None):
+        host = urlparse(url).netloc or "?"
+        kind = kind or endpoint_kind(url)
+        ok = 200 <= (status or 0) < 400
+        with self.lock:
+            self.by_kind.setdefault(kind, _Series()).add(ok, nbytes, latency, retries)
+            self.by_host.setdefault(host, _Series()).add(ok, nbytes, latency, retries)
+            key = str(status or "error")
+            self.by_status[key] = self.by_status.get(key, 0) + 1
+            if cache in self.cache:
+                self.cache[cache] += 1
+        self._maybe_export()
+
+    def sleep(self, seconds: float, reason: str = "politeness"):
+        """time.sleep() comptabilisé par motif (politeness, retry, ...)."""
+        if seconds <= 0:
+            return
+        time.sleep(seconds)
+        with self.lock:
+            self.sleep_s[reason] = self.sleep_s.get(reason, 0.0) + seconds
+
+    # ----- lecture -----
+    def snapshot(self) -> dict:
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            total = sum(s.count for s in self.by_kind.values())
+            total_bytes = sum(s.bytes for s in self.by_kind.values())
+            busy = sum(s.latency_sum for s in self.by_kind.values())
+            return {
+                "elapsed_s": round(elapsed, 3),
+                "requests_total": total,
+                "bytes_total": total_bytes,
+                "requests_per_s": round(total / elapsed, 3) if elapsed else None,
+                "bytes_per_s": round(total_bytes / elapsed) if elapsed else None,
+                "time_in_requests_s": round(busy, 3),
+                "time_sleeping_s": {k: round(v, 3) for k, v in self.sleep_s.items()},
+                "by_kind": {k: s.to_dict() for k, s in sorted(self.by_kind.items())},
+                "by_host": {k: s.to_dict() for k, s in sorted(self.by_host.items())},
+                "by_status": dict(sorted(self.by_status.items())),
+                "cache": dict(self.cache),
+            }
+
+    def totals(self) -> dict:
+        """Version courte pour les rapports de fin de run."""
+        snap = self.snapshot()
+        for group in ("by_kind", "by_host"):
+            for s in snap[group].values():
+                s.pop("histogram", None)
+        return snap
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self.lock:
+            for label, groups in (("kind", self.by_kind), ("host", self.by_host)):
+                for name, s in sorted(groups.items()):
+                    lbl = f'{label}="{name}"'
+                    lines.append(f"furious_http_requests_total{{{lbl}}} {s.count}")
+                    lines.append(f"furious_http_errors_total{{{lbl}}} {s.errors}")
+                    lines.append(f"furious_http_bytes_total{{{lbl}}} {s.bytes}")
+                    lines.append(f"furious_http_retries_total{{{lbl}}} {s.retries}")
+                    if label == "kind":
+                        acc = 0
+                        for le, n in zip(LATENCY_BUCKETS, s.buckets):
+                            acc += n
+                            lines.append(f'furious_http_latency_seconds_bucket{{{lbl},le="{le}"}} {acc}')
+                        lines.append(f'furious_http_latency_seconds_bucket{{{lbl},le="+Inf"}} {s.count}')
+                        lines.append(f"furious_http_latency_seconds_sum{{{lbl}}} {s.latency_sum:.6f}")
+                        lines.append(f"furious_http_latency_seconds_count{{{lbl}}} {s.count}")
+            for status, n in sorted(self.by_status.items()):
+                lines.append(f'furious_http_responses_total{{status="{status}"}} {n}')
+            for k, n in self.cache.items():
+                lines.append(f'furious_http_cache_total{{result="{k}"}} {n}')
+            for reason, v in sorted(self.sleep_s.items()):
+                lines.append(f'furious_sleep_seconds_total{{reason="{reason}"}} {v:.3f}')
+        return "\n".join(lines) + "\n"
+
+    # ----- export -----
+    def export(self, path):
+        path = Path(path)
+        if path.suffix == ".prom":
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _maybe_export(self, force: bool = False):
+        if not self.export_file:
+            return
+        now = time.monotonic()
+        if force or now - self._last_export >= METRICS_EXPORT_INTERVAL:
+            self._last_export = now
+            try:
+                self.export(self.export_file)
+            except OSError:
+                pass
+
+    def flush(self):
+        self._maybe_export(force=True)
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """Expose /metrics (Prometheus) et /metrics.json dans un thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, ctype = json.dumps(metrics.snapshot()).encode(), "application/json"
+                else:
+                    body, ctype = metrics.to_prometheus().encode(), "text/plain; version=0.0.4"
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def serve_from_env(self):
+        """
+        Démarre /metrics si FURIOUS_METRICS_PORT est défini ; à appeler depuis le main() d'un script,
+        jamais à l'import (les workers spawn du pool d'analyse réimportent ce module).
+        """
+        port = os.environ.get("FURIOUS_METRICS_PORT")
+        if port and self._server is None:
+            self.serve(int(port))
+
+    def print_summary(self):
+        snap = self.snapshot()
+        print(f"   ◦ HTTP : {snap['requests_total']} requêtes, {snap['bytes_total'] / 1e6:.1f} Mo "
+              f"en {snap['elapsed_s']:.0f} s (requêtes {snap['time_in_requests_s']:.0f} s, "
+              f"pauses {sum(snap['time_sleeping_s'].values()):.0f} s)")
+        for kind, s in snap["by_kind"].items():
+            print(f"     - {kind:<5}: {s['count']} req, moy {s['latency_s_avg']} s, p95 ≤ {s['latency_s_p95']} s, "
+                  f"{s['errors']} erreurs, {s['retries']} relances")
+
+METRICS = HttpMetrics()
+
+def response_size(resp) -> int:
+    try:
+        return len(resp.content)
+    except Exception:
+        return int(resp.headers.get("Content-Length") or 0)
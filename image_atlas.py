@@ -0,0 +1,151 @@
+# image_atlas.py
+"""
+Planches de vignettes (sprite sheets) pour les listes : quelques requêtes au lieu d'une par race.
+
+    atlas/sheet_000.webp, sheet_001.webp, ...   # CELL px par vignette, COLS colonnes, PER_SHEET vignettes
+    atlas/atlas.json : {"cell": [w, h], "sheets": [{"file", "width", "height", "ids", "key"}],
+                        "sprites": {"1": {"sheet": 0, "x": 0, "y": 0, "w": 96, "h": 96}}}
+
+- répartition par id croissant : les ids sont stables (registre append-only), une nouvelle race
+  tombe dans la dernière planche et ne décale pas les autres
+- une planche n'est reconstruite que si sa clé (réglages + empreintes de contenu de ses images) change
+- vignettes recadrées au centre, calculées en parallèle (FURIOUS_IMAGE_WORKERS), décodage en draft
+
+Nécessite Pillow (pip install pillow).
+"""
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from image_derivatives import WORKERS
+from image_store import cached_digest, open_rgb, source_images
+from stage_profile import StageProfiler
+
+OUT_DIR = Path("atlas")
+MAP_NAME = "atlas.json"
+CELL = (96, 96)
+COLS = 16
+PER_SHEET = 128          # 16 x 8
+SHEET_FORMAT = "webp"    # ou "jpeg"
+QUALITY = 80
+BACKGROUND = (255, 255, 255)
+EXT = {"webp": ".webp", "jpeg": ".jpg"}
+
+def thumbnail(src: str, cell) -> bytes:
+    """Worker : vignette RGB cell[0] x cell[1] recadrée au centre, en octets bruts."""
+    from PIL import Image, ImageOps
+    im = open_rgb(src, cell[0] * 2)
+    return ImageOps.fit(im, tuple(cell), Image.LANCZOS).tobytes()
+
+def sheet_key(entries) -> str:
+    """entries : [(id, empreinte)] de la planche ; la clé change si une image ou un réglage change."""
+    raw = json.dumps([list(CELL), COLS, SHEET_FORMAT, QUALITY, list(BACKGROUND), entries])
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest()
+
+def load_map(path=OUT_DIR / MAP_NAME) -> dict:
+    p = Path(path)
+    if not p.exists():
+        return {"sheets": [], "sources": {}}
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def layout(ids):
+    """Découpe les ids triés en planches ; -> [[ids de la planche 0], ...]."""
+    return [ids[i:i + PER_SHEET] for i in range(0, len(ids), PER_SHEET)]
+
+def render_sheet(path: Path, ids, thumbs: dict):
+    from PIL import Image
+    rows = (len(ids) + COLS - 1) // COLS
+    sheet = Image.new("RGB", (COLS * CELL[0], rows * CELL[1]), BACKGROUND)
+    for pos, bid in enumerate(ids):
+        tile = Image.frombytes("RGB", CELL, thumbs[bid])
+        sheet.paste(tile, ((pos % COLS) * CELL[0], (pos // COLS) * CELL[1]))
+    part = path.with_name(f".part_{path.name}")
+    opts = {"quality": QUALITY}
+    if SHEET_FORMAT == "jpeg":
+        opts.update(progressive=True, optimize=True)
+    else:
+        opts.update(method=6)
+    sheet.save(part, format=SHEET_FORMAT.upper(), **opts)
+    os.replace(part, path)
+    return sheet.size
+
+def main():
+    try:
+        from PIL import Image  # vérifie la dispo de Pillow en amont
+    except ImportError:
+        print("⚠️  Installe Pillow avant:  pip install pillow")
+        return
+    prof = StageProfiler("image_atlas")
+    old = load_map()
+    old_sheets = {s["file"]: s for s in old.get("sheets", [])}
+    old_sources = old.get("sources", {})
+
+    sources, hashes = source_images(), {}
+    for bid, p in sources.items():
+        prev = old_sources.get(str(bid), {})
+        st = p.stat()
+        hashes[bid] = {"hash": cached_digest(p, prev), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    prof.lap("scan")
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    pages = layout(sorted(sources))
+    plan = []   # (index, fichier, ids, clé, à reconstruire)
+    for n, ids in enumerate(pages):
+        name = f"sheet_{n:03d}{EXT[SHEET_FORMAT]}"
+        key = sheet_key([(bid, hashes[bid]["hash"]) for bid in ids])
+        prev = old_sheets.get(name)
+        fresh = prev is not None and prev.get("key") == key and (OUT_DIR / name).exists()
+        plan.append((n, name, ids, key, not fresh))
+    dirty_ids = [bid for _, _, ids, _, dirty in plan if dirty for bid in ids]
+    print(f"Atlas : {len(sources)} images, {len(pages)} planches, "
+          f"{sum(1 for p in plan if p[4])} à reconstruire ({len(dirty_ids)} vignettes)")
+
+    thumbs, errors, failed_ids = {}, [], set()
+    if dirty_ids:
+        with ProcessPoolExecutor(max(1, WORKERS)) as ex:
+            futures = [ex.submit(thumbnail, str(sources[bid]), CELL) for bid in dirty_ids]
+            for bid, fut in zip(dirty_ids, futures):
+                try:
+                    thumbs[bid] = fut.result()
+                except Exception as e:
+                    errors.append((sources[bid].name, str(e)))
+                    failed_ids.add(bid)
+                    thumbs[bid] = Image.new("RGB", CELL, BACKGROUND).tobytes()
+    prof.lap("thumbnails")
+
+    sheets, sprites = [], {}
+    for n, name, ids, key, dirty in plan:
+        if dirty:
+            width, height = render_sheet(OUT_DIR / name, ids, thumbs)
+        else:
+            width, height = old_sheets[name]["width"], old_sheets[name]["height"]
+        # une vignette en erreur garde une case vide ; la clé est effacée pour retenter au prochain passage
+        failed = any(bid in failed_ids for bid in ids)
+        sheets.append({"file": name, "width": width, "height": height, "ids": ids,
+                       "key": None if failed else key})
+        for pos, bid in enumerate(ids):
+            sprites[str(bid)] = {"sheet": n, "x": (pos % COLS) * CELL[0], "y": (pos // COLS) * CELL[1],
+                                 "w": CELL[0], "h": CELL[1]}
+    # planches en trop (moins d'images qu'avant)
+    for name in set(old_sheets) - {s["file"] for s in sheets}:
+        if (OUT_DIR / name).exists():
+            (OUT_DIR / name).unlink()
+    prof.lap("sheets")
+
+    atlas = {"cell": list(CELL), "cols": COLS, "sheets": sheets, "sprites": sprites,
+             "sources": {str(bid): hashes[bid] for bid in sorted(hashes)}}
+    tmp = OUT_DIR / (MAP_NAME + ".tmp")
+    tmp.write_text(json.dumps(atlas, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, OUT_DIR / MAP_NAME)
+    total = sum((OUT_DIR / s["file"]).stat().st_size for s in sheets)
+    print(f"✔ {len(sheets)} planches ({total / 1e6:.1f} Mo), {len(sprites)} vignettes → {OUT_DIR / MAP_NAME} "
+          f"({len(errors)} erreurs)")
+    for name, err in errors[:10]:
+        print(f"   ✗ {name} : {err}")
+    prof.dump()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+# image_colors.py
+"""
+Couleurs dominantes des photos de races, confrontées aux robes extraites du texte (features.robe).
+
+- chaque image est réduite (draft + 64 px), recadrée au centre (le chien, pas le fond), puis
+  k-means vectorisé NumPy dans l'espace Lab ; un processus par image (FURIOUS_IMAGE_WORKERS)
+- cache par empreinte de contenu (image_colors.json) : un nouveau passage ne traite que les images nouvelles
+- les centres sont rapprochés de la palette ALLOWED_COLORS (build_breeds_json), comparée par famille
+  (doré ~ fauve, chocolat ~ marron...) ; les motifs (bringé, merle, panaché) ne sont pas des couleurs
+- un cluster de la photo est en accord avec la robe si sa famille est celle d'une couleur citée ou une
+  famille voisine (blanc ombré -> gris, noir reflété -> gris/bleu : FAMILY_NEIGHBOURS), ou s'il est à
+  moins de AGREE_DELTA_E (distance Lab) d'une couleur citée
+- une race est signalée quand ces clusters couvrent moins de DISAGREE_BELOW des pixels des
+  couleurs dominantes de la photo
+
+Sorties : image_colors.json (cache), robe_color_check.json (rapport).
+Nécessite Pillow et NumPy (pip install pillow numpy).
+"""
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from build_breeds_json import ALLOWED_COLORS, norm_text
+from image_derivatives import WORKERS
+from image_store import cached_digest, open_rgb, source_images
+from stage_profile import StageProfiler
+
+BREEDS_FILE = "breeds_merged_aligned.json"
+CACHE_FILE = "image_colors.json"
+REPORT_FILE = "robe_color_check.json"
+K = 5
+SAMPLE_SIZE = 64          # px (plus grand côté) avant k-means
+CENTER_CROP = 0.7         # part centrale gardée en largeur et hauteur
+MIN_SHARE = 0.12          # part minimale d'un cluster pour compter comme couleur dominante
+DISAGREE_BELOW = 0.10
+AGREE_DELTA_E = 25.0      # distance Lab (CIE76) sous laquelle un cluster vaut la couleur citée
+
+# Couleurs simples d'ALLOWED_COLORS -> (famille, RGB de référence) ; None = motif, pas une couleur
+PALETTE = {
+    "noir": ("noir", (25, 25, 25)),
+    "blanc": ("blanc", (240, 240, 235)),
+    "gris": ("gris", (135, 135, 135)),
+    "argenté": ("gris", (190, 190, 195)),
+    "bleu": ("gris", (105, 115, 130)),
+    "beige": ("crème", (225, 205, 170)),
+    "champagne": ("crème", (235, 215, 180)),
+    "isabelle": ("crème", (220, 195, 150)),
+    "fauve clair": ("crème", (222, 184, 135)),
+    "citron": ("fauve", (230, 200, 110)),
+    "jaune": ("fauve", (225, 190, 90)),
+    "sable": ("fauve", (195, 165, 115)),
+    "fauve": ("fauve", (195, 140, 75)),
+    "doré": ("fauve", (210, 155, 60)),
+    "orange": ("rouge", (215, 125, 50)),
+    "rouge": ("rouge", (165, 75, 40)),
+    "marron": ("marron", (105, 65, 40)),
+    "chocolat": ("marron", (80, 50, 30)),
+    "foie": ("marron", (100, 55, 40)),
+    "bringé": None, "merle": None, "panaché": None,
+}
+# Termes de robe hors ALLOWED_COLORS -> couleurs simples de la palette
+EXTRA_TERMS = {
+    "feu": ["rouge"], "roux": ["rouge"], "ruby": ["rouge"], "acajou": ["rouge"],
+    "brun": ["marron"], "creme": ["beige"], "ble": ["beige"], "froment": ["sable"],
+    "miel": ["doré"], "abricot": ["doré"], "tricolore": ["noir", "blanc", "rouge"],
+    "blenheim": ["rouge", "blanc"], "poivre et sel": ["gris"], "grizzle": ["gris"], "loup": ["gris"],
+}
+ANY_COLOR = {"toutes", "toutes couleurs"}
+# Familles voisines : ombres, reflets et éclairage font glisser un pelage d'une famille à l'autre sur photo
+FAMILY_NEIGHBOURS = {
+    "blanc": {"gris", "crème"},
+    "gris": {"blanc", "noir"},
+    "noir": {"gris", "marron"},
+    "crème": {"blanc", "fauve"},
+    "fauve": {"crème", "rouge"},
+    "rouge": {"fauve", "marron"},
+    "marron": {"rouge", "noir"},
+}
+
+def settings_key() -> str:
+    return json.dumps({"k": K, "size": SAMPLE_SIZE, "crop": CENTER_CROP})
+
+# ---------- k-means ----------
+def srgb_to_lab(rgb):
+    """rgb : tableau (..., 3) en 0..255 -> Lab (D65)."""
+    import numpy as np
+    c = rgb / 255.0
+    c = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    xyz = c @ np.array([[0.4124, 0.2126, 0.0193], [0.3576, 0.7152, 0.1192], [0.1805, 0.0722, 0.9505]])
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+def kmeans(x, k: int, iters: int = 15, seed: int = 0):
+    """k-means++ puis Lloyd, entièrement vectorisé ; -> (étiquettes, nb de clusters)."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    centers = x[[rng.integers(len(x))]]
+    while len(centers) < k:
+        d = ((x[:, None, :] - centers[None]) ** 2).sum(-1).min(1)
+        if d.sum() == 0:
+            break
+        centers = np.vstack([centers, x[rng.choice(len(x), p=d / d.sum())]])
+    for _ in range(iters):
+        labels = ((x[:, None, :] - centers[None]) ** 2).sum(-1).argmin(1)
+        counts = np.bincount(labels, minlength=len(centers))
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, x)
+        new = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.allclose(new, centers, atol=0.5):
+            break
+        centers = new
+    labels = ((x[:, None, :] - centers[None]) ** 2).sum(-1).argmin(1)
+    return labels, len(centers)
+
+def dominant_colors(src: str) -> list:
+    """Worker : [{"rgb": [r, g, b], "share": part}] triés par part décroissante."""
+    import numpy as np
+    from PIL import Image
+    im = open_rgb(src, SAMPLE_SIZE * 2)
+    w, h = im.size
+    mx, my = int(w * (1 - CENTER_CROP) / 2), int(h * (1 - CENTER_CROP) / 2)
+    im = im.crop((mx, my, w - mx, h - my))
+    im.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE), Image.BILINEAR)
+    rgb = np.asarray(im, dtype=np.float64).reshape(-1, 3)
+    labels, n = kmeans(srgb_to_lab(rgb), K)
+    counts = np.bincount(labels, minlength=n)
+    out = []
+    for j in np.argsort(-counts):
+        if counts[j] == 0:
+            continue
+        mean = rgb[labels == j].mean(0)
+        out.append({"rgb": [int(round(v)) for v in mean], "share": round(float(counts[j]) / len(rgb), 3)})
+    return out
+
+# ---------- palette ----------
+_SIMPLE = [c for c in ALLOWED_COLORS if " et " not in c]
+
+@lru_cache(maxsize=1)
+def _palette_lab():
+    import numpy as np
+    names = [c for c in _SIMPLE if PALETTE.get(c)]
+    return names, srgb_to_lab(np.array([PALETTE[c][1] for c in names], dtype=np.float64))
+
+def nearest_color(rgb) -> str:
+    """Couleur simple d'ALLOWED_COLORS la plus proche (distance Lab)."""
+    import numpy as np
+    names, refs = _palette_lab()
+    d = ((refs - srgb_to_lab(np.array(rgb, dtype=np.float64))) ** 2).sum(-1)
+    return names[int(d.argmin())]
+
+def robe_colors(robe) -> set | None:
+    """Couleurs simples de la palette citées par la robe texte ; None si inexploitable (vide, « toutes couleurs »)."""
+    colors = set()
+    simple = {norm_text(c): c for c in _SIMPLE}
+    extra = {norm_text(k): v for k, v in EXTRA_TERMS.items()}
+    for value in robe or []:
+        text = norm_text(value)
+        if text in ANY_COLOR:
+            return None
+        # termes composés d'abord (« fauve clair », « poivre et sel »), puis mots isolés
+        for term in sorted(list(simple) + list(extra), key=len, reverse=True):
+            if re.search(rf"(?<!\w){re.escape(term)}(?!\w)", text):
+                text = re.sub(rf"(?<!\w){re.escape(term)}(?!\w)", " ", text)
+                for c in (extra[term] if term in extra else [simple[term]]):
+                    if PALETTE.get(c):
+                        colors.add(c)
+    return colors or None
+
+def robe_families(robe) -> set | None:
+    """Familles de couleur citées par la robe texte ; None si inexploitable."""
+    colors = robe_colors(robe)
+    return {PALETTE[c][0] for c in colors} if colors else None
+
+def delta_e(rgb, colors) -> float:
+    """Distance Lab entre `rgb` et la plus proche des couleurs de palette `colors`."""
+    import numpy as np
+    refs = srgb_to_lab(np.array([PALETTE[c][1] for c in colors], dtype=np.float64))
+    return float(np.sqrt(((refs - srgb_to_lab(np.array(rgb, dtype=np.float64))) ** 2).sum(-1)).min())
+
+def check_breed(robe, clusters) -> dict:
+    dominant = [c for c in clusters if c["share"] >= MIN_SHARE] or clusters[:1]
+    named = [{"color": nearest_color(c["rgb"]), "share": c["share"], "rgb": c["rgb"]} for c in dominant]
+    colors = robe_colors(robe)
+    if colors is None:
+        return {"photo": named, "agreement": None, "flagged": False}
+    fams = {PALETTE[c][0] for c in colors}
+    near = fams.union(*(FAMILY_NEIGHBOURS.get(f, set()) for f in fams))
+    for c in named:
+        c["agrees"] = PALETTE[c["color"]][0] in near or delta_e(c["rgb"], colors) <= AGREE_DELTA_E
+    total = sum(c["share"] for c in named) or 1.0
+    agree = sum(c["share"] for c in named if c["agrees"]) / total
+    return {"photo": named, "robe_families": sorted(fams), "agreement": round(agree, 3),
+            "flagged": agree < DISAGREE_BELOW}
+
+# ---------- étape ----------
+def load_cache() -> dict:
+    p = Path(CACHE_FILE)
+    if not p.exists():
+        return {"settings": None, "by_hash": {}, "files": {}}
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def main():
+    try:
+        import numpy
+        from PIL import Image  # vérifie la dispo de Pillow et NumPy en amont
+    except ImportError:
+        print("⚠️  Installe Pillow et NumPy avant:  pip install pillow numpy")
+        return
+    prof = StageProfiler("image_colors")
+    cache = load_cache()
+    if cache.get("settings") != settings_key():
+        cache = {"settings": settings_key(), "by_hash": {}, "files": {}}
+    by_hash, old_files = cache["by_hash"], cache.get("files", {})
+
+    sources, files, id_hash, todo = source_images(), {}, {}, {}
+    for bid, p in sources.items():
+        prev = old_files.get(p.name)
+        h = cached_digest(p, dict(zip(("size", "mtime_ns", "hash"), prev)) if prev else {})
+        st = p.stat()
+        files[p.name] = [st.st_size, st.st_mtime_ns, h]
+        id_hash[bid] = h
+        if h not in by_hash:
+            todo.setdefault(h, p)
+    prof.lap("scan")
+
+    print(f"Couleurs : {len(sources)} images, {len(todo)} à analyser (k={K}, {WORKERS} processus)")
+    errors = []
+    if todo:
+        hashes = list(todo)
+        with ProcessPoolExecutor(max(1, WORKERS)) as ex:
+            for h, fut in zip(hashes, [ex.submit(dominant_colors, str(todo[x])) for x in hashes]):
+                try:
+                    by_hash[h] = fut.result()
+                except Exception as e:
+                    errors.append((todo[h].name, str(e)))
+    # le cache ne garde que les contenus encore présents
+    live = set(id_hash.values())
+    cache = {"settings": settings_key(), "files": files,
+             "by_hash": {h: v for h, v in by_hash.items() if h in live}}
+    tmp = Path(CACHE_FILE + ".tmp")
+    tmp.write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, CACHE_FILE)
+    prof.lap("kmeans")
+
+    if not Path(BREEDS_FILE).exists():
+        # couleurs en cache quand même ; le contrôle des robes attend le fichier des races
+        print(f"✔ {len(cache['by_hash'])} couleurs en cache ({len(errors)} erreurs)")
+        print(f"⚠️ {BREEDS_FILE} introuvable, pas de contrôle des robes.")
+        prof.dump()
+        return
+    breeds = json.loads(Path(BREEDS_FILE).read_text(encoding="utf-8")).get("breeds", [])
+    rows = []
+    for b in breeds:
+        h = id_hash.get(b.get("id"))
+        if h is None or h not in cache["by_hash"]:
+            continue
+        robe = (b.get("features") or {}).get("robe") or []
+        rows.append({"id": b.get("id"), "breed": b.get("breed"), "robe": robe,
+                     **check_breed(robe, cache["by_hash"][h])})
+    flagged = [r for r in rows if r["flagged"]]
+    prof.lap("check")
+    report = prof.attach({"checked": len(rows), "flagged": len(flagged),
+                          "flag_rate": round(len(flagged) / len(rows), 3) if rows else None,
+                          "errors": [{"file": f, "error": e} for f, e in errors],
+                          "breeds": sorted(rows, key=lambda r: (not r["flagged"], r["agreement"] or 0))})
+    Path(REPORT_FILE).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print(f"✔ {len(rows)} races contrôlées, {len(flagged)} robes en désaccord avec la photo "
+          f"({len(flagged) / max(1, len(rows)):.0%}, {len(errors)} erreurs)")
+    for r in flagged[:10]:
+        photo = ", ".join(f"{c['color']} {c['share']:.0%}" for c in r["photo"])
+        print(f"   - {r['id']:03d} {r['breed']} : robe {r['robe']} / photo {photo}")
+    print(f"→ Rapport : {REPORT_FILE}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# image_derivatives.py
+"""
+Déclinaisons des images de races pour srcset : plusieurs largeurs x formats (WebP, JPEG progressif, AVIF optionnel).
+
+    images/001_Affenpinscher.jpg
+      -> images_derived/<empreinte>/256.webp, 256.jpg, 512.webp, ...
+      -> images_derived/manifest.json : {"images": {"1": {"source", "hash", "width", "height",
+                                                          "variants": [{"format", "width", "height", "bytes", "path"}]}}}
+
+- un processus par cœur (FURIOUS_IMAGE_WORKERS), chaque image décodée une seule fois
+  (draft JPEG à la plus grande largeur utile), puis réductions successives
+- incrémental : une image dont l'empreinte et les réglages n'ont pas changé n'est pas retraitée ;
+  l'empreinte est recalculée seulement si taille/mtime du fichier ont bougé
+- pas d'agrandissement : les largeurs supérieures à l'original sont ignorées
+  (l'original réduit à sa propre largeur sert alors de plus grande déclinaison)
+- deux races avec la même image partagent le même dossier de déclinaisons
+
+Nécessite Pillow (pip install pillow) ; AVIF : Pillow >= 11 ou le plugin pillow-avif-plugin.
+"""
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from image_store import cached_digest, image_size, open_rgb, source_images
+from stage_profile import StageProfiler
+
+OUT_DIR = Path("images_derived")
+MANIFEST_NAME = "manifest.json"
+WIDTHS = [128, 256, 512, 1024]
+FORMATS = ["webp", "jpeg"]          # ajouter "avif" si Pillow le gère
+QUALITY = {"webp": 80, "jpeg": 82, "avif": 60}
+EXT = {"webp": ".webp", "jpeg": ".jpg", "avif": ".avif"}
+WORKERS = int(os.environ.get("FURIOUS_IMAGE_WORKERS", str(os.cpu_count() or 1)))
+
+def settings_key() -> str:
+    """Signature des réglages : une modification relance toutes les images."""
+    return json.dumps({"w": sorted(WIDTHS), "f": FORMATS, "q": {f: QUALITY[f] for f in FORMATS}}, sort_keys=True)
+
+def render_variants(src: str, out_dir: str, widths, formats, quality) -> dict:
+    """Worker : décode `src` une fois et écrit toutes les déclinaisons dans out_dir ; -> entrée du manifeste."""
+    from PIL import Image
+    src, out = Path(src), Path(out_dir)
+    orig_w, orig_h = image_size(src)
+    usable = sorted({min(w, orig_w) for w in widths}, reverse=True)
+    im = open_rgb(src, usable[0])
+    out.mkdir(parents=True, exist_ok=True)
+    variants = []
+    for w in usable:
+        h = max(1, round(orig_h * w / orig_w))
+        # réduction depuis la déclinaison précédente (plus grande) : moins de pixels à filtrer
+        if im.width != w:
+            im = im.resize((w, h), Image.LANCZOS, reducing_gap=3.0)
+        for fmt in formats:
+            path = out / f"{w}{EXT[fmt]}"
+            part = path.with_name(f".part_{path.name}")
+            opts = {"quality": quality[fmt]}
+            if fmt == "jpeg":
+                opts.update(progressive=True, optimize=True)
+            elif fmt == "webp":
+                opts.update(method=4)
+            im.save(part, format=fmt.upper(), **opts)
+            os.replace(part, path)
+            variants.append({"format": fmt, "width": w, "height": h,
+                             "bytes": path.stat().st_size, "path": path.as_posix()})
+    variants.sort(key=lambda v: (v["width"], v["bytes"]))
+    return {"width": orig_w, "height": orig_h, "variants": variants}
+
+def load_manifest(out_dir=OUT_DIR) -> dict:
+    p = Path(out_dir) / MANIFEST_NAME
+    if not p.exists():
+        return {"settings": None, "images": {}}
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def save_manifest(manifest: dict, out_dir=OUT_DIR):
+    p = Path(out_dir) / MANIFEST_NAME
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, p)
+
+def _complete(entry: dict) -> bool:
+    return bool(entry.get("variants")) and all(Path(v["path"]).exists() for v in entry["variants"])
+
+def check_formats():
+    from PIL import features
+    missing = [f for f in FORMATS if not features.check(f if f != "jpeg" else "jpg")]
+    if missing:
+        raise SystemExit(f"❌ Pillow ne sait pas écrire : {', '.join(missing)} (retirer de FORMATS ou installer le support)")
+
+def main():
+    try:
+        check_formats()
+    except ImportError:
+        print("⚠️  Installe Pillow avant:  pip install pillow")
+        return
+    prof = StageProfiler("image_derivatives")
+    manifest = load_manifest()
+    key = settings_key()
+    same_settings = manifest.get("settings") == key
+    old_images = manifest.get("images", {})
+
+    sources = source_images()
+    new_images, todo = {}, {}     # todo : empreinte -> (source, [ids])
+    for bid, p in sources.items():
+        old = old_images.get(str(bid), {})
+        h = cached_digest(p, old)
+        st = p.stat()
+        base = {"source": p.name, "hash": h, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if same_settings and old.get("hash") == h and _complete(old):
+            new_images[str(bid)] = dict(old, **base)
+            continue
+        new_images[str(bid)] = base
+        todo.setdefault(h, (p, []))[1].append(str(bid))
+    prof.lap("scan")
+
+    print(f"Déclinaisons : {len(sources)} images, {len(todo)} à (re)générer, "
+          f"largeurs {WIDTHS}, formats {FORMATS}, {WORKERS} processus")
+    errors = 0
+    if todo:
+        with ProcessPoolExecutor(max(1, WORKERS)) as ex:
+            futures = {ex.submit(render_variants, str(p), str(OUT_DIR / h), WIDTHS, FORMATS, QUALITY): h
+                       for h, (p, _) in todo.items()}
+            for i, fut in enumerate(as_completed(futures), 1):
+                h = futures[fut]
+                p, ids = todo[h]
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    errors += 1
+                    print(f"✗ {p.name} : {e}")
+                    for bid in ids:
+                        new_images.pop(bid, None)
+                    continue
+                for bid in ids:
+                    new_images[bid].update(result)
+                if i % 50 == 0 or i == len(todo):
+                    print(f"   {i}/{len(todo)}")
+    prof.lap("render")
+
+    # dossiers de déclinaisons plus référencés (image remplacée ou supprimée)
+    used = {e["hash"] for e in new_images.values()}
+    removed = 0
+    if OUT_DIR.exists():
+        for d in OUT_DIR.iterdir():
+            if d.is_dir() and d.name not in used:
+                shutil.rmtree(d)
+                removed += 1
+
+    manifest = {"settings": key, "widths": WIDTHS, "formats": FORMATS,
+                "images": dict(sorted(new_images.items(), key=lambda kv: int(kv[0])))}
+    save_manifest(manifest)
+    prof.lap("write")
+
+    src_bytes = sum(e["size"] for e in new_images.values())
+    smallest = sum(min(v["bytes"] for v in e["variants"]) for e in new_images.values() if e.get("variants"))
+    print(f"✔ {len(new_images)} images dans {OUT_DIR / MANIFEST_NAME} ({errors} erreurs, {removed} dossiers obsolètes retirés)")
+    print(f"   originaux {src_bytes / 1e6:.1f} Mo, plus petites déclinaisons {smallest / 1e6:.1f} Mo")
+    prof.dump()
+
+if __name__ == "__main__":
+    sys.exit(main())
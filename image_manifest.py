@@ -0,0 +1,196 @@
+# image_manifest.py
+"""
+Manifeste des images par id de race : dimensions, poids, BlurHash et LQIP (vignette base64),
+puis jointure sur le jeu de races exporté pour que les listes s'affichent sans télécharger d'image.
+
+    images_manifest.json : {"images": {"1": {"file", "hash", "width", "height", "bytes",
+                                              "blurhash", "lqip"}}}
+    breeds_merged_aligned_with_images.json : chaque race + "image": {...} (+ "variants" si
+                                              images_derived/manifest.json existe)
+
+- décodage en mode draft (JPEG réduit à 1/8 au décodage), une image par processus (FURIOUS_IMAGE_WORKERS)
+- incrémental : une image dont l'empreinte n'a pas changé garde son entrée
+- BlurHash encodé ici (pas de dépendance), sur une vignette de BLURHASH_SIZE px
+
+Nécessite Pillow (pip install pillow).
+"""
+import base64
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from breeds_schema import write_breeds
+from image_derivatives import MANIFEST_NAME as DERIVED_MANIFEST_NAME, OUT_DIR as DERIVED_DIR, WORKERS
+from image_store import cached_digest, image_size, open_rgb, source_images
+from stage_profile import StageProfiler
+
+MANIFEST_FILE = "images_manifest.json"
+JOIN_IN = "breeds_merged_aligned.json"
+JOIN_OUT = "breeds_merged_aligned_with_images.json"
+BLURHASH_COMPONENTS = (4, 3)     # (x, y) pour une image en paysage ; inversé en portrait
+BLURHASH_SIZE = 32               # px (plus grand côté) de la vignette analysée
+LQIP_WIDTH = 16
+LQIP_QUALITY = 40
+
+# ---------- BlurHash ----------
+_B83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+_SRGB_TO_LINEAR = [((v / 255) / 12.92) if v / 255 <= 0.04045 else (((v / 255) + 0.055) / 1.055) ** 2.4
+                   for v in range(256)]
+
+def _b83(value: int, length: int) -> str:
+    return "".join(_B83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+def _linear_to_srgb(v: float) -> int:
+    v = min(1.0, max(0.0, v))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+def _sign_pow(v: float, exp: float) -> float:
+    return math.copysign(abs(v) ** exp, v)
+
+def blurhash(pixels, width: int, height: int, cx: int, cy: int) -> str:
+    """pixels : séquence de (r, g, b) 0..255, ligne par ligne."""
+    lin = [(_SRGB_TO_LINEAR[r], _SRGB_TO_LINEAR[g], _SRGB_TO_LINEAR[b]) for r, g, b in pixels]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(cx)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(cy)]
+    factors = []
+    for j in range(cy):
+        for i in range(cx):
+            norm = 1.0 if i == j == 0 else 2.0
+            r = g = b = 0.0
+            for y in range(height):
+                cyv = cos_y[j][y] * norm
+                row = y * width
+                for x in range(width):
+                    basis = cos_x[i][x] * cyv
+                    pr, pg, pb = lin[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = 1.0 / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    out = _b83((cx - 1) + (cy - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(v) for f in ac for v in f)
+        q = max(0, min(82, int(math.floor(actual_max * 166 - 0.5))))
+        max_value = (q + 1) / 166
+        out += _b83(q, 1)
+    else:
+        max_value = 1.0
+        out += _b83(0, 1)
+    out += _b83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+    for f in ac:
+        r, g, b = (max(0, min(18, int(math.floor(_sign_pow(v / max_value, 0.5) * 9 + 9.5)))) for v in f)
+        out += _b83(r * 19 * 19 + g * 19 + b, 2)
+    return out
+
+# ---------- worker ----------
+def describe_image(src: str) -> dict:
+    """Worker : dimensions, BlurHash et LQIP d'une image (décodée en draft, jamais en pleine taille)."""
+    from PIL import Image
+    p = Path(src)
+    width, height = image_size(p)
+    im = open_rgb(p, max(BLURHASH_SIZE, LQIP_WIDTH))
+
+    small = im.copy()
+    small.thumbnail((BLURHASH_SIZE, BLURHASH_SIZE), Image.BILINEAR)
+    cx, cy = BLURHASH_COMPONENTS if width >= height else BLURHASH_COMPONENTS[::-1]
+    bh = blurhash(list(small.getdata()), small.width, small.height, cx, cy)
+
+    lq = im.resize((LQIP_WIDTH, max(1, round(LQIP_WIDTH * height / width))), Image.BILINEAR)
+    buf = BytesIO()
+    lq.save(buf, format="JPEG", quality=LQIP_QUALITY)
+    lqip = "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+    return {"width": width, "height": height, "blurhash": bh, "lqip": lqip}
+
+# ---------- manifeste ----------
+def load_manifest(path=MANIFEST_FILE) -> dict:
+    p = Path(path)
+    if not p.exists():
+        return {"images": {}}
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def build_manifest(old: dict) -> tuple:
+    """-> (manifeste, nb d'images analysées, erreurs)"""
+    old_images = old.get("images", {})
+    images, todo = {}, {}
+    for bid, p in source_images().items():
+        prev = old_images.get(str(bid), {})
+        st = p.stat()
+        h = cached_digest(p, dict(prev, size=prev.get("bytes")))
+        entry = {"file": p.name, "hash": h, "bytes": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if prev.get("hash") == h and prev.get("blurhash"):
+            images[str(bid)] = dict(prev, **entry)
+        else:
+            images[str(bid)] = entry
+            todo[str(bid)] = p
+
+    errors = []
+    if todo:
+        ids = list(todo)
+        with ProcessPoolExecutor(max(1, WORKERS)) as ex:
+            futures = [ex.submit(describe_image, str(todo[bid])) for bid in ids]
+            for bid, fut in zip(ids, futures):
+                try:
+                    images[bid].update(fut.result())
+                except Exception as e:
+                    errors.append((todo[bid].name, str(e)))
+                    images.pop(bid)
+    manifest = {"images": dict(sorted(images.items(), key=lambda kv: int(kv[0])))}
+    return manifest, len(todo), errors
+
+def join_breeds(breeds, manifest: dict, derived: dict | None = None) -> int:
+    """Ajoute b["image"] (sans empreinte ni mtime) à chaque race qui a une image ; -> nb joint."""
+    images = manifest.get("images", {})
+    derived_images = (derived or {}).get("images", {})
+    joined = 0
+    for b in breeds:
+        e = images.get(str(b.get("id")))
+        if not e:
+            b.pop("image", None)
+            continue
+        img = {k: e[k] for k in ("file", "width", "height", "bytes", "blurhash", "lqip")}
+        variants = derived_images.get(str(b.get("id")), {}).get("variants")
+        if variants:
+            img["variants"] = variants
+        b["image"] = img
+        joined += 1
+    return joined
+
+def main():
+    try:
+        from PIL import Image  # vérifie la dispo de Pillow en amont
+    except ImportError:
+        print("⚠️  Installe Pillow avant:  pip install pillow")
+        return
+    prof = StageProfiler("image_manifest")
+    manifest, analysed, errors = build_manifest(load_manifest())
+    prof.lap("analyse")
+    tmp = Path(MANIFEST_FILE + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, MANIFEST_FILE)
+    print(f"✔ {len(manifest['images'])} images dans {MANIFEST_FILE} ({analysed} analysées, {len(errors)} erreurs)")
+    for name, err in errors[:10]:
+        print(f"   ✗ {name} : {err}")
+
+    if Path(JOIN_IN).exists():
+        breeds = json.loads(Path(JOIN_IN).read_text(encoding="utf-8")).get("breeds", [])
+        derived_path = DERIVED_DIR / DERIVED_MANIFEST_NAME
+        derived = json.loads(derived_path.read_text(encoding="utf-8")) if derived_path.exists() else None
+        n = join_breeds(breeds, manifest, derived)
+        write_breeds(JOIN_OUT, breeds)
+        print(f"✔ {n}/{len(breeds)} races avec image → {JOIN_OUT}")
+    else:
+        print(f"⚠️ {JOIN_IN} introuvable, pas de jointure.")
+    prof.lap("join")
+    prof.dump()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# image_pack.py
+"""
+Archive unique des images (originaux + déclinaisons) pour le service et le déploiement.
+
+    images.pack           # blobs concaténés, chacun aligné sur ALIGN octets, dédoublonnés par empreinte
+    images.pack.idx.json  # {"entries": {"1": {"original": [offset, longueur, type, empreinte],
+                          #                    "webp-256": [...]}}, "files": cache taille/mtime -> empreinte}
+
+Lecture sans copie :
+    with PackReader() as pack:
+        view, ctype = pack.get(1, "webp-256")   # memoryview sur le mmap de l'archive
+    # une tranche encore vivante après la sortie reste lisible : le mmap est libéré avec la
+    # dernière tranche (view.release() pour le libérer tout de suite)
+
+Reconstruction incrémentale : les blobs déjà présents gardent leur offset, les nouveaux sont ajoutés
+en fin de fichier (un lecteur ouvert sur l'ancienne taille reste valide) ; au-delà de MAX_GARBAGE
+d'espace mort (images remplacées), l'archive est réécrite dans un nouveau fichier puis remplacée.
+"""
+import json
+import mmap
+import os
+import sys
+from pathlib import Path
+
+from image_derivatives import MANIFEST_NAME as DERIVED_MANIFEST_NAME, OUT_DIR as DERIVED_DIR
+from image_store import cached_digest, source_images
+
+PACK_FILE = Path("images.pack")
+ALIGN = 4096          # alignement page : tranches mmap / sendfile sans chevauchement
+MAX_GARBAGE = 0.25    # part d'espace mort qui déclenche une réécriture complète
+CONTENT_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png",
+                 ".webp": "image/webp", ".avif": "image/avif"}
+
+def index_path(pack=PACK_FILE) -> Path:
+    return Path(pack).with_name(Path(pack).name + ".idx.json")
+
+def load_index(pack=PACK_FILE) -> dict:
+    p = index_path(pack)
+    if not p.exists():
+        return {"align": ALIGN, "size": 0, "entries": {}, "files": {}}
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def _padded(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+# ---------- construction ----------
+def collect_files() -> dict:
+    """id -> {variante: chemin} : l'original de images/ et les déclinaisons du manifeste."""
+    wanted = {str(bid): {"original": p} for bid, p in source_images().items()}
+    derived = DERIVED_DIR / DERIVED_MANIFEST_NAME
+    if derived.exists():
+        manifest = json.loads(derived.read_text(encoding="utf-8"))
+        for bid, e in manifest.get("images", {}).items():
+            if bid not in wanted:
+                continue
+            for v in e.get("variants", []):
+                wanted[bid][f"{v['format']}-{v['width']}"] = Path(v["path"])
+    return wanted
+
+def build(pack=PACK_FILE) -> dict:
+    pack = Path(pack)
+    old = load_index(pack)
+    old_files = old.get("files", {})
+    # blobs déjà dans l'archive : empreinte -> (offset, longueur)
+    stored = {}
+    for variants in old.get("entries", {}).values():
+        for off, length, _, h in variants.values():
+            stored[h] = (off, length)
+    if old.get("align") != ALIGN or not pack.exists() or pack.stat().st_size < old.get("size", 0):
+        stored = {}
+
+    wanted = collect_files()
+    files, entries, needed = {}, {}, {}
+    for bid, variants in wanted.items():
+        entries[bid] = {}
+        for variant, p in variants.items():
+            key = p.as_posix()
+            prev = old_files.get(key)
+            h = cached_digest(p, dict(zip(("size", "mtime_ns", "hash"), prev)) if prev else {})
+            st = p.stat()
+            files[key] = [st.st_size, st.st_mtime_ns, h]
+            ctype = CONTENT_TYPES.get(p.suffix.lower(), "application/octet-stream")
+            entries[bid][variant] = [None, st.st_size, ctype, h]
+            needed.setdefault(h, p)
+
+    live = sum(_padded(stored[h][1]) for h in needed if h in stored)
+    size = old.get("size", 0) if stored else 0
+    rewrite = not stored or (size and (size - live) / size > MAX_GARBAGE)
+    stats = {"blobs": len(needed), "appended": 0, "reused": 0, "rewritten": bool(rewrite)}
+
+    target = pack.with_name(f".part_{pack.name}") if rewrite else pack
+    offsets = {} if rewrite else {h: stored[h][0] for h in needed if h in stored}
+    stats["reused"] = len(offsets)
+    with open(target, "wb" if rewrite else "r+b") as out:
+        end = 0 if rewrite else size
+        out.seek(end)
+        for h, p in needed.items():
+            if h in offsets:
+                continue
+            data = p.read_bytes()
+            out.write(data)
+            out.write(b"\0" * (_padded(len(data)) - len(data)))
+            offsets[h] = end
+            end += _padded(len(data))
+            stats["appended"] += 1
+        out.truncate(end)
+        out.flush()
+        os.fsync(out.fileno())
+    if rewrite:
+        os.replace(target, pack)
+
+    for variants in entries.values():
+        for v in variants.values():
+            v[0] = offsets[v[3]]
+    index = {"align": ALIGN, "size": end, "entries": entries, "files": files}
+    tmp = index_path(pack).with_name(index_path(pack).name + ".tmp")
+    tmp.write_text(json.dumps(index, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    # index écrit après les données : un lecteur ne voit jamais d'offset pointant hors du fichier
+    os.replace(tmp, index_path(pack))
+    stats["size"] = end
+    stats["garbage"] = end - sum(_padded(p.stat().st_size) for p in needed.values())
+    return stats
+
+# ---------- lecture ----------
+class PackReader:
+    def __init__(self, pack=PACK_FILE):
+        self.index = load_index(pack)["entries"]
+        self._f = open(pack, "rb")
+        if os.fstat(self._f.fileno()).st_size == 0:   # mmap refuse un fichier vide
+            self._mm, self._view = None, memoryview(b"")
+        else:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mm)
+
+    def variants(self, bid) -> list:
+        return list(self.index.get(str(bid), {}))
+
+    def get(self, bid, variant: str = "original"):
+        """-> (memoryview, content-type) ; KeyError si l'id ou la variante n'existe pas."""
+        off, length, ctype, _ = self.index[str(bid)][variant]
+        return self._view[off:off + length], ctype
+
+    def close(self):
+        self._view.release()
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass   # tranches encore exportées : le ramasse-miettes démappe avec la dernière
+            self._mm = None
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] == "get":
+        # python image_pack.py get 1 webp-256 > out.webp
+        with PackReader() as pack:
+            view, _ = pack.get(argv[1], argv[2] if len(argv) > 2 else "original")
+            sys.stdout.buffer.write(view)
+            view.release()
+        return 0
+    s = build()
+    print(f"✔ {PACK_FILE} : {s['blobs']} blobs ({s['appended']} ajoutés, {s['reused']} repris"
+          f"{', archive réécrite' if s['rewritten'] else ''}), {s['size'] / 1e6:.1f} Mo, "
+          f"espace mort {s['garbage'] / 1e6:.1f} Mo")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
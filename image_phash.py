@@ -0,0 +1,290 @@
+# image_phash.py
+"""
+Empreintes perceptuelles des images (aHash, dHash, pHash 64 bits, NumPy) pour repérer :
+- les doublons / quasi-doublons entre races (même photo recadrée, recompressée, redimensionnée)
+- les placeholders connus (silhouette générique, drapeau, logo) qui ont passé is_bad_placeholder
+
+    python image_phash.py                      # empreintes (incrémental) + rapport image_duplicates.json
+    python image_phash.py block 123 silhouette # ajoute l'image de l'id 123 (ou un chemin) à la liste de blocage
+
+Recherche des voisins : BK-tree sur le pHash (distance de Hamming) -> pas de comparaison de toutes
+les paires ; une paire n'est retenue que si pHash ET dHash sont sous leur rayon.
+La liste de blocage (placeholder_hashes.json) est vérifiée par les scripts de téléchargement avant
+l'enregistrement (placeholder_match_bytes / placeholder_match).
+
+Nécessite Pillow et NumPy (pip install pillow numpy).
+"""
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from image_derivatives import WORKERS
+from image_store import cached_digest, open_rgb, source_images
+from stage_profile import StageProfiler
+
+HASH_FILE = "image_phash.json"
+REPORT_FILE = "image_duplicates.json"
+BLOCKLIST_FILE = "placeholder_hashes.json"
+PHASH_RADIUS = 10         # bits sur 64
+DHASH_RADIUS = 14
+PLACEHOLDER_RADIUS = 8    # pHash uniquement
+
+# ---------- empreintes ----------
+@lru_cache(maxsize=None)
+def _dct_matrix(n: int = 32):
+    import numpy as np
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    m = np.cos(math.pi * (2 * x + 1) * k / (2 * n)) * math.sqrt(2 / n)
+    m[0] /= math.sqrt(2)
+    return m
+
+def _bits_to_hex(bits) -> str:
+    import numpy as np
+    return np.packbits(bits.flatten()).tobytes().hex()
+
+def hashes_of(im) -> dict:
+    """im : image PIL (n'importe quel mode) -> {"ahash", "dhash", "phash"} en hexa 16 caractères."""
+    import numpy as np
+    from PIL import Image
+    g = im.convert("L")
+    a = np.asarray(g.resize((8, 8), Image.BOX), dtype=np.float32)
+    d = np.asarray(g.resize((9, 8), Image.BOX), dtype=np.float32)
+    p = np.asarray(g.resize((32, 32), Image.BOX), dtype=np.float64)
+    m = _dct_matrix(32)
+    low = (m @ p @ m.T)[:8, :8]
+    return {
+        "ahash": _bits_to_hex(a > a.mean()),
+        "dhash": _bits_to_hex(d[:, 1:] > d[:, :-1]),
+        # médiane sans la composante continue, qui écraserait les autres coefficients
+        "phash": _bits_to_hex(low > np.median(low.flatten()[1:])),
+    }
+
+def hash_file(src: str) -> dict:
+    """Worker : empreintes d'un fichier, décodé en draft à 64 px."""
+    return hashes_of(open_rgb(src, 64))
+
+def hamming(a: str, b: str) -> int:
+    return (int(a, 16) ^ int(b, 16)).bit_count()
+
+# ---------- BK-tree ----------
+class BKTree:
+    """Arbre métrique pour la distance de Hamming : requête par rayon sans parcourir tous les éléments."""
+    def __init__(self):
+        self.root = None   # [clé int, [items], {distance: nœud}]
+        self.size = 0
+
+    def add(self, key: str, item):
+        k = int(key, 16)
+        self.size += 1
+        if self.root is None:
+            self.root = [k, [item], {}]
+            return
+        node = self.root
+        while True:
+            dist = (k ^ node[0]).bit_count()
+            if dist == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = [k, [item], {}]
+                return
+            node = child
+
+    def query(self, key: str, radius: int):
+        """-> [(distance, item)] à distance <= radius."""
+        if self.root is None:
+            return []
+        k = int(key, 16)
+        found, stack = [], [self.root]
+        while stack:
+            node = stack.pop()
+            dist = (k ^ node[0]).bit_count()
+            if dist <= radius:
+                found.extend((dist, it) for it in node[1])
+            # inégalité triangulaire : seuls les enfants à |d - dist| <= radius peuvent contenir un voisin
+            for d, child in node[2].items():
+                if dist - radius <= d <= dist + radius:
+                    stack.append(child)
+        return found
+
+# ---------- liste de blocage ----------
+def load_blocklist(path=BLOCKLIST_FILE) -> list:
+    p = Path(path)
+    if not p.exists():
+        return []
+    return json.loads(p.read_text(encoding="utf-8")).get("placeholders", [])
+
+@lru_cache(maxsize=1)
+def _blocklist_tree():
+    tree = BKTree()
+    for e in load_blocklist():
+        tree.add(e["phash"], e.get("label") or e.get("source") or "placeholder")
+    return tree
+
+def placeholder_match(im):
+    """
+    Libellé du placeholder connu le plus proche de l'image PIL `im`, ou None.
+    `im` doit être normalisée comme dans hash_file (open_rgb : alpha sur blanc, rotation EXIF).
+    """
+    tree = _blocklist_tree()
+    if tree.size == 0:
+        return None
+    hits = tree.query(hashes_of(im)["phash"], PLACEHOLDER_RADIUS)
+    return min(hits)[1] if hits else None
+
+def placeholder_match_bytes(content: bytes):
+    """Comme placeholder_match, depuis les octets téléchargés ; None si Pillow/NumPy absents ou liste vide."""
+    if _blocklist_tree().size == 0:
+        return None
+    try:
+        # même normalisation que block()/hash_file, sinon un PNG transparent ne retrouve pas sa propre empreinte
+        return placeholder_match(open_rgb(BytesIO(content), 64))
+    except ImportError:
+        return None
+    except Exception:
+        return None   # octets illisibles : le téléchargement décide seul
+
+def block(target: str, label: str):
+    """Ajoute l'image d'un id (ou d'un chemin) à la liste de blocage."""
+    p = Path(target)
+    if not p.exists():
+        p = source_images().get(int(target)) if target.isdigit() else None
+        if p is None:
+            raise SystemExit(f"❌ image introuvable : {target}")
+    entries = load_blocklist()
+    h = hash_file(str(p))
+    entries.append({"label": label or p.stem, "source": p.name, **h})
+    Path(BLOCKLIST_FILE).write_text(json.dumps({"placeholders": entries}, ensure_ascii=False, indent=2),
+                                    encoding="utf-8")
+    print(f"✔ {p.name} ajouté à {BLOCKLIST_FILE} (pHash {h['phash']})")
+
+# ---------- index + rapport ----------
+def compute_hashes(old: dict) -> tuple:
+    """-> (entrées par id, nb calculées, erreurs) ; une entrée inchangée (même empreinte de contenu) est reprise."""
+    images, todo = {}, {}
+    for bid, p in source_images().items():
+        prev = old.get(str(bid), {})
+        h = cached_digest(p, prev)
+        st = p.stat()
+        entry = {"file": p.name, "hash": h, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if prev.get("hash") == h and prev.get("phash"):
+            images[str(bid)] = dict(prev, **entry)
+        else:
+            images[str(bid)] = entry
+            todo[str(bid)] = p
+    errors = []
+    if todo:
+        ids = list(todo)
+        with ProcessPoolExecutor(max(1, WORKERS)) as ex:
+            for bid, fut in zip(ids, [ex.submit(hash_file, str(todo[b])) for b in ids]):
+                try:
+                    images[bid].update(fut.result())
+                except Exception as e:
+                    errors.append((todo[bid].name, str(e)))
+                    images.pop(bid)
+    return images, len(todo), errors
+
+def duplicate_clusters(images: dict) -> list:
+    """Groupes d'ids dont les images sont quasi identiques (union-find sur les paires trouvées par le BK-tree)."""
+    tree = BKTree()
+    for bid, e in images.items():
+        tree.add(e["phash"], bid)
+    parent = {bid: bid for bid in images}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    pairs = []
+    for bid, e in images.items():
+        for d, other in tree.query(e["phash"], PHASH_RADIUS):
+            if other == bid or hamming(e["dhash"], images[other]["dhash"]) > DHASH_RADIUS:
+                continue
+            pairs.append((bid, d))
+            ra, rb = find(bid), find(other)
+            if ra != rb:
+                parent[ra] = rb
+    dist = {}
+    for bid, d in pairs:
+        root = find(bid)
+        dist[root] = max(dist.get(root, 0), d)
+    groups = {}
+    for bid in images:
+        groups.setdefault(find(bid), []).append(bid)
+    clusters = []
+    for root, ids in groups.items():
+        if len(ids) < 2:
+            continue
+        ids.sort(key=int)
+        clusters.append({"ids": [int(i) for i in ids], "files": [images[i]["file"] for i in ids],
+                         "max_phash_distance": dist.get(root, 0),
+                         "identical_bytes": len({images[i]["hash"] for i in ids}) == 1})
+    clusters.sort(key=lambda c: c["ids"][0])
+    return clusters
+
+def placeholder_hits(images: dict) -> list:
+    tree = _blocklist_tree()
+    hits = []
+    for bid, e in images.items():
+        found = tree.query(e["phash"], PLACEHOLDER_RADIUS)
+        if found:
+            d, label = min(found)
+            hits.append({"id": int(bid), "file": e["file"], "label": label, "distance": d})
+    return sorted(hits, key=lambda h: h["id"])
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    try:
+        import numpy
+        from PIL import Image  # vérifie la dispo de Pillow et NumPy en amont
+    except ImportError:
+        print("⚠️  Installe Pillow et NumPy avant:  pip install pillow numpy")
+        return 1
+    if argv and argv[0] == "block":
+        if len(argv) < 2:
+            raise SystemExit("usage : python image_phash.py block <id|chemin> [libellé]")
+        block(argv[1], " ".join(argv[2:]))
+        return 0
+
+    prof = StageProfiler("image_phash")
+    old = json.loads(Path(HASH_FILE).read_text(encoding="utf-8")).get("images", {}) if Path(HASH_FILE).exists() else {}
+    images, computed, errors = compute_hashes(old)
+    tmp = Path(HASH_FILE + ".tmp")
+    tmp.write_text(json.dumps({"images": dict(sorted(images.items(), key=lambda kv: int(kv[0])))},
+                              ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, HASH_FILE)
+    prof.lap("hash")
+
+    clusters = duplicate_clusters(images)
+    hits = placeholder_hits(images)
+    prof.lap("search")
+    report = prof.attach({
+        "images": len(images),
+        "radius": {"phash": PHASH_RADIUS, "dhash": DHASH_RADIUS, "placeholder": PLACEHOLDER_RADIUS},
+        "clusters": clusters,
+        "placeholders": hits,
+        "errors": [{"file": f, "error": e} for f, e in errors],
+    })
+    Path(REPORT_FILE).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print(f"✔ {len(images)} images ({computed} hachées, {len(errors)} erreurs)")
+    print(f"   ◦ {len(clusters)} groupes de doublons, {sum(len(c['ids']) for c in clusters)} images concernées")
+    for c in clusters[:10]:
+        print(f"     - {', '.join(c['files'])} (d≤{c['max_phash_distance']})")
+    print(f"   ◦ {len(hits)} placeholders connus")
+    for h in hits[:10]:
+        print(f"     - {h['file']} ~ {h['label']} (d={h['distance']})")
+    print(f"→ Rapport : {REPORT_FILE}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+# image_store.py
+"""
+Stockage des images par contenu + vues lisibles images/NNN_Nom.ext.
+
+    image_store/objects/ab/ab12...ef.jpg   # octets stockés une seule fois (nom = empreinte blake2b)
+    image_store/index.json                 # id de race -> empreinte + nom ; empreinte -> ext, taille
+
+Les fichiers de images/ deviennent des liens (hardlink, sinon symlink, sinon copie) vers les objets :
+renommer, renuméroter ou corriger la casse = modifier l'index puis régénérer les vues,
+sans réécrire d'octets. Deux races avec la même image partagent un seul objet.
+Vues hardlink/symlink en lecture seule (0o444, comme l'objet) : pour retoucher une image, la
+remplacer (nouveau fichier puis ingest), ne pas l'écrire en place ; sinon LINK_MODE=copy
+(FURIOUS_IMAGE_LINK_MODE=copy).
+Les scripts de renommage (bump_image_ids, fix_*) passent par rename_journal, qui met l'index
+à jour dans la même transaction que les fichiers.
+
+    python image_store.py ingest                  # images/ -> magasin (nouveaux téléchargements compris) + vues
+    python image_store.py names breeds_links.json # noms des vues depuis le JSON (id, breed) + vues
+    python image_store.py shift 114 148 1         # ids 114..148 décalés de +1 + vues
+    python image_store.py materialize             # régénère les vues depuis l'index
+    python image_store.py export DEST             # objets dédoublonnés + index
+    python image_store.py gc                      # supprime les objets non référencés
+    python image_store.py                         # état
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+
+IMAGES_DIR = Path("images")
+STORE_DIR = Path("image_store")
+INDEX_NAME = "index.json"
+# hardlink | symlink | copy (repli automatique dans cet ordre). hardlink et symlink partagent les octets
+# de l'objet : les vues sont en lecture seule, et une écriture en place (possible en root malgré 0o444)
+# modifierait l'objet de toutes les races qui le partagent. "copy" pour des vues modifiables.
+LINK_MODE = os.environ.get("FURIOUS_IMAGE_LINK_MODE", "hardlink")
+PREFERRED_EXTS = (".jpg", ".jpeg", ".png")   # si un id a plusieurs fichiers, le premier gagne
+
+IMAGE_RE = re.compile(r"^(\d+)_([^.]+)\.(jpg|jpeg|png)$", re.IGNORECASE)
+
+# ---------- helpers partagés (énumération, empreinte, nom de vue) ----------
+def iter_breed_images(images_dir=IMAGES_DIR):
+    """Génère (id, segment nom, chemin) pour chaque NNN_Nom.ext du dossier, triés par id puis nom."""
+    d = Path(images_dir)
+    if not d.exists():
+        return
+    found = []
+    for p in d.iterdir():
+        m = IMAGE_RE.match(p.name)
+        if m and p.is_file():
+            found.append((int(m.group(1)), m.group(2), p))
+    yield from sorted(found, key=lambda t: (t[0], t[2].name))
+
+def file_digest(path, chunk: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def filename_segment(name: str) -> str:
+    """Même normalisation que les scripts de téléchargement (espaces -> _, ponctuation retirée)."""
+    s = re.sub(r"[^\w\-\s]", "", name, flags=re.UNICODE)
+    s = re.sub(r"\s+", "_", s.strip())
+    return s or "breed"
+
+def view_name(bid: int, segment: str, ext: str) -> str:
+    """Extension gardée telle quelle (.JPG reste .JPG) : materialize ne renomme pas les fichiers existants."""
+    return f"{int(bid):03d}_{segment}{ext}"
+
+def source_images(images_dir=IMAGES_DIR) -> dict:
+    """id -> chemin de l'image source (un fichier par id, selon PREFERRED_EXTS)."""
+    rank = {e: i for i, e in enumerate(PREFERRED_EXTS)}
+    chosen = {}
+    for bid, _, p in iter_breed_images(images_dir):
+        prev = chosen.get(bid)
+        if prev is None or rank.get(p.suffix.lower(), 99) < rank.get(prev.suffix.lower(), 99):
+            chosen[bid] = p
+    return chosen
+
+def cached_digest(p: Path, old: dict) -> str:
+    """Empreinte de p, reprise de l'entrée `old` si taille et mtime n'ont pas bougé."""
+    st = p.stat()
+    if old and old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns:
+        return old["hash"]
+    return file_digest(p)
+
+def image_size(src):
+    """(largeur, hauteur) affichées, orientation EXIF comprise, sans décoder les pixels."""
+    from PIL import Image   # Pillow seulement pour les étapes qui décodent
+    with Image.open(src) as im:
+        w, h = im.size
+        if im.getexif().get(0x0112) in (5, 6, 7, 8):   # orientation EXIF tournée de 90°
+            w, h = h, w
+    return w, h
+
+def open_rgb(src, target_w: int):
+    """Image RGB (alpha aplati sur blanc, orientation EXIF appliquée), décodée en draft près de target_w."""
+    from PIL import Image, ImageOps
+    im = Image.open(src)
+    # JPEG : décodage directement à l'échelle 1/2, 1/4, 1/8 la plus proche au-dessus de la cible
+    im.draft("RGB", (target_w, max(1, target_w * im.height // max(1, im.width))))
+    im = ImageOps.exif_transpose(im)
+    if im.mode in ("RGBA", "LA", "P"):
+        im = im.convert("RGBA")
+        bg = Image.new("RGB", im.size, (255, 255, 255))
+        bg.paste(im, mask=im.split()[-1])
+        return bg
+    return im.convert("RGB")
+
+# ---------- index ----------
+class ImageStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.objects = {}   # empreinte -> {"ext", "bytes"}
+        self.images = {}    # id (str) -> {"hash", "name", "ext"} (ext = extension de la vue, casse d'origine)
+        p = self.root / INDEX_NAME
+        if p.exists():
+            data = json.loads(p.read_text(encoding="utf-8"))
+            self.objects = data.get("objects", {})
+            self.images = data.get("images", {})
+
+    def object_path(self, h: str) -> Path:
+        return self.root / "objects" / h[:2] / f"{h}{self.objects[h]['ext']}"
+
+    def index_data(self) -> dict:
+        return {"images": dict(sorted(self.images.items(), key=lambda kv: int(kv[0]))),
+                "objects": dict(sorted(self.objects.items()))}
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / (INDEX_NAME + ".tmp")
+        tmp.write_text(json.dumps(self.index_data(), ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.root / INDEX_NAME)
+
+    def add_file(self, path: Path) -> str:
+        """Range `path` dans le magasin (lien si possible, copie sinon) ; -> empreinte."""
+        h = file_digest(path)
+        if h not in self.objects:
+            self.objects[h] = {"ext": path.suffix.lower(), "bytes": path.stat().st_size}
+            obj = self.object_path(h)
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(path, obj)
+            except OSError:
+                shutil.copy2(path, obj)
+            # lecture seule : une écriture via une vue hardlinkée modifierait l'objet partagé.
+            # Effet voulu : images/NNN_Nom.ext (même inode) passe aussi en 0o444 ; les téléchargeurs
+            # remplacent le fichier (.part_ + os.replace) au lieu de l'écrire en place.
+            os.chmod(obj, 0o444)
+        return h
+
+    def view_names(self) -> dict:
+        return {view_name(bid, e["name"], e.get("ext") or self.objects[e["hash"]]["ext"]): self.object_path(e["hash"])
+                for bid, e in self.images.items()}
+
+    # ----- opérations de métadonnées -----
+    def rename(self, bid, segment: str):
+        self.images[str(bid)]["name"] = segment
+
+    def renumber(self, mapping: dict):
+        """mapping {ancien id: nouvel id}, appliqué d'un coup (chaînes et permutations comprises)."""
+        mapping = {str(k): str(v) for k, v in mapping.items()}
+        moved = {old: self.images.pop(old) for old in mapping if old in self.images}
+        clash = [new for old, new in mapping.items() if old in moved and new in self.images]
+        if clash:
+            self.images.update(moved)
+            raise SystemExit(f"❌ ids déjà occupés : {', '.join(clash[:10])}")
+        for old, entry in moved.items():
+            self.images[mapping[old]] = entry
+
+    def apply_renames(self, moves: dict) -> int:
+        """
+        Reporte dans l'index des renommages faits sur les vues ({ancien nom: nouveau nom}, cf. rename_journal) :
+        ids renumérotés d'un coup (renumber), puis segment et extension de chaque vue renommée ; -> nb d'ids touchés.
+        """
+        renumber, views = {}, {}
+        for src, dst in moves.items():
+            ms, md = IMAGE_RE.match(src), IMAGE_RE.match(dst)
+            if not (ms and md) or str(int(ms.group(1))) not in self.images:
+                continue
+            old, new = int(ms.group(1)), int(md.group(1))
+            if old != new:
+                renumber[old] = new
+            views[new] = (md.group(2), dst[dst.rindex("."):])
+        if renumber:
+            self.renumber(renumber)
+        for bid, (segment, ext) in views.items():
+            self.rename(bid, segment)
+            self.images[str(bid)]["ext"] = ext
+        return len(views)
+
+    def gc(self) -> int:
+        used = {e["hash"] for e in self.images.values()}
+        removed = 0
+        for h in [h for h in self.objects if h not in used]:
+            p = self.object_path(h)
+            if p.exists():
+                os.chmod(p, 0o644)
+                p.unlink()
+            del self.objects[h]
+            removed += 1
+        return removed
+
+# ---------- vues ----------
+def _same_file(a: Path, b: Path) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+def _link(obj: Path, dest: Path, mode: str) -> str:
+    tmp = dest.with_name(f".tmp_{dest.name}")
+    if tmp.exists() or tmp.is_symlink():
+        tmp.unlink()
+    modes = ("hardlink", "symlink", "copy")
+    for m in modes[modes.index(mode):]:
+        try:
+            if m == "hardlink":
+                os.link(obj, tmp)
+            elif m == "symlink":
+                os.symlink(os.path.relpath(obj, dest.parent), tmp)
+            else:
+                shutil.copy2(obj, tmp)
+                os.chmod(tmp, 0o644)
+            os.replace(tmp, dest)
+            return m
+        except OSError:
+            continue
+    raise OSError(f"impossible de créer la vue {dest}")
+
+def materialize(store: ImageStore, images_dir=IMAGES_DIR, mode: str = LINK_MODE) -> dict:
+    """
+    Aligne images/ sur l'index : crée/remplace les vues, retire les vues obsolètes.
+    Un fichier qui n'est pas une vue du magasin (téléchargement non ingéré) n'est jamais écrasé.
+    """
+    d = Path(images_dir)
+    d.mkdir(parents=True, exist_ok=True)
+    wanted = store.view_names()
+    store_inodes = {(st.st_dev, st.st_ino) for st in
+                    (store.object_path(h).stat() for h in store.objects if store.object_path(h).exists())}
+    stats = {"created": 0, "kept": 0, "removed": 0, "protected": 0}
+
+    sizes = {o["bytes"] for o in store.objects.values()}
+
+    def managed(p: Path) -> bool:
+        """Vue du magasin (lien) ou copie à l'identique d'un objet : remplaçable sans perte."""
+        if p.is_symlink():
+            return Path(os.path.realpath(p)).parent.parent == (store.root / "objects").resolve()
+        st = p.stat()
+        if (st.st_dev, st.st_ino) in store_inodes:
+            return True
+        return st.st_size in sizes and file_digest(p) in store.objects
+
+    for _, _, p in list(iter_breed_images(d)):
+        if p.name in wanted:
+            continue
+        if managed(p):
+            p.unlink()
+            stats["removed"] += 1
+        else:
+            print(f"   ⚠️ {p.name} hors magasin, conservé")
+            stats["protected"] += 1
+
+    for name, obj in wanted.items():
+        dest = d / name
+        if dest.exists() or dest.is_symlink():
+            if _same_file(dest, obj):
+                stats["kept"] += 1
+                continue
+            if not managed(dest):
+                print(f"   ⚠️ {name} hors magasin, non écrasé (lancer ingest)")
+                stats["protected"] += 1
+                continue
+        _link(obj, dest, mode)
+        stats["created"] += 1
+    return stats
+
+def ingest(store: ImageStore, images_dir=IMAGES_DIR) -> dict:
+    """
+    Range chaque NNN_Nom.ext dans le magasin et pointe l'id sur son contenu actuel ;
+    un id sans fichier dans images/ (supprimé, ou renuméroté hors du magasin) est retiré de l'index.
+    """
+    stats = {"files": 0, "new_objects": 0, "updated_ids": 0, "dropped_ids": 0, "duplicates": 0}
+    rank = {e: i for i, e in enumerate(PREFERRED_EXTS)}
+    chosen = {}
+    for bid, segment, p in iter_breed_images(images_dir):
+        prev = chosen.get(bid)
+        if prev is None or rank.get(p.suffix.lower(), 99) < rank.get(prev[1].suffix.lower(), 99):
+            chosen[bid] = (segment, p)
+    for bid, (segment, p) in chosen.items():
+        before = len(store.objects)
+        h = store.add_file(p)
+        stats["files"] += 1
+        stats["new_objects"] += len(store.objects) - before
+        entry = store.images.get(str(bid))
+        if entry is None or entry["hash"] != h:
+            stats["updated_ids"] += 1
+        store.images[str(bid)] = {"hash": h, "name": segment, "ext": p.suffix}
+    for bid in [b for b in store.images if int(b) not in chosen]:
+        del store.images[bid]
+        stats["dropped_ids"] += 1
+    stats["duplicates"] = len(store.images) - len({e["hash"] for e in store.images.values()})
+    return stats
+
+def names_from_json(store: ImageStore, json_path) -> int:
+    """Noms des vues depuis un JSON {"breeds": [{"id", "breed"}]} ; -> nb de noms changés."""
+    data = json.loads(Path(json_path).read_text(encoding="utf-8"))
+    changed = 0
+    for b in data.get("breeds", []):
+        entry = store.images.get(str(b.get("id")))
+        if entry is None or not b.get("breed"):
+            continue
+        seg = filename_segment(b["breed"])
+        if seg != entry["name"]:
+            entry["name"] = seg
+            changed += 1
+    return changed
+
+def export(store: ImageStore, dest) -> int:
+    """Copie les objets (une fois chacun) et l'index dans `dest`."""
+    dest = Path(dest)
+    for h in store.objects:
+        src = store.object_path(h)
+        out = dest / "objects" / src.parent.name / src.name
+        out.parent.mkdir(parents=True, exist_ok=True)
+        if not out.exists():
+            shutil.copy2(src, out)
+    shutil.copy2(store.root / INDEX_NAME, dest / INDEX_NAME)
+    return len(store.objects)
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    cmd = argv[0] if argv else "status"
+    store = ImageStore()
+
+    if cmd == "ingest":
+        s = ingest(store)
+        store.save()
+        print(f"✔ {s['files']} images, {s['new_objects']} nouveaux objets, {s['updated_ids']} ids mis à jour, "
+              f"{s['dropped_ids']} ids sans fichier retirés, {s['duplicates']} doublons partagés")
+    elif cmd == "names":
+        n = names_from_json(store, argv[1] if len(argv) > 1 else "breeds_links.json")
+        store.save()
+        print(f"✔ {n} noms de vues changés")
+    elif cmd == "shift":
+        lo, hi, delta = (int(x) for x in argv[1:4])
+        store.renumber({int(k): int(k) + delta for k in store.images if lo <= int(k) <= hi})
+        store.save()
+        print(f"✔ ids {lo}..{hi} décalés de {delta:+d}")
+    elif cmd == "export":
+        n = export(store, argv[1])
+        print(f"✔ {n} objets exportés → {argv[1]}")
+        return 0
+    elif cmd == "gc":
+        n = store.gc()
+        store.save()
+        print(f"✔ {n} objets supprimés")
+        return 0
+    elif cmd == "status":
+        total = sum(o["bytes"] for o in store.objects.values())
+        print(f"Magasin {STORE_DIR} : {len(store.images)} ids, {len(store.objects)} objets, {total / 1e6:.1f} Mo")
+        return 0
+    elif cmd != "materialize":
+        print(f"❌ commande inconnue : {cmd}")
+        return 2
+
+    s = materialize(store)
+    print(f"✔ Vues {IMAGES_DIR} : {s['created']} créées, {s['kept']} inchangées, {s['removed']} retirées, "
+          f"{s['protected']} protégées")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
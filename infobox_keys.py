@@ -0,0 +1,112 @@
+# infobox_keys.py
+"""
+Table d'alias multilingue des libellés d'infobox et format "long" des données scrapées.
+
+Format long (dog_breeds_long.csv), une ligne par champ d'infobox :
+    breed, url, raw_key, canonical_key, value
+canonical_key est vide quand le libellé n'est pas dans ALIASES. Une race sans infobox
+garde une ligne avec raw_key/value vides (pour conserver Nom + URL).
+"""
+import csv
+import re
+from collections import OrderedDict
+
+LONG_FILE = "dog_breeds_long.csv"
+LONG_FIELDS = ("breed", "url", "raw_key", "canonical_key", "value")
+
+# Libellé canonique -> libellés rencontrés (fr, en, cs, ...)
+ALIASES = {
+    "Nom": ["Nom", "Name"],
+    "Région": [
+        "Région", "Région d’origine", "Région d'origine",
+        "Origin", "Země původu", "Région d'élevage"
+    ],
+    "Taille": [
+        "Taille", "Height", "Výška*", "Hauteur"
+    ],
+    "Poids": [
+        "Poids", "Weight", "Hmotnost"
+    ],
+    "Robe": [
+        "Robe", "Color", "Colour", "Barva", "Coat", "Toison"
+    ],
+    "Poil": ["Poil", "Srst"],
+    "Tête": ["Tête", "Head"],
+    "Yeux": ["Yeux", "Eyes"],
+    "Oreilles": ["Oreilles", "Ears"],
+    "Queue": ["Queue", "Tail"],
+    "Caractère": ["Caractère", "Temperament", "Povaha"],
+    "Silhouette": ["Silhouette"],
+    "Utilisation": ["Utilisation", "Use", "Využití"],
+    "Autres noms": ["Autres noms", "Other names", "Jiné názvy"],
+    "Durée de vie": ["Durée de vie", "Life span", "Délka života"],
+    "Portée": ["Portée", "Litter size"],
+}
+
+def normalize_label(label: str) -> str:
+    s = (label or "").replace("’", "'").replace("*", "").strip(" :").casefold()
+    return re.sub(r"\s+", " ", s)
+
+# table compilée une fois : libellé normalisé -> libellé canonique
+_LOOKUP = {normalize_label(raw): canon for canon, raws in ALIASES.items() for raw in raws + [canon]}
+
+def canonical_key(raw_key: str) -> str:
+    return _LOOKUP.get(normalize_label(raw_key), "")
+
+# ---------- écriture / lecture du format long ----------
+class LongWriter:
+    """Écrit le format long au fil de l'eau (une race = un bloc de lignes contiguës)."""
+    def __init__(self, path=LONG_FILE):
+        self.f = open(path, "w", newline="", encoding="utf-8")
+        self.w = csv.writer(self.f)
+        self.w.writerow(LONG_FIELDS)
+
+    def write_breed(self, breed: str, url: str, pairs):
+        rows = [(breed, url, k, canonical_key(k), v) for k, v in pairs]
+        self.w.writerows(rows or [(breed, url, "", "", "")])
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def iter_long_breeds(path=LONG_FILE):
+    """Génère (breed, url, [(raw_key, canonical_key, value), ...]) par bloc de race."""
+    with open(path, newline="", encoding="utf-8") as f:
+        current, fields = None, []
+        for row in csv.DictReader(f):
+            key = (row["breed"], row["url"])
+            if key != current:
+                if current is not None:
+                    yield current[0], current[1], fields
+                current, fields = key, []
+            if row["raw_key"]:
+                fields.append((row["raw_key"], row["canonical_key"], row["value"]))
+        if current is not None:
+            yield current[0], current[1], fields
+
+def write_wide_csv(long_path=LONG_FILE, csv_path="dog_breeds_structured.csv"):
+    """
+    Vue large dérivée (Nom, URL, puis un libellé brut par colonne) : deux passes en flux,
+    la première pour l'union des libellés, la seconde pour les lignes.
+    """
+    columns = OrderedDict([("Nom", True), ("URL", True)])
+    for _, _, fields in iter_long_breeds(long_path):
+        for raw, _, _ in fields:
+            columns[raw] = True
+    n = 0
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(columns))
+        w.writeheader()
+        for breed, url, fields in iter_long_breeds(long_path):
+            row = {"Nom": breed, "URL": url}
+            for raw, _, value in fields:
+                row[raw] = value
+            w.writerow(row)
+            n += 1
+    return n
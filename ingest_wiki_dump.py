@@ -0,0 +1,358 @@
+# ingest_wiki_dump.py
+"""
+Ingestion hors ligne d'un dump Wikipedia (pages-articles XML, bz2 multistream) ou Wikidata (JSON),
+alternative au scraping HTML de scrape_wiki_dog_infobox.py.
+
+Sortie : même format que dog_breeds_structured.csv (Nom, URL, puis un champ par paramètre d'infobox).
+
+Exemples :
+    python ingest_wiki_dump.py --xml frwiki-latest-pages-articles-multistream.xml.bz2 \
+                               --index frwiki-latest-pages-articles-multistream-index.txt.bz2
+    python ingest_wiki_dump.py --wikidata latest-all.json.bz2 --lang fr
+
+Avec l'index multistream, chaque flux bz2 (~100 pages) est décompressé et analysé
+dans un processus séparé (--workers, défaut : nombre de cœurs).
+"""
+import argparse
+import bz2
+import csv
+import gzip
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from multiprocessing import Pool
+from pathlib import Path
+from urllib.parse import quote
+
+from stage_profile import StageProfiler
+
+OUTFILE = "dog_breeds_structured_dump.csv"   # ne pas écraser la sortie du scraping live
+LANG = "fr"
+STREAMS_PER_TASK = 8       # flux bz2 par tâche envoyée à un worker
+WIKIDATA_LINES_PER_TASK = 2000
+
+# Modèles d'infobox "race de chien" selon la langue (comparaison insensible à la casse, "_" = " ")
+INFOBOX_TEMPLATES = (
+    "infobox race canine", "infobox chien", "infobox race de chien",
+    "infobox dog breed", "infobox hunderasse", "infobox plemeno psa",
+)
+# Paramètres wikitext -> libellés de colonnes du CSV live (le reste garde le nom du paramètre)
+KEY_LABELS = {
+    "région": "Région", "région d'origine": "Région", "pays d'origine": "Région", "origine": "Région",
+    "origin": "Origin", "country": "Origin",
+    "taille": "Taille", "hauteur": "Taille", "height": "Height",
+    "poids": "Poids", "weight": "Weight",
+    "poil": "Poil", "coat": "Coat",
+    "robe": "Robe", "couleur": "Robe", "color": "Color", "colour": "Colour",
+    "tête": "Tête", "yeux": "Yeux", "oreilles": "Oreilles", "queue": "Queue",
+    "caractère": "Caractère", "silhouette": "Silhouette", "utilisation": "Utilisation",
+    "altnames": "Other names", "nickname": "Other names",
+}
+SKIP_PARAMS = {"nom", "name", "image", "légende", "legende", "caption", "image_caption", "taille image",
+               "image_size", "imagesize", "alt"}
+
+# Wikidata : race de chien, et classes dont on garde les libellés pour résoudre les QID
+WD_DOG_BREED = "Q39367"
+WD_LABEL_CLASSES = {"Q6256", "Q3624078", "Q1075"}   # pays, État souverain, couleur
+WD_PROPS = OrderedDict([("P495", "Région"), ("P2048", "Taille"), ("P2067", "Poids"), ("P462", "Robe")])
+
+# ---------- wikitext ----------
+RE_COMMENT = re.compile(r"<!--.*?-->", re.S)
+RE_REF = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S | re.I)
+RE_BR = re.compile(r"<br\s*/?>", re.I)
+RE_TAG = re.compile(r"</?[a-z][^>]*>", re.I)
+RE_LINK = re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]")
+RE_EXTLINK = re.compile(r"\[https?://\S+\s*([^\]]*)\]")
+RE_TEMPLATE = re.compile(r"\{\{([^{}]*)\}\}")
+
+def _inline_template(m):
+    # {{lang|en|texte}} -> texte, {{formatnum:12}} -> 12, {{unité|25|cm}} -> 25 cm
+    parts = [p.strip() for p in m.group(1).split("|")]
+    name = parts[0].lower()
+    if ":" in parts[0] and len(parts) == 1:
+        return parts[0].split(":", 1)[1]
+    args = [p for p in parts[1:] if "=" not in p]
+    if name in ("unité", "unite", "nobr", "nowrap") or name.startswith("convert"):
+        return " ".join(args[:2])
+    return args[-1] if args else ""
+
+def clean_wikitext(value: str) -> str:
+    value = RE_COMMENT.sub("", value)
+    value = RE_REF.sub("", value)
+    value = RE_BR.sub(", ", value)
+    for _ in range(4):   # modèles imbriqués : de l'intérieur vers l'extérieur
+        value, n = RE_TEMPLATE.subn(_inline_template, value)
+        if not n:
+            break
+    value = RE_LINK.sub(r"\1", value)
+    value = RE_EXTLINK.sub(r"\1", value)
+    value = RE_TAG.sub("", value)
+    value = value.replace("'''", "").replace("''", "").replace("&nbsp;", " ")
+    return re.sub(r"\s+", " ", value).strip(" ,;")
+
+def find_template(text: str, names=INFOBOX_TEMPLATES):
+    """Corps ("nom|p1=v1|...") du premier modèle dont le nom est dans `names`, None sinon."""
+    for m in re.finditer(r"\{\{\s*([^|{}]+?)\s*[|}]", text):
+        if m.group(1).lower().replace("_", " ").strip() not in names:
+            continue
+        depth, i = 0, m.start()
+        while i < len(text) - 1:
+            pair = text[i:i + 2]
+            if pair == "{{":
+                depth += 1
+                i += 2
+                continue
+            if pair == "}}":
+                depth -= 1
+                i += 2
+                if depth == 0:
+                    return text[m.start() + 2:i - 2]
+                continue
+            i += 1
+        return None
+    return None
+
+def split_params(body: str):
+    """Découpe au niveau 0 sur '|' (en ignorant ceux des modèles et liens imbriqués)."""
+    parts, buf, depth_t, depth_l, i = [], [], 0, 0, 0
+    while i < len(body):
+        two = body[i:i + 2]
+        if two in ("{{", "}}", "[[", "]]"):
+            depth_t += {"{{": 1, "}}": -1}.get(two, 0)
+            depth_l += {"[[": 1, "]]": -1}.get(two, 0)
+            buf.append(two)
+            i += 2
+            continue
+        c = body[i]
+        if c == "|" and depth_t == 0 and depth_l == 0:
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(c)
+        i += 1
+    parts.append("".join(buf))
+    return parts[1:]   # parts[0] = nom du modèle
+
+def infobox_fields(wikitext: str):
+    body = find_template(wikitext)
+    if body is None:
+        return None
+    fields = OrderedDict()
+    for p in split_params(body):
+        if "=" not in p:
+            continue
+        k, v = p.split("=", 1)
+        k = k.strip()
+        if not k or k.lower() in SKIP_PARAMS:
+            continue
+        v = clean_wikitext(v)
+        if not v:
+            continue
+        label = KEY_LABELS.get(k.lower(), k)
+        if label in fields and v not in fields[label]:
+            fields[label] += " ; " + v
+        else:
+            fields[label] = v
+    return fields
+
+def page_url(title: str, lang: str = LANG) -> str:
+    return f"https://{lang}.wikipedia.org/wiki/{quote(title.replace(' ', '_'))}"
+
+# ---------- dump XML ----------
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def rows_from_pages_xml(xml_bytes: bytes, lang: str):
+    """Pages (espace de noms 0, hors redirections) portant une infobox race de chien."""
+    root = ET.fromstring(b"<pages>" + xml_bytes + b"</pages>")
+    rows = []
+    for page in root:
+        if _local(page.tag) != "page":
+            continue
+        vals = {_local(c.tag): c for c in page}
+        if (vals.get("ns") is not None and vals["ns"].text != "0") or "redirect" in vals:
+            continue
+        rev = vals.get("revision")
+        text_el = next((c for c in rev if _local(c.tag) == "text"), None) if rev is not None else None
+        text = text_el.text if text_el is not None and text_el.text else ""
+        if "{{" not in text or not any(t.split()[-1] in text.lower() for t in INFOBOX_TEMPLATES):
+            continue
+        fields = infobox_fields(text)
+        if fields is None:
+            continue
+        title = vals["title"].text
+        rows.append(OrderedDict([("Nom", title), ("URL", page_url(title, lang))] + list(fields.items())))
+    return rows
+
+def read_stream_offsets(index_path: Path):
+    """Offsets (triés, uniques) des flux bz2 d'après l'index multistream (offset:page_id:titre)."""
+    opener = bz2.open if str(index_path).endswith(".bz2") else open
+    offsets, last = [], None
+    with opener(index_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            off = int(line.split(":", 1)[0])
+            if off != last:
+                offsets.append(off)
+                last = off
+    return offsets
+
+def _process_streams(task):
+    """Worker : lit et décompresse une suite de flux bz2 [start, end) puis extrait les lignes."""
+    path, ranges, lang = task
+    rows = []
+    with open(path, "rb") as f:
+        for start, end in ranges:
+            f.seek(start)
+            raw = f.read(end - start) if end is not None else f.read()
+            data = bz2.BZ2Decompressor().decompress(raw)
+            # le premier flux contient <mediawiki><siteinfo>... : on ne garde que les <page>
+            i, j = data.find(b"<page>"), data.rfind(b"</page>")
+            if i < 0 or j < 0:
+                continue
+            rows.extend(rows_from_pages_xml(data[i:j + len(b"</page>")], lang))
+    return rows
+
+def ingest_xml_multistream(xml_path: Path, index_path: Path, lang: str, workers: int):
+    offsets = read_stream_offsets(index_path)
+    bounds = list(zip(offsets, offsets[1:] + [None]))
+    tasks = [(str(xml_path), bounds[i:i + STREAMS_PER_TASK], lang)
+             for i in range(0, len(bounds), STREAMS_PER_TASK)]
+    print(f"   {len(bounds)} flux bz2, {len(tasks)} tâches, {workers} processus")
+    rows = []
+    with Pool(workers) as pool:
+        for part in pool.imap(_process_streams, tasks, chunksize=1):
+            rows.extend(part)
+    return rows
+
+def ingest_xml_single(xml_path: Path, lang: str):
+    """Sans index : lecture séquentielle (un seul processus) avec iterparse."""
+    opener = bz2.open if str(xml_path).endswith(".bz2") else open
+    rows = []
+    with opener(xml_path, "rb") as f:
+        for _, el in ET.iterparse(f, events=("end",)):
+            if _local(el.tag) != "page":
+                continue
+            rows.extend(rows_from_pages_xml(ET.tostring(el), lang))
+            el.clear()
+    return rows
+
+# ---------- dump Wikidata ----------
+WD_UNITS = {"Q174728": "cm", "Q11573": "m", "Q11570": "kg", "Q41803": "g", "1": ""}
+
+def _claim_values(entity: dict, prop: str):
+    out = []
+    for c in entity.get("claims", {}).get(prop, []):
+        v = c.get("mainsnak", {}).get("datavalue", {}).get("value")
+        if isinstance(v, dict) and "id" in v:
+            out.append(v["id"])
+        elif isinstance(v, dict) and "amount" in v:
+            unit = v.get("unit", "").rsplit("/", 1)[-1]
+            out.append(f"{v['amount'].lstrip('+')} {WD_UNITS.get(unit, unit)}".strip())
+    return out
+
+def _label(entity: dict, lang: str):
+    labels = entity.get("labels", {})
+    for l in (lang, "en"):
+        if l in labels:
+            return labels[l]["value"]
+    return None
+
+def _process_wikidata_lines(task):
+    """Worker : renvoie (races, libellés utiles) pour un lot de lignes du dump JSON."""
+    lines, lang = task
+    breeds, labels = [], {}
+    for line in lines:
+        line = line.strip().rstrip(",")
+        if not line.startswith("{"):
+            continue
+        if f'"{WD_DOG_BREED}"' not in line and not any(f'"{q}"' in line for q in WD_LABEL_CLASSES):
+            continue   # filtre textuel avant json.loads (la grande majorité des entités)
+        e = json.loads(line)
+        classes = set(_claim_values(e, "P31"))
+        if classes & WD_LABEL_CLASSES:
+            label = _label(e, lang)
+            if label:
+                labels[e["id"]] = label
+        if WD_DOG_BREED not in classes:
+            continue
+        sitelink = e.get("sitelinks", {}).get(f"{lang}wiki")
+        name = sitelink["title"] if sitelink else _label(e, lang)
+        if not name:
+            continue
+        fields = OrderedDict((label, _claim_values(e, p)) for p, label in WD_PROPS.items())
+        breeds.append({"Nom": name, "URL": page_url(name, lang) if sitelink else
+                       f"https://www.wikidata.org/wiki/{e['id']}", "fields": fields})
+    return breeds, labels
+
+def _batched_lines(f, n):
+    batch = []
+    for line in f:
+        batch.append(line)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def ingest_wikidata(path: Path, lang: str, workers: int):
+    opener = bz2.open if str(path).endswith(".bz2") else gzip.open if str(path).endswith(".gz") else open
+    breeds, labels = [], {}
+    with opener(path, "rt", encoding="utf-8") as f, Pool(workers) as pool:
+        tasks = ((batch, lang) for batch in _batched_lines(f, WIKIDATA_LINES_PER_TASK))
+        for b, l in pool.imap(_process_wikidata_lines, tasks, chunksize=1):
+            breeds.extend(b)
+            labels.update(l)
+    rows = []
+    for b in breeds:
+        row = OrderedDict([("Nom", b["Nom"]), ("URL", b["URL"])])
+        for label, values in b["fields"].items():
+            values = [labels.get(v, v) for v in values]
+            if values:
+                row[label] = ", ".join(values)
+        rows.append(row)
+    return rows
+
+# ---------- sortie ----------
+def write_csv(rows, path):
+    # union des clés, dans l'ordre d'apparition (comme le scraping live)
+    all_keys = OrderedDict()
+    for r in rows:
+        for k in r.keys():
+            all_keys[k] = True
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(all_keys.keys()))
+        w.writeheader()
+        for r in rows:
+            w.writerow(r)
+
+def main():
+    ap = argparse.ArgumentParser(description="Ingestion hors ligne d'un dump Wikipedia / Wikidata.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--xml", type=Path, help="pages-articles(-multistream).xml[.bz2]")
+    src.add_argument("--wikidata", type=Path, help="dump JSON Wikidata (.json, .json.bz2, .json.gz)")
+    ap.add_argument("--index", type=Path, help="index multistream (…-index.txt[.bz2]) pour le mode parallèle")
+    ap.add_argument("--lang", default=LANG, help="langue du wiki (URL, libellés Wikidata)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default=OUTFILE)
+    args, _ = ap.parse_known_args()
+
+    prof = StageProfiler("ingest_wiki_dump")
+    if args.wikidata:
+        rows = ingest_wikidata(args.wikidata, args.lang, args.workers)
+    elif args.index:
+        rows = ingest_xml_multistream(args.xml, args.index, args.lang, args.workers)
+    else:
+        print("⚠️  Pas d'index multistream : lecture séquentielle (un seul processus).")
+        rows = ingest_xml_single(args.xml, args.lang)
+    prof.lap("parse")
+
+    rows.sort(key=lambda r: r["Nom"].lower())
+    write_csv(rows, args.out)
+    prof.lap("write")
+    print(f"✔ {args.out} écrit ({len(rows)} races)")
+    prof.dump()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+# mediawiki_standin.py
+"""
+Serveur HTTP local qui imite Commons / Wikipedia / upload.wikimedia.org à partir de fixtures,
+pour exercer les scripts de scraping et d'images sans réseau.
+
+- fixtures enregistrées (dossier FIXTURES_DIR, cf. record_requests) ou synthétiques (build_synthetic_fixtures)
+- latence configurable, injection de 429/503 avec Retry-After, chaînes de redirections
+- requêtes conditionnelles : If-None-Match égal à l'ETag d'une fixture -> 304 sans corps
+- route_to_standin() détourne les requêtes `requests` vers le serveur local (Host d'origine conservé)
+"""
+import contextlib
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit
+
+FIXTURES_DIR = Path("fixtures/mediawiki")
+INDEX_FILE = "index.json"
+
+WIKI_HOSTS = ("commons.wikimedia.org", "upload.wikimedia.org", "wikipedia.org", "flagcdn.com")
+IGNORED_PARAMS = {"maxlag", "origin"}   # paramètres sans effet sur la réponse
+
+# ---------- clés de fixtures ----------
+def endpoint_kind(host: str, path: str) -> str:
+    if path.endswith("/api.php") or path.startswith("/api/rest_v1/"):
+        return "api"
+    if host.startswith("upload.") or host.endswith("flagcdn.com"):
+        return "image"
+    return "page"
+
+def fixture_key(host: str, path: str, query: str = "") -> str:
+    """Clé stable : hôte + chemin décodé + paramètres triés (hors IGNORED_PARAMS)."""
+    params = sorted((k, unquote(v)) for k, v in parse_qsl(query, keep_blank_values=True)
+                    if k not in IGNORED_PARAMS)
+    key = f"{host.lower()}{unquote(path)}"
+    if params:
+        key += "?" + urlencode(params)
+    return key
+
+def key_for_url(url: str, params: dict | None = None) -> str:
+    p = urlsplit(url)
+    query = p.query
+    if params:
+        query = "&".join(x for x in (query, urlencode(params)) if x)
+    return fixture_key(p.netloc, p.path, query)
+
+class FixtureStore:
+    """
+    Clé -> (status, headers, body) ; pour prop=info : revisions[hôte][titre] = lastrevid
+    et title_redirects[hôte][titre] = titre cible (redirects=1).
+    """
+    def __init__(self):
+        self.entries = {}
+        self.revisions = {}
+        self.title_redirects = {}
+
+    def add(self, url: str, body, content_type: str = "text/html; charset=utf-8",
+            status: int = 200, headers: dict | None = None, params: dict | None = None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        elif not isinstance(body, (bytes, bytearray)):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        h = {"Content-Type": content_type}
+        h.update(headers or {})
+        self.entries[key_for_url(url, params)] = (status, h, bytes(body))
+
+    def add_redirect(self, url: str, location: str, status: int = 301):
+        self.entries[key_for_url(url)] = (status, {"Location": location}, b"")
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def set_revision(self, host: str, title: str, revid: int):
+        self.revisions.setdefault(host.lower(), {})[title.replace("_", " ")] = revid
+
+    def set_title_redirect(self, host: str, title: str, target: str):
+        self.title_redirects.setdefault(host.lower(), {})[title.replace("_", " ")] = target.replace("_", " ")
+
+    def page_info(self, host: str, query: str):
+        """Réponse action=query&prop=info (formatversion=2) pour les titres demandés, None si hors sujet."""
+        params = dict(parse_qsl(query, keep_blank_values=True))
+        if params.get("prop") != "info" or "titles" not in params:
+            return None
+        revs = self.revisions.get(host.lower(), {})
+        redirects = self.title_redirects.get(host.lower(), {}) if params.get("redirects") else {}
+        pages, seen = [], []
+        for t in params["titles"].split("|"):
+            t = t.replace("_", " ")
+            if t in redirects:
+                seen.append({"from": t, "to": redirects[t]})
+                t = redirects[t]
+            if t in revs:
+                pages.append({"title": t, "lastrevid": revs[t]})
+            else:
+                pages.append({"title": t, "missing": True})
+        query_out = {"pages": pages}
+        if seen:
+            query_out["redirects"] = seen
+        return {"batchcomplete": True, "query": query_out}
+
+    @classmethod
+    def load(cls, directory: Path = FIXTURES_DIR) -> "FixtureStore":
+        store = cls()
+        index = json.loads((Path(directory) / INDEX_FILE).read_text(encoding="utf-8"))
+        for e in index.get("entries", []):
+            body = (Path(directory) / e["file"]).read_bytes() if e.get("file") else b""
+            store.entries[e["key"]] = (e.get("status", 200), e.get("headers", {}), body)
+        store.revisions = index.get("revisions", {})
+        store.title_redirects = index.get("title_redirects", {})
+        return store
+
+    def save(self, directory: Path = FIXTURES_DIR):
+        directory = Path(directory)
+        (directory / "bodies").mkdir(parents=True, exist_ok=True)
+        entries = []
+        for i, (key, (status, headers, body)) in enumerate(sorted(self.entries.items())):
+            fname = f"bodies/{i:05d}.bin" if body else ""
+            if body:
+                (directory / fname).write_bytes(body)
+            entries.append({"key": key, "status": status, "headers": headers, "file": fname})
+        (directory / INDEX_FILE).write_text(
+            json.dumps({"entries": entries, "revisions": self.revisions, "title_redirects": self.title_redirects},
+                       ensure_ascii=False, indent=2),
+            encoding="utf-8")
+
+# ---------- fixtures synthétiques ----------
+def make_png(width: int, height: int, rng: random.Random) -> bytes:
+    """PNG RGB valide (bruit aléatoire, donc peu compressible) sans dépendance."""
+    raw = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b"")
+
+def _article_html(title: str, file_name: str, rng: random.Random, revid: int = 0) -> str:
+    rows = [
+        ("Région d'origine", rng.choice(["France", "Allemagne", "Hongrie", "Japon", "Écosse"])),
+        ("Taille", f"{rng.randint(20, 60)} à {rng.randint(61, 80)} cm"),
+        ("Poids", f"{rng.randint(5, 30)} à {rng.randint(31, 60)} kg"),
+        ("Robe", rng.choice(["noir et feu", "fauve", "blanc et orange", "bringé"])),
+    ]
+    trs = "".join(f"<tr><th>{k}</th><td>{v}<sup>[1]</sup></td></tr>" for k, v in rows)
+    img = (f'<tr><td colspan="2"><a href="/wiki/Fichier:{quote(file_name)}">'
+           f'<img src="//upload.wikimedia.org/wikipedia/commons/thumb/a/ab/{quote(file_name)}/250px-{quote(file_name)}">'
+           f'</a></td></tr>')
+    body = "".join(f"<p>Paragraphe {i} sur le {title}.</p>" for i in range(40))
+    nav = "".join(f'<li><a href="/wiki/Portail_{i}">Portail {i}</a></li>' for i in range(60))
+    rlconf = json.dumps({"wgPageName": title.replace(" ", "_"), "wgRevisionId": revid})
+    return (f"<html><head><title>{title}</title><script>RLCONF={rlconf};</script></head><body><ul>{nav}</ul>"
+            f'<table class="infobox_v2"><tr><th colspan="2">{title}</th></tr>{img}{trs}</table>'
+            f"{body}</body></html>")
+
+def build_synthetic_fixtures(n: int = 50, seed: int = 7, image_size=(256, 192),
+                             redirect_ratio: float = 0.1, redirect_hops: int = 2,
+                             commons_ratio: float = 0.3) -> tuple[FixtureStore, list]:
+    """
+    Construit Commons List_of_dog_breeds + n articles fr.wikipedia + réponses api.php + images.
+    Retourne (store, breeds) où breeds = [{"id","breed","url"}] pointe sur les articles.
+    """
+    rng = random.Random(seed)
+    store = FixtureStore()
+    wp = "https://fr.wikipedia.org"
+    commons = "https://commons.wikimedia.org"
+    breeds, list_rows = [], []
+    for i in range(1, n + 1):
+        name = f"Chien {i:04d} de Bohême"
+        title = name.replace(" ", "_")
+        file_name = f"Chien_{i:04d}.png"
+        article = f"{wp}/wiki/{quote(title)}"
+        image_url = f"https://upload.wikimedia.org/wikipedia/commons/a/ab/{quote(file_name)}"
+
+        revid = 100000 + i
+        html = _article_html(name, file_name, rng, revid)
+        store.add(article, html)
+        # action=parse&section=0 : infobox + premier paragraphe seulement
+        lead = html[html.index('<table class="infobox_v2"'):html.index("</table>") + len("</table>")]
+        lead = f'<div class="mw-parser-output">{lead}<p>Paragraphe 0 sur le {name}.</p></div>'
+        parse = {"action": "parse", "page": title, "prop": "text|revid", "section": 0, "redirects": 1,
+                 "disableeditsection": 1, "disabletoc": 1, "format": "json", "formatversion": 2}
+        store.add(f"{wp}/w/api.php", {"parse": {"title": name, "revid": revid, "text": lead}}, params=parse)
+        store.set_revision("fr.wikipedia.org", name, revid)
+        # lien de la colonne "Local names" : article direct, catégorie Commons, ou redirection en chaîne
+        r = rng.random()
+        if r < commons_ratio:
+            cat = f"{commons}/wiki/Category:{quote(title)}"
+            store.add(cat, f'<html><body><div id="sidebar"><a href="{article}">Wikipédia</a></div></body></html>')
+            local = cat
+        elif r < commons_ratio + redirect_ratio:
+            hops = [f"{wp}/wiki/{quote(title)}_(ancien_{h})" for h in range(redirect_hops)]
+            for a, b in zip(hops, hops[1:] + [article]):
+                store.add_redirect(a, b)
+            for h in range(redirect_hops):
+                store.set_title_redirect("fr.wikipedia.org", f"{title}_(ancien_{h})", name)
+            local = hops[0]
+        else:
+            local = article
+        list_rows.append(f'<tr><td>{name}</td><td></td><td><a href="{local}">{name}</a></td></tr>')
+        breeds.append({"id": i, "breed": name, "url": article})
+
+        # api.php : pageimages (deux variantes de paramètres utilisées par les scripts) + imageinfo
+        page = {"title": name, "original": {"source": image_url},
+                "thumbnail": {"source": image_url.replace("/a/ab/", "/thumb/a/ab/") + f"/1000px-{quote(file_name)}"}}
+        for thumb in (1000, 1200):
+            for prop in ("pageimages", "pageimages|imageinfo"):
+                params = {"action": "query", "format": "json", "formatversion": 2, "titles": title,
+                          "prop": prop, "piprop": "original|thumbnail", "pithumbsize": thumb}
+                store.add(f"{wp}/w/api.php", {"query": {"pages": [page]}}, params=params)
+        ii = {"action": "query", "format": "json", "formatversion": 2, "titles": f"File:{file_name}",
+              "prop": "imageinfo", "iiprop": "url|size|mime", "iiurlwidth": 1200}
+        store.add(f"{wp}/w/api.php", {"query": {"pages": [{"title": f"File:{file_name}", "imageinfo": [
+            {"url": image_url, "mime": "image/png", "width": image_size[0], "height": image_size[1]}]}]}},
+            params=ii)
+        store.add(image_url, make_png(*image_size, rng), content_type="image/png")
+
+    table = ('<table class="wikitable"><tr><th>Name</th><th>Image</th><th>Local names</th></tr>'
+             + "".join(list_rows) + "</table>")
+    store.add(f"{commons}/wiki/List_of_dog_breeds?uselang=fr", f"<html><body>{table}</body></html>")
+    return store, breeds
+
+def build_flag_fixtures(urls, seed: int = 7, store: FixtureStore | None = None,
+                        default_size=(64, 48)) -> FixtureStore:
+    """
+    Drapeaux flagcdn.com : PNG aléatoire à la taille du chemin (/32x24/fr.png, /w80/fr.png)
+    ou SVG minimal pour les URL .svg ; un ETag par fixture pour les requêtes conditionnelles.
+    """
+    rng = random.Random(seed)
+    store = store or FixtureStore()
+    for url in urls:
+        path = urlsplit(url).path
+        etag = {"ETag": f'"{zlib.crc32(url.encode("utf-8")):08x}"'}
+        if path.lower().endswith(".svg"):
+            w, h = default_size
+            fill = "#%06x" % rng.randrange(0x1000000)
+            svg = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">'
+                   f'<rect width="{w}" height="{h}" fill="{fill}"/></svg>')
+            store.add(url, svg, content_type="image/svg+xml", headers=etag)
+            continue
+        size = path.strip("/").split("/")[0]
+        if "x" in size and size.replace("x", "").isdigit():
+            w, h = (int(v) for v in size.split("x"))
+        elif size[:1] == "w" and size[1:].isdigit():
+            w = int(size[1:])
+            h = w * default_size[1] // default_size[0]
+        else:
+            w, h = default_size
+        store.add(url, make_png(w, h, rng), content_type="image/png", headers=etag)
+    return store
+
+# ---------- serveur ----------
+class StandinConfig:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_statuses=(429, 503), retry_after: float = 1, seed: int = 0):
+        self.latency = latency          # secondes ajoutées à chaque réponse
+        self.jitter = jitter            # +/- aléatoire sur la latence
+        self.error_rate = error_rate    # probabilité de répondre 429/503
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after  # valeur de l'en-tête Retry-After (s)
+        self.rng = random.Random(seed)
+
+class StandinStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {"page": 0, "api": 0, "image": 0}
+        self.bytes = {"page": 0, "api": 0, "image": 0}
+        self.injected_errors = 0
+        self.not_found = 0
+        self.redirects = 0
+        self.not_modified = 0
+
+    def add(self, kind: str, nbytes: int, status: int):
+        with self.lock:
+            self.requests[kind] += 1
+            self.bytes[kind] += nbytes
+            if status in (429, 503):
+                self.injected_errors += 1
+            elif status == 404:
+                self.not_found += 1
+            elif status == 304:
+                self.not_modified += 1
+            elif 300 <= status < 400:
+                self.redirects += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"requests": dict(self.requests), "bytes": dict(self.bytes),
+                    "injected_errors": self.injected_errors, "not_found": self.not_found,
+                    "redirects": self.redirects, "not_modified": self.not_modified}
+
+def _etag_matches(request_headers, headers: dict) -> bool:
+    etag = headers.get("ETag")
+    wanted = request_headers.get("If-None-Match")
+    if not etag or not wanted:
+        return False
+    return wanted.strip() == "*" or etag in (t.strip() for t in wanted.split(","))
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MediaWikiStandin/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _serve(self, send_body: bool = True):
+        srv = self.server
+        cfg = srv.config
+        host = (self.headers.get("Host") or "").split(":")[0]
+        p = urlsplit(self.path)
+        kind = endpoint_kind(host, p.path)
+        if self.command == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            form = self.rfile.read(length).decode("utf-8") if length else ""
+            query = "&".join(x for x in (p.query, form) if x)
+        else:
+            query = p.query
+
+        if cfg.latency or cfg.jitter:
+            time.sleep(max(0.0, cfg.latency + cfg.rng.uniform(-cfg.jitter, cfg.jitter)))
+
+        if cfg.error_rate and cfg.rng.random() < cfg.error_rate:
+            status = cfg.rng.choice(cfg.error_statuses)
+            headers, body = {"Retry-After": f"{cfg.retry_after:g}", "Content-Type": "text/plain"}, b"throttled"
+        else:
+            hit = srv.store.get(fixture_key(host, p.path, query))
+            info = srv.store.page_info(host, query) if hit is None and kind == "api" else None
+            if info is not None:
+                hit = (200, {"Content-Type": "application/json"}, json.dumps(info).encode("utf-8"))
+            if hit is None and kind == "api":
+                # api.php sans fixture : réponse vide mais valide
+                hit = (200, {"Content-Type": "application/json"}, b'{"batchcomplete":true,"query":{"pages":[]}}')
+            status, headers, body = hit if hit else (404, {"Content-Type": "text/plain"}, b"not found")
+            if status == 200 and self.command in ("GET", "HEAD") and _etag_matches(self.headers, headers):
+                status, headers, body = 304, {"ETag": headers["ETag"]}, b""
+
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+        srv.stats.add(kind, len(body) if send_body else 0, status)
+
+    def do_GET(self):
+        self._serve()
+
+    def do_POST(self):
+        self._serve()
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+class StandinServer:
+    """Serveur de fixtures dans un thread ; utilisable comme gestionnaire de contexte."""
+    def __init__(self, store: FixtureStore, config: StandinConfig | None = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.store = store
+        self.httpd.config = config or StandinConfig()
+        self.httpd.stats = StandinStats()
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> StandinStats:
+        return self.httpd.stats
+
+    @property
+    def config(self) -> StandinConfig:
+        return self.httpd.config
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+# ---------- côté client (requests) ----------
+def _is_wiki_host(host: str) -> bool:
+    return any(host == h or host.endswith("." + h) for h in WIKI_HOSTS)
+
+@contextlib.contextmanager
+def route_to_standin(base_url: str):
+    """
+    Détourne les requêtes `requests` vers les hôtes Wikimedia sur le serveur local.
+    L'URL publique est conservée dans response.url (les scripts testent le domaine).
+    """
+    from requests.adapters import HTTPAdapter
+
+    original_send = HTTPAdapter.send
+    local = urlsplit(base_url)
+
+    def send(self, request, *args, **kwargs):
+        p = urlsplit(request.url)
+        if not _is_wiki_host(p.hostname or ""):
+            return original_send(self, request, *args, **kwargs)
+        public_url = request.url
+        request.url = f"{local.scheme}://{local.netloc}{p.path}" + (f"?{p.query}" if p.query else "")
+        request.headers["Host"] = p.netloc
+        resp = original_send(self, request, *args, **kwargs)
+        request.url = public_url
+        resp.url = public_url
+        return resp
+
+    HTTPAdapter.send = send
+    try:
+        yield
+    finally:
+        HTTPAdapter.send = original_send
+
+@contextlib.contextmanager
+def record_requests(directory: Path = FIXTURES_DIR):
+    """Enregistre les réponses réelles des hôtes Wikimedia en fixtures pendant une exécution."""
+    from requests.adapters import HTTPAdapter
+
+    original_send = HTTPAdapter.send
+    store = FixtureStore.load(directory) if (Path(directory) / INDEX_FILE).exists() else FixtureStore()
+
+    def send(self, request, *args, **kwargs):
+        resp = original_send(self, request, *args, **kwargs)
+        p = urlsplit(request.url)
+        if _is_wiki_host(p.hostname or ""):
+            query = p.query
+            if request.method == "POST" and isinstance(request.body, (str, bytes)):
+                form = request.body.decode("utf-8") if isinstance(request.body, bytes) else request.body
+                query = "&".join(x for x in (query, form) if x)
+            headers = {k: v for k, v in resp.headers.items()
+                       if k.lower() in ("content-type", "location", "retry-after")}
+            store.entries[fixture_key(p.netloc, p.path, query)] = (resp.status_code, headers, resp.content)
+        return resp
+
+    HTTPAdapter.send = send
+    try:
+        yield store
+    finally:
+        HTTPAdapter.send = original_send
+        store.save(directory)
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Serveur MediaWiki local (fixtures).")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--fixtures", default=None, help="dossier de fixtures enregistrées (sinon synthétiques)")
+    ap.add_argument("--synthetic", type=int, default=50, help="nombre de races synthétiques")
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=float, default=1)
+    args = ap.parse_args()
+
+    store = FixtureStore.load(Path(args.fixtures)) if args.fixtures else build_synthetic_fixtures(args.synthetic)[0]
+    cfg = StandinConfig(args.latency, args.jitter, args.error_rate, retry_after=args.retry_after)
+    srv = StandinServer(store, cfg, port=args.port)
+    print(f"✔ Stand-in MediaWiki sur {srv.base_url} ({len(store.entries)} fixtures)")
+    try:
+        srv.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.httpd.server_close()
+        print(json.dumps(srv.stats.snapshot(), indent=2))
+
+if __name__ == "__main__":
+    main()
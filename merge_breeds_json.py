@@ -3,6 +3,9 @@ import json
 import unicodedata
 from pathlib import Path
 
+from breed_ids import IdRegistry, assign_sort_rank
+from stage_profile import StageProfiler
+
 IN1 = "breeds_clean_post.json"
 IN2 = "breeds_incomplete_subset.json"
 OUT = "breeds_merged.json"
@@ -38,9 +41,12 @@ def load_breeds(path):
     return data.get("breeds", [])
 
 def main():
+    prof = StageProfiler("merge_breeds_json")
     a = load_breeds(IN1)  # fichier clean complet
     b = load_breeds(IN2)  # corrections/incomplets prioritaire
 
+    prof.lap("load")
+
     merged = {}
 
     def add_or_merge(item, source_name):
@@ -50,7 +56,7 @@ def main():
 
         if key not in merged:
             merged[key] = {
-                "id": 0,
+                "id": item.get("id", 0),   # amorce du registre d'ids au premier passage
                 "breed": name_cap,
                 "features": {
                     "origin": item.get("features", {}).get("origin", ""),
@@ -94,18 +100,24 @@ def main():
     for it in b:
         add_or_merge(it, "incomplete_subset")
 
-    # tri alphabétique + réattribution des id
+    prof.lap("merge")
+
+    # ids stables (registre ; les nouvelles races prennent un id en fin) + tri alphabétique
     items = list(merged.values())
-    items.sort(key=lambda x: norm_key(x.get("breed", "")))
-    for i, it in enumerate(items, 1):
-        it["id"] = i
+    registry = IdRegistry.load()
+    registry.assign(items)
+    assign_sort_rank(items)
 
     Path(OUT).write_text(json.dumps({"breeds": items}, ensure_ascii=False, indent=2), encoding="utf-8")
+    registry.save()
+    prof.lap("write")
 
     print(f"\n✔ Fusion terminée : {OUT}")
     print(f"  - Entrées fichier 1 : {len(a)}")
     print(f"  - Entrées fichier 2 : {len(b)}")
     print(f"  - Total fusionné    : {len(items)}")
+    print(f"  - Nouveaux IDs      : {len(registry.allocated)}")
+    prof.dump()
 
 if __name__ == "__main__":
     main()
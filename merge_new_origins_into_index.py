@@ -4,6 +4,8 @@ import re
 import unicodedata
 from pathlib import Path
 
+from stage_profile import StageProfiler
+
 INDEX_FILE = "origins_index.json"                   # existant: {"origins":[{"id":..,"name":"..","image":"..?"}, ...]}
 NEW_FILE   = "new_origins_missing_from_index.json"  # nouveaux: {"origins":[{"name":"..","flagUrl":"..?"}, ...]}
 OUT_FILE   = "origins_index_updated.json"
@@ -20,12 +22,15 @@ def norm_key(s: str) -> str:
     return s
 
 def main():
+    prof = StageProfiler("merge_new_origins_into_index")
     # charge fichiers
     idx_data = json.loads(Path(INDEX_FILE).read_text(encoding="utf-8"))
     new_data = json.loads(Path(NEW_FILE).read_text(encoding="utf-8"))
     idx_list = idx_data.get("origins", [])
     new_list = new_data.get("origins", [])
 
+    prof.lap("load")
+
     # index existant par clé normalisée
     by_key = {}
     kept_existing = 0
@@ -42,6 +47,8 @@ def main():
             }
             kept_existing += 1
 
+    prof.lap("index")
+
     # intégrer les nouveaux (flagUrl -> image)
     added = 0
     updated_image = 0
@@ -71,8 +78,11 @@ def main():
     for i, it in enumerate(items, start=1):
         it["id"] = i
 
+    prof.lap("merge")
+
     # sortie
     Path(OUT_FILE).write_text(json.dumps({"origins": items}, ensure_ascii=False, indent=2), encoding="utf-8")
+    prof.lap("write")
 
     # rapport
     report = {
@@ -84,6 +94,7 @@ def main():
         "output_count": len(items),
         "output_file": OUT_FILE
     }
+    prof.attach(report)
     Path(REPORT).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
 
     # console
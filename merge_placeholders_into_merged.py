@@ -3,6 +3,9 @@ import json, re, unicodedata
 from pathlib import Path
 from typing import Any, Dict, List
 
+from breeds_schema import write_breeds
+from stage_profile import StageProfiler
+
 MAIN_FILE   = "breeds_merged_with_global_ids.json"   # principal (prioritaire)
 GAPS_FILE   = "breeds_placeholders_for_gaps.json"    # ajouts / compléments
 OUT_FILE    = "breeds_merged_final.json"
@@ -69,9 +72,11 @@ def normalize_entry(e: Dict[str, Any]) -> Dict[str, Any]:
     return x
 
 def main():
+    prof = StageProfiler("merge_placeholders_into_merged")
     main_data = json.loads(Path(MAIN_FILE).read_text(encoding="utf-8")).get("breeds", [])
     gaps_data = json.loads(Path(GAPS_FILE).read_text(encoding="utf-8")).get("breeds", [])
 
+    prof.lap("load")
     main_norm = [normalize_entry(b) for b in main_data]
     gaps_norm = [normalize_entry(b) for b in gaps_data]
 
@@ -82,6 +87,7 @@ def main():
         if bid is None:
             continue
         by_id[bid] = b
+    prof.lap("index")
 
     added = 0
     fused = 0
@@ -123,9 +129,12 @@ def main():
         by_id[gid] = base
         fused += 1
 
+    prof.lap("merge")
+
     # sortie triée par id
     out_list = [by_id[k] for k in sorted(by_id.keys())]
-    Path(OUT_FILE).write_text(json.dumps({"breeds": out_list}, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_breeds(OUT_FILE, out_list)
+    prof.lap("write")
 
     # rapport
     report = {
@@ -135,6 +144,7 @@ def main():
         "name_conflicts_examples": name_conflicts[:20],
         "output": OUT_FILE
     }
+    prof.attach(report)
     Path(REPORT_FILE).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
 
     print(f"✔ Fusion effectuée → {OUT_FILE}")
@@ -3,6 +3,9 @@ import json, re, unicodedata
 from pathlib import Path
 from typing import Any, List, Dict
 
+from breeds_schema import write_breeds
+from stage_profile import StageProfiler
+
 RECENT_FILE = "breeds_with_origin_list_and_type_updated.json"
 INCOMPLETE_FILE = "breeds_remaining_incomplete_structured.json"
 OUT_FILE = "breeds_merged.json"
@@ -61,12 +64,15 @@ def key_for(e: Dict[str, Any]) -> str:
     return f"name:{norm_key(e.get('breed',''))}"
 
 def main():
+    prof = StageProfiler("merge_two_breed_jsons")
     recent = json.loads(Path(RECENT_FILE).read_text(encoding="utf-8")).get("breeds", [])
     incom = json.loads(Path(INCOMPLETE_FILE).read_text(encoding="utf-8")).get("breeds", [])
 
     recent = [normalize_entry(x) for x in recent]
     incom  = [normalize_entry(x) for x in incom]
 
+    prof.lap("load")
+
     merged: Dict[str, Dict[str, Any]] = {}
 
     # 1) Injecte le "récent" (prioritaire)
@@ -99,15 +105,19 @@ def main():
         base["features"] = bf
         merged[k] = base
 
+    prof.lap("merge")
+
     # 3) Tri & sortie
     items = list(merged.values())
     items.sort(key=lambda x: (9999999 if x.get("id") is None else int(x["id"]), norm_key(x.get("breed",""))))
 
-    Path(OUT_FILE).write_text(json.dumps({"breeds": items}, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_breeds(OUT_FILE, items)
+    prof.lap("write")
     print(f"✔ Fusion effectuée → {OUT_FILE}")
     print(f"   - entrées 'récent' : {len(recent)}")
     print(f"   - entrées 'incomplet' : {len(incom)}")
     print(f"   - total fusionné : {len(items)}")
+    prof.dump()
 
 if __name__ == "__main__":
     main()
@@ -5,6 +5,9 @@ import unicodedata
 from pathlib import Path
 from typing import List, Dict
 
+from breeds_schema import write_breeds
+from stage_profile import StageProfiler
+
 IN_BREEDS  = "breeds_with_global_ids_extended.json"
 IN_ORIGINS = "origins_index.json"
 OUT_FILE   = "breeds_with_origin_list_and_type.json"
@@ -44,6 +47,7 @@ def split_candidates(raw: str) -> List[str]:
 
 # ---------- main ----------
 def main():
+    prof = StageProfiler("normalize_origins_and_add_type")
     # 1) charge index des origines (canon)
     origins_data = json.loads(Path(IN_ORIGINS).read_text(encoding="utf-8"))
     # map clé normalisée -> libellé canonique
@@ -53,10 +57,12 @@ def main():
         if isinstance(o.get("name"), str) and o["name"].strip()
     }
     allowed_keys = set(origin_map.keys())
+    prof.lap("load_origins")
 
     # 2) charge breeds
     data = json.loads(Path(IN_BREEDS).read_text(encoding="utf-8"))
     breeds = data.get("breeds", [])
+    prof.lap("load_breeds")
 
     changed = 0
     for it in breeds:
@@ -92,9 +98,12 @@ def main():
         it["features"] = feats
         changed += 1
 
+    prof.lap("normalize")
+
     # 3) écrit la sortie
-    out = {"breeds": breeds}
-    Path(OUT_FILE).write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_breeds(OUT_FILE, breeds)
+    prof.lap("write")
+    prof.dump()
 
     print(f"✔ {OUT_FILE} écrit. Races traitées: {changed}")
     # petit aperçu
@@ -3,17 +3,22 @@ import json
 import csv
 import os
 import re
-import time
 import math
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from pathlib import Path
 from urllib.parse import urlparse, unquote, urljoin
-import requests
-from bs4 import BeautifulSoup
+
+import wiki_http
+from html_pool import ParsePool
+from http_metrics import METRICS
+from image_phash import placeholder_match_bytes
+from infobox_keys import LONG_FILE, iter_long_breeds
+from stage_profile import StageProfiler
 
 # ---------- Config ----------
 BREEDS_JSON = "breeds_links.json"         # format: {"breeds":[{"id":1,"breed":"Affenpinscher","url":"https://..."}, ...]}
-BREEDS_CSV  = "dog_breeds_structured.csv" # fallback si pas de JSON (colonnes: Nom,URL)
+BREEDS_CSV  = "dog_breeds_structured.csv" # fallback si ni JSON ni format long (colonnes: Nom,URL)
 OUT_DIR     = Path("images")
 REPORT_FILE = "download_report.json"
 
@@ -21,15 +26,16 @@ USER_AGENT   = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                 "AppleWebKit/537.36 (KHTML, like Gecko) "
                 "Chrome/124.0 Safari/537.36 furious-scraper/1.1 +https://example.com")
 TIMEOUT      = 25
-MAX_RETRIES  = 2
-PAUSE_SECONDS = 1.0
+MAX_RETRIES  = 4
+PAUSE_SECONDS = 1.0   # intervalle min. entre requêtes vers un même hôte (tous threads)
+FETCH_WORKERS = wiki_http.CONCURRENCY   # races traitées en parallèle (threads)
 THUMB_SIZE    = 1200  # largeur souhaitée pour les vignettes (SVG surtout)
 
 OVERWRITE     = True  # remplace les fichiers si déjà présents
 
 # ---------- Session ----------
-session = requests.Session()
-session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "fr,en;q=0.8"})
+session = wiki_http.lazy_session({"User-Agent": USER_AGENT, "Accept-Language": "fr,en;q=0.8"})
+parse_pool = ParsePool()   # analyse HTML dans des processus séparés
 
 # ---------- Utils ----------
 def norm_name_for_filename(name: str) -> str:
@@ -37,20 +43,8 @@ def norm_name_for_filename(name: str) -> str:
     s = re.sub(r"\s+", "_", s.strip())
     return s or "breed"
 
-def polite_sleep():
-    time.sleep(PAUSE_SECONDS)
-
 def safe_request(method, url, **kwargs):
-    last = None
-    for attempt in range(MAX_RETRIES + 1):
-        try:
-            r = session.request(method, url, timeout=TIMEOUT, **kwargs)
-            r.raise_for_status()
-            return r
-        except Exception as e:
-            last = e
-            polite_sleep()
-    raise last
+    return wiki_http.request(session, method, url, timeout=TIMEOUT, retries=MAX_RETRIES, **kwargs)
 
 def api_endpoint(page_url: str) -> str:
     p = urlparse(page_url)
@@ -111,7 +105,12 @@ def find_file_page_from_html(page_url: str) -> str | None:
         r = safe_request("GET", page_url)
     except Exception:
         return None
-    soup = BeautifulSoup(r.text, "html.parser")
+    return parse_pool.run(file_link_from_html, r.text, page_url)
+
+def file_link_from_html(html: str, page_url: str) -> str | None:
+    """Partie CPU de find_file_page_from_html (exécutée dans le pool de processus)."""
+    from bs4 import BeautifulSoup   # import paresseux : bs4 n'est chargé que pour analyser
+    soup = BeautifulSoup(html, "html.parser")
     # Cherche d'abord dans l'infobox
     infobox = None
     for t in soup.find_all("table"):
@@ -196,6 +195,9 @@ def download_to_jpg(img_url: str, dest_path: Path) -> tuple[bool, str]:
         except ImportError:
             return False, "Pillow not installed (pip install pillow)"
 
+        label = placeholder_match_bytes(content)
+        if label:
+            return False, f"placeholder:{label}"
         im = Image.open(BytesIO(content))
         # Convertir en RGB si besoin (PNG avec alpha, etc.)
         if im.mode in ("RGBA", "LA"):
@@ -206,7 +208,10 @@ def download_to_jpg(img_url: str, dest_path: Path) -> tuple[bool, str]:
             im = im.convert("RGB")
 
         dest_path.parent.mkdir(parents=True, exist_ok=True)
-        im.save(dest_path, format="JPEG", quality=90, optimize=True)
+        # remplacement (pas d'écriture en place) : une vue liée au magasin d'images n'est pas modifiée
+        part = dest_path.with_name(f".part_{dest_path.name}")
+        im.save(part, format="JPEG", quality=90, optimize=True)
+        os.replace(part, dest_path)
         return True, str(dest_path)
     except Exception as e:
         return False, f"download/convert-error:{e}"
@@ -217,6 +222,14 @@ def load_breeds():
         data = json.loads(Path(BREEDS_JSON).read_text(encoding="utf-8"))
         return [{"id": b.get("id"), "breed": b.get("breed"), "url": b.get("url")} for b in data.get("breeds", [])]
 
+    # format long d'abord : c'est ce qu'écrit le scraper (la vue large n'est produite qu'avec --wide)
+    if Path(LONG_FILE).exists():
+        items = [{"id": None, "breed": b, "url": u} for b, u, _ in iter_long_breeds(LONG_FILE)]
+        items.sort(key=lambda x: x["breed"].casefold())
+        for i, it in enumerate(items, 1):
+            it["id"] = i
+        return items
+
     if Path(BREEDS_CSV).exists():
         items = []
         with open(BREEDS_CSV, newline="", encoding="utf-8") as f:
@@ -232,7 +245,7 @@ def load_breeds():
             it["id"] = i
         return items
 
-    raise SystemExit("Aucune source trouvée (breeds_links.json ou dog_breeds_structured.csv).")
+    raise SystemExit("Aucune source trouvée (breeds_links.json, dog_breeds_structured.csv ou dog_breeds_long.csv).")
 
 # ---------- Main ----------
 def main():
@@ -242,14 +255,17 @@ def main():
         print("⚠️  Ce script convertit en JPEG. Installe Pillow avant:  pip install pillow")
         return
 
+    METRICS.serve_from_env()
+    wiki_http.set_min_interval(PAUSE_SECONDS)
+    prof = StageProfiler("redownload_images_follow_file_link")
     breeds = load_breeds()
+    prof.lap("load")
     OUT_DIR.mkdir(parents=True, exist_ok=True)
-    report = []
 
     total = len(breeds)
     print(f"Lancement: {total} races. Pause={PAUSE_SECONDS}s, thumb={THUMB_SIZE}px")
 
-    for idx, item in enumerate(breeds, 1):
+    def process(idx, item):
         bid   = item.get("id") or idx
         breed = (item.get("breed") or f"breed_{idx}").strip()
         url   = (item.get("url") or "").strip()
@@ -262,29 +278,24 @@ def main():
             # overwrite si demandé
             if dest.exists() and not OVERWRITE:
                 res["status"] = "skipped-exists"
-                report.append(res)
                 print(f"[{idx}/{total}] {breed} -> SKIP (existe)")
-                continue
+                return res
 
             # 1) API page
             img_url, note = fetch_image_via_page_api(url) if url else (None, "no-url")
-            polite_sleep()
 
             # 2) fallback: HTML -> lien Fichier: -> API file
             if not img_url:
                 fpage = find_file_page_from_html(url) if url else None
-                polite_sleep()
                 if fpage:
                     img_url, note2 = fetch_image_from_file_api(fpage)
                     note = f"{note} ; {note2}"
-                    polite_sleep()
 
             if not img_url or is_bad_placeholder(img_url):
                 res["status"] = "failed"
                 res["note"] = f"no-valid-image ({note})"
                 print(f"[{idx}/{total}] {breed} -> ❌ NO VALID IMAGE ({note})")
-                report.append(res)
-                continue
+                return res
 
             ok, out = download_to_jpg(img_url, dest)
             if ok:
@@ -301,9 +312,19 @@ def main():
             res["note"] = f"exception:{e}"
             print(f"[{idx}/{total}] {breed} -> ❌ exception: {e}")
 
-        report.append(res)
+        return res
+
+    # threads pour le réseau ; ex.map conserve l'ordre des races dans le rapport
+    with ThreadPoolExecutor(max_workers=max(1, FETCH_WORKERS)) as ex:
+        report = list(ex.map(process, range(1, total + 1), breeds))
+    parse_pool.shutdown()
 
-    Path(REPORT_FILE).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    prof.lap("download")
+    out = prof.attach({"results": report, "http": METRICS.totals(), "parsing": parse_pool.stats()})
+    Path(REPORT_FILE).write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    METRICS.flush()
+    METRICS.print_summary()
+    parse_pool.print_summary()
     print(f"Terminé. Rapport: {REPORT_FILE}")
 
 if __name__ == "__main__":
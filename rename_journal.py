@@ -0,0 +1,336 @@
+# rename_journal.py
+"""
+Renommages par lot des images, journalisés et récupérables après interruption.
+
+    tx = RenameTransaction(IMAGES_DIR)
+    tx.add("114_Carolina_Dog.jpg", "115_Carolina_Dog.jpg")
+    tx.write_json(Path("breeds_links_fixed.json"), data)   # écriture jointe (optionnelle)
+    tx.commit()
+
+- le plan complet est calculé avant de toucher au disque : source absente, deux sources vers
+  la même cible, cible déjà occupée par un fichier hors du lot -> RenameError, rien n'est fait
+- ordre de récupération : une chaîne a->b->c renomme d'abord b->c puis a->b (pas de nom temporaire) ;
+  seuls les cycles et les changements de casse passent par un nom __tmp__<tx>_
+- les références JSON (REF_FILES : rapport de téléchargement, manifestes d'images) qui nomment
+  un fichier renommé sont réécrites dans la même transaction, avec les écritures jointes
+- si le magasin d'images existe (image_store/index.json), son index suit les renommages de images/
+  dans la même transaction (ids renumérotés, noms de vues) : materialize ne les défait pas
+- journal <dossier>/.rename_journal.json (plan + copies des JSON) et .rename_journal.log
+  (une ligne par étape faite, fsync) ; après un arrêt brutal :
+      python rename_journal.py            # état du journal en attente
+      python rename_journal.py --forward  # termine la transaction
+      python rename_journal.py --rollback # revient à l'état d'avant
+"""
+import json
+import os
+import re
+import sys
+import uuid
+from pathlib import Path
+
+IMAGES_DIR = Path("images")
+JOURNAL_NAME = ".rename_journal.json"
+LOG_NAME = ".rename_journal.log"
+TMP_PREFIX = "__tmp__"
+
+# JSON qui citent des fichiers d'images par nom (chemin complet ou relatif, / ou \)
+REF_FILES = [Path("download_report.json"), Path("images_derived/manifest.json"), Path("images_manifest.json")]
+
+class RenameError(RuntimeError):
+    pass
+
+def _fsync_dir(d: Path):
+    if os.name == "nt":
+        return
+    fd = os.open(d, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _atomic_write(path: Path, text: str):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _dump(data) -> str:
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+# ---------- réécriture des références ----------
+_SEP = re.compile(r"[\\/]")
+
+def rewrite_refs(obj, mapping: dict):
+    """Remplace, dans toute chaîne de `obj`, un nom de fichier final présent dans `mapping` ; -> (obj, n)."""
+    if isinstance(obj, dict):
+        n = 0
+        for k, v in obj.items():
+            obj[k], dn = rewrite_refs(v, mapping)
+            n += dn
+        return obj, n
+    if isinstance(obj, list):
+        n = 0
+        for i, v in enumerate(obj):
+            obj[i], dn = rewrite_refs(v, mapping)
+            n += dn
+        return obj, n
+    if isinstance(obj, str) and obj:
+        parts = _SEP.split(obj)
+        new = mapping.get(parts[-1])
+        if new is not None:
+            return obj[:len(obj) - len(parts[-1])] + new, 1
+    return obj, 0
+
+# ---------- plan ----------
+def order_steps(moves: dict, tx: str):
+    """
+    moves : {source: cible} (noms dans un même dossier). Renvoie la liste ordonnée des étapes
+    (de, vers) : chaque étape vise un nom libre à ce moment-là.
+    """
+    steps, tails, seen = [], [], set()
+
+    def walk(start):
+        chain, s = [], start
+        while s in moves and s not in seen:
+            seen.add(s)
+            chain.append((s, moves[s]))
+            s = moves[s]
+        return chain
+
+    # sources qui ne sont la cible de personne = têtes de chaîne ; le reste forme des cycles
+    targets = set(moves.values())
+    for head in [s for s in moves if s not in targets]:
+        # de la fin vers le début : la dernière cible est libre, chaque étape libère la suivante
+        for src, dst in reversed(walk(head)):
+            if src.casefold() == dst.casefold():
+                tmp = f"{TMP_PREFIX}{tx}_{src}"
+                steps += [(src, tmp), (tmp, dst)]
+            else:
+                steps.append((src, dst))
+    for start in list(moves):
+        if start in seen:
+            continue
+        # cycle a->b->...->a : a part en temporaire, le reste devient une chaîne, puis tmp->b
+        cycle = walk(start)
+        first_src, first_dst = cycle[0]
+        tmp = f"{TMP_PREFIX}{tx}_{first_src}"
+        steps.append((first_src, tmp))
+        steps += [(src, dst) for src, dst in reversed(cycle[1:])]
+        tails.append((tmp, first_dst))
+    return steps + tails
+
+class RenameTransaction:
+    def __init__(self, directory=IMAGES_DIR, ref_files=None):
+        self.dir = Path(directory)
+        self.ref_files = [Path(p) for p in (REF_FILES if ref_files is None else ref_files)]
+        self.moves = {}
+        self.writes = {}     # chemin -> données JSON à écrire à la validation
+
+    def add(self, src: str, dst: str):
+        src, dst = Path(src).name, Path(dst).name
+        if src == dst:
+            return
+        if src in self.moves:
+            raise RenameError(f"{src} renommé deux fois ({self.moves[src]}, {dst})")
+        self.moves[src] = dst
+
+    def write_json(self, path, data):
+        self.writes[Path(path)] = data
+
+    def __len__(self):
+        return len(self.moves)
+
+    def check(self):
+        """Valide le plan complet ; lève RenameError en listant tous les problèmes."""
+        problems = []
+        names = {p.name for p in self.dir.iterdir()} if self.dir.exists() else set()
+        names_cf = {}
+        for n in names:
+            names_cf.setdefault(n.casefold(), []).append(n)
+        seen_dst = {}
+        for src, dst in self.moves.items():
+            if src not in names:
+                problems.append(f"source absente : {src}")
+            if dst in seen_dst:
+                problems.append(f"collision : {seen_dst[dst]} et {src} -> {dst}")
+            seen_dst[dst] = src
+            # cible occupée par un fichier qui ne bouge pas (casse comprise, pour Windows/macOS)
+            for other in names_cf.get(dst.casefold(), []):
+                if other != src and other not in self.moves:
+                    problems.append(f"cible occupée : {src} -> {dst} (existe : {other})")
+            if dst.startswith(TMP_PREFIX):
+                problems.append(f"nom réservé : {dst}")
+        if problems:
+            raise RenameError("plan refusé :\n   " + "\n   ".join(problems))
+
+    def _ref_updates(self):
+        mapping = dict(self.moves)
+        updates = {}
+        for p in self.ref_files:
+            if p in self.writes or not p.exists():
+                continue
+            data, n = rewrite_refs(json.loads(p.read_text(encoding="utf-8")), mapping)
+            if n:
+                updates[p] = data
+        for p, data in self.writes.items():
+            updates[p], _ = rewrite_refs(data, mapping)
+        store_index = self._store_update()
+        if store_index is not None:
+            updates[store_index[0]] = store_index[1]
+        return updates
+
+    def _store_update(self):
+        """(chemin, données) de l'index du magasin après renommage, ou None (pas de magasin / autre dossier)."""
+        from image_store import IMAGES_DIR as STORE_VIEWS_DIR, INDEX_NAME, STORE_DIR, ImageStore
+        if not (STORE_DIR / INDEX_NAME).exists() or self.dir.resolve() != STORE_VIEWS_DIR.resolve():
+            return None
+        store = ImageStore()
+        try:
+            changed = store.apply_renames(self.moves)
+        except SystemExit as e:   # renumber : id cible déjà pris dans l'index
+            raise RenameError(str(e)) from None
+        if not changed:
+            return None
+        return STORE_DIR / INDEX_NAME, store.index_data()
+
+    def commit(self, dry_run: bool = False) -> int:
+        if pending(self.dir):
+            raise RenameError(f"transaction en attente dans {self.dir} : "
+                              "python rename_journal.py --forward | --rollback")
+        self.check()
+        tx = uuid.uuid4().hex[:8]
+        steps = order_steps(self.moves, tx)
+        updates = self._ref_updates()
+        if dry_run:
+            for src, dst in self.moves.items():
+                print(f"[DRY] {src} -> {dst}")
+            for p in updates:
+                print(f"[DRY] JSON mis à jour : {p}")
+            return len(self.moves)
+
+        journal = {
+            "tx": tx,
+            "steps": steps,
+            # état d'avant (None = fichier absent) et état d'après, pour chaque JSON touché
+            "json": [{"path": str(p.resolve()),
+                      "before": p.read_text(encoding="utf-8") if p.exists() else None,
+                      "after": _dump(data)} for p, data in updates.items()],
+        }
+        if not self.dir.exists():
+            # rien à renommer (check() a refusé toute source) : seulement les écritures JSON
+            for item in journal["json"]:
+                _atomic_write(Path(item["path"]), item["after"])
+            return 0
+        _atomic_write(self.dir / JOURNAL_NAME, _dump(journal))
+        _fsync_dir(self.dir)
+        _roll_forward(self.dir, journal, done=0)
+        return len(self.moves)
+
+# ---------- application / récupération ----------
+def _read_journal(d: Path):
+    p = d / JOURNAL_NAME
+    if not p.exists():
+        return None
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def _steps_done(d: Path, journal) -> int:
+    """Étapes faites : celles du log, plus la suivante si le renommage a eu lieu sans être loggé."""
+    log = d / LOG_NAME
+    done = 0
+    if log.exists():
+        for line in log.read_text(encoding="utf-8").splitlines():
+            if line.strip().isdigit():
+                done = max(done, int(line) + 1)
+    steps = journal["steps"]
+    if done < len(steps):
+        src, dst = steps[done]
+        if not (d / src).exists() and (d / dst).exists():
+            done += 1
+    return done
+
+def pending(d=IMAGES_DIR) -> bool:
+    return (Path(d) / JOURNAL_NAME).exists()
+
+def _finish(d: Path):
+    for name in (LOG_NAME, JOURNAL_NAME):
+        p = d / name
+        if p.exists():
+            p.unlink()
+    _fsync_dir(d)
+
+def _roll_forward(d: Path, journal, done: int):
+    steps = journal["steps"]
+    with open(d / LOG_NAME, "a", encoding="utf-8") as log:
+        for i in range(done, len(steps)):
+            src, dst = steps[i]
+            if (d / dst).exists() and not (d / src).exists():
+                pass    # déjà fait (reprise)
+            else:
+                os.rename(d / src, d / dst)   # jamais d'écrasement : la cible est libre par construction
+            log.write(f"{i}\n")
+            log.flush()
+            os.fsync(log.fileno())
+    _fsync_dir(d)
+    # les JSON après les fichiers : chaque remplacement est atomique et rejouable
+    for item in journal["json"]:
+        _atomic_write(Path(item["path"]), item["after"])
+    _finish(d)
+
+def _rollback(d: Path, journal, done: int):
+    for item in journal["json"]:
+        p = Path(item["path"])
+        if item["before"] is None:
+            if p.exists():
+                p.unlink()
+        else:
+            _atomic_write(p, item["before"])
+    steps = journal["steps"]
+    for i in range(done - 1, -1, -1):
+        src, dst = steps[i]
+        if (d / dst).exists() and not (d / src).exists():
+            os.rename(d / dst, d / src)
+    _fsync_dir(d)
+    _finish(d)
+
+def recover(d=IMAGES_DIR, mode: str = "forward"):
+    """Termine (forward) ou annule (rollback) la transaction en attente ; -> nb d'étapes rejouées."""
+    d = Path(d)
+    journal = _read_journal(d)
+    if journal is None:
+        return 0
+    done = _steps_done(d, journal)
+    if mode == "rollback":
+        _rollback(d, journal, done)
+        return done
+    _roll_forward(d, journal, done)
+    return len(journal["steps"]) - done
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    d = IMAGES_DIR
+    if "--dir" in argv:
+        d = Path(argv[argv.index("--dir") + 1])
+    journal = _read_journal(d)
+    if journal is None:
+        print(f"✔ Aucune transaction en attente dans {d}.")
+        return 0
+    done = _steps_done(d, journal)
+    total = len(journal["steps"])
+    if "--rollback" in argv:
+        recover(d, "rollback")
+        print(f"↩ Transaction {journal['tx']} annulée ({done} étapes défaites, {len(journal['json'])} JSON restaurés).")
+    elif "--forward" in argv:
+        recover(d, "forward")
+        print(f"✔ Transaction {journal['tx']} terminée ({total - done} étapes restantes appliquées, "
+              f"{len(journal['json'])} JSON écrits).")
+    else:
+        print(f"⚠️ Transaction {journal['tx']} en attente : {done}/{total} étapes faites, "
+              f"{len(journal['json'])} JSON à écrire.")
+        print("   --forward pour terminer, --rollback pour annuler.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
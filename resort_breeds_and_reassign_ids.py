@@ -1,25 +1,12 @@
 # resort_breeds_and_reassign_ids.py
 import json
-import re
-import unicodedata
 from pathlib import Path
 
+from breed_ids import IdRegistry, assign_sort_rank
+
 INFILE  = "breeds_links_fixed.json"     # ton fichier source
 OUTFILE = "breeds_links_resorted.json"  # sortie avec IDs réassignés
 
-def strip_accents(s: str) -> str:
-    if s is None: 
-        return ""
-    return "".join(
-        c for c in unicodedata.normalize("NFD", str(s))
-        if unicodedata.category(c) != "Mn"
-    )
-
-def norm_sort_key(s: str) -> str:
-    s = strip_accents(s).casefold()
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
 def main():
     data = json.loads(Path(INFILE).read_text(encoding="utf-8"))
     breeds = data.get("breeds", [])
@@ -31,16 +18,17 @@ def main():
         if "breed" in b and isinstance(b["breed"], str):
             b["breed"] = b["breed"].strip()
 
-    # Tri alphabétique (sans accents / insensible casse)
-    breeds.sort(key=lambda x: norm_sort_key(x.get("breed", "")))
-
-    # Réattribution des IDs 1..N
-    for i, b in enumerate(breeds, start=1):
-        b["id"] = i
+    # IDs stables (registre) + tri alphabétique (sans accents / insensible casse) dans sort_rank
+    registry = IdRegistry.load()
+    registry.assign(breeds)
+    assign_sort_rank(breeds)
 
     Path(OUTFILE).write_text(json.dumps({"breeds": breeds}, ensure_ascii=False, indent=2), encoding="utf-8")
+    registry.save()
 
-    print(f"✔ Réordonné et réattribué {len(breeds)} IDs.")
+    print(f"✔ Réordonné {len(breeds)} races, {len(registry.allocated)} nouveaux IDs.")
+    for bid, name in registry.allocated[:20]:
+        print(f"  + {bid:03d} — {name}")
     print(f"→ Fichier écrit : {OUTFILE}")
     print("Aperçu des 10 premiers :")
     for b in breeds[:10]:
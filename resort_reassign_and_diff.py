@@ -2,6 +2,10 @@
 import json, re, unicodedata
 from pathlib import Path
 
+from breed_ids import IdRegistry, assign_sort_rank
+from breeds_schema import write_breeds
+from stage_profile import StageProfiler
+
 LINKS_IN   = "breeds_links_resorted.json"
 MERGED_IN  = "breeds_merged_aligned.json"
 LINKS_OUT  = "breeds_links_resorted_updated.json"
@@ -19,6 +23,7 @@ def norm_key(s: str) -> str:
     return s
 
 def main():
+    prof = StageProfiler("resort_reassign_and_diff")
     # 1) Charger
     links_data  = json.loads(Path(LINKS_IN).read_text(encoding="utf-8"))
     merged_data = json.loads(Path(MERGED_IN).read_text(encoding="utf-8"))
@@ -33,10 +38,14 @@ def main():
         if "breed" in b and isinstance(b["breed"], str):
             b["breed"] = b["breed"].strip()
 
+    prof.lap("load")
+
     # === A) DIFF AVANT MODIFS ===
     links_by_id  = {int(x["id"]): x for x in links if x.get("id") is not None}
     merged_by_id = {int(x["id"]): x for x in merged if x.get("id") is not None}
 
+    prof.lap("index")
+
     # 1) manquants / extras (par ID)
     missing_in_merged = []
     for lid, lrow in links_by_id.items():
@@ -90,17 +99,19 @@ def main():
                 "breed_merged": next((x["breed"] for x in merged if norm_key(x["breed"]) == k), "")
             })
 
-    # === B) RÉORDONNER LINKS & RÉASSIGNER IDs ===
-    links_sorted = sorted(links, key=lambda x: norm_key(x.get("breed","")))
-    id_changes_links = []
-    for i, row in enumerate(links_sorted, start=1):
-        old_id = row.get("id")
-        if old_id != i:
-            id_changes_links.append({"breed": row.get("breed",""), "old_id": old_id, "new_id": i})
-        row["id"] = i
+    prof.lap("diff")
 
-    # mapping nom normalisé -> NOUVEL id
+    # === B) RÉORDONNER LINKS (sort_rank) & IDs STABLES DU REGISTRE ===
+    registry = IdRegistry.load()
+    old_ids = [row.get("id") for row in links]
+    registry.assign(links)
+    id_changes_links = [{"breed": row.get("breed",""), "old_id": old, "new_id": row["id"]}
+                        for row, old in zip(links, old_ids) if old != row["id"]]
+    links_sorted = assign_sort_rank(list(links))
+
+    # mapping nom normalisé -> id (et rang d'affichage)
     name_to_newid = {}
+    name_to_rank = {norm_key(row.get("breed","")): row["sort_rank"] for row in links_sorted}
     duplicate_names_after_sort = []
     for row in links_sorted:
         k = norm_key(row.get("breed",""))
@@ -128,14 +139,20 @@ def main():
         if old_id != new_id:
             id_changes_merged.append({"breed": breed_name, "old_id": old_id, "new_id": new_id})
             corrected["id"] = new_id
+        corrected["sort_rank"] = name_to_rank[k]
 
         merged_corrected.append(corrected)
 
-    merged_corrected.sort(key=lambda x: (x.get("id") is None, x.get("id") or 0, norm_key(x.get("breed",""))))
+    merged_corrected.sort(key=lambda x: (x.get("sort_rank") is None, x.get("sort_rank") or 0,
+                                         norm_key(x.get("breed",""))))
+
+    prof.lap("reassign")
 
     # === D) ÉCRIRE SORTIES ===
     Path(LINKS_OUT).write_text(json.dumps({"breeds": links_sorted}, ensure_ascii=False, indent=2), encoding="utf-8")
-    Path(MERGED_OUT).write_text(json.dumps({"breeds": merged_corrected}, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_breeds(MERGED_OUT, merged_corrected)
+    registry.save()
+    prof.lap("write")
 
     # === E) RAPPORT COMPLET ===
     report = {
@@ -158,6 +175,7 @@ def main():
 
         # Changements d'IDs suite au tri
         "reassign_after_sort": {
+            "new_ids_allocated": [{"id": bid, "breed": name} for bid, name in registry.allocated],
             "links_ids_changed_count": len(id_changes_links),
             "merged_ids_changed_count": len(id_changes_merged),
             "examples_links_ids_changed": id_changes_links[:20],
@@ -173,6 +191,7 @@ def main():
             "merged_output_file": MERGED_OUT
         }
     }
+    prof.attach(report)
     Path(REPORT).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
 
     # Console résumé
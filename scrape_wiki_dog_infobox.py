@@ -1,12 +1,19 @@
 # scrape_wiki_dog_infobox.py
-import time
-import csv
+import argparse
+import hashlib
+import json
+import os
 import re
-import requests
-import pandas as pd
-from bs4 import BeautifulSoup
 from collections import OrderedDict
-from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urljoin, urlparse, urlunparse
+
+import wiki_http
+from html_pool import ParsePool
+from http_metrics import METRICS
+from infobox_keys import LONG_FILE, LongWriter, write_wide_csv
+from stage_profile import StageProfiler
 
 COMMONS_URL = "https://commons.wikimedia.org/wiki/List_of_dog_breeds?uselang=fr"
 HEADERS = {
@@ -17,23 +24,21 @@ HEADERS = {
     "Referer": "https://commons.wikimedia.org/"
 }
 REQUEST_TIMEOUT = 20
-PAUSE_SECONDS = 0.7       # Politesse entre requêtes
-MAX_RETRIES = 2           # Petites relances si échec
+PAUSE_SECONDS = 0.7       # Politesse : intervalle min. entre requêtes vers un même hôte (tous threads)
+MAX_RETRIES = 4           # Relances (backoff exponentiel, Retry-After respecté)
 TEST_LIMIT = None         # Mets un nombre (ex. 20) pour tester vite
+REPORT_FILE = "scrape_report.json"
+JOURNAL_FILE = "scrape_journal.jsonl"   # une ligne JSON par race terminée (cf. --resume)
+STATE_FILE = "scrape_state.json"        # lastrevid + infobox par page, hash des lignes Commons (cf. --incremental)
+REVID_BATCH = 50                        # titres par appel prop=info (limite API non-bot)
+FETCH_WORKERS = wiki_http.CONCURRENCY   # races téléchargées en parallèle (threads)
+LEAD_ONLY = True          # infobox lue dans la section 0 (action=parse), page complète en repli (cf. --full-pages)
 
-def fetch(url, headers=HEADERS, timeout=REQUEST_TIMEOUT, retries=MAX_RETRIES):
-    last_err = None
-    for attempt in range(retries + 1):
-        try:
-            r = requests.get(url, headers=headers, timeout=timeout)
-            r.raise_for_status()
-            return r
-        except Exception as e:
-            last_err = e
-            if attempt < retries:
-                time.sleep(1.2)
-            else:
-                raise last_err
+session = wiki_http.lazy_session(HEADERS)
+parse_pool = ParsePool()   # BeautifulSoup hors du GIL des threads réseau
+
+def fetch(url, headers=None, timeout=REQUEST_TIMEOUT, retries=MAX_RETRIES):
+    return wiki_http.request(session, "GET", url, headers=headers, timeout=timeout, retries=retries)
 
 def find_commons_table_with_local_names(soup):
     # On cherche une table ayant un header avec "Local" (en anglais)
@@ -56,8 +61,10 @@ def find_commons_table_with_local_names(soup):
             return t
     return None
 
-def get_local_name_links_from_commons():
+def get_commons_rows():
+    """Lignes de la table Commons : [(hash de la ligne, [(nom, lien), ...]), ...]."""
     resp = fetch(COMMONS_URL)
+    from bs4 import BeautifulSoup   # import paresseux : bs4 n'est chargé que pour analyser
     soup = BeautifulSoup(resp.text, "html.parser")
     table = find_commons_table_with_local_names(soup)
     if not table:
@@ -73,11 +80,13 @@ def get_local_name_links_from_commons():
     if col_index is None:
         col_index = 2  # par défaut, 3e colonne
 
-    links = []
+    rows = []
     for tr in table.find_all("tr")[1:]:
         tds = tr.find_all(["td", "th"])
         if len(tds) <= col_index:
             continue
+        row_hash = hashlib.blake2b(str(tr).encode("utf-8"), digest_size=12).hexdigest()
+        links = []
         # dans la 3e col, il peut y avoir plusieurs <a>
         for a in tds[col_index].find_all("a"):
             name = a.get_text(strip=True)
@@ -86,15 +95,22 @@ def get_local_name_links_from_commons():
                 continue
             url = urljoin("https://commons.wikimedia.org", href)
             links.append((name, url))
+        rows.append((row_hash, links))
+    return rows
+
+def dedupe_links(rows):
     # déduplication en conservant l’ordre
     seen, out = set(), []
-    for name, url in links:
+    for name, url in (link for _, links in rows for link in links):
         key = (name, url)
         if key not in seen:
             seen.add(key)
             out.append((name, url))
     return out
 
+def get_local_name_links_from_commons():
+    return dedupe_links(get_commons_rows())
+
 def to_clean_text(node):
     if not node:
         return ""
@@ -111,6 +127,7 @@ def is_infobox_table(table):
     return ("infobox" in cls) or ("infobox_v2" in cls) or ("infobox" in cls)
 
 def extract_infobox_pairs(html):
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, "html.parser")
     # Chercher la première table "infobox"
     table = None
@@ -158,48 +175,276 @@ def follow_if_wikipedia(url):
         return r.url, r.text
 
     # Sinon, essayer d'attraper un lien vers Wikipedia depuis la page Commons
-    soup = BeautifulSoup(r.text, "html.parser")
+    full = parse_pool.run(wikipedia_link_in, r.text, r.url)
+    if full:
+        rr = fetch(full)
+        return rr.url, rr.text
+
+    # Si rien trouvé, on retournera quand même la page (peut contenir une infobox)
+    return r.url, r.text
+
+def wikipedia_link_in(html, base_url):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
     for a in soup.find_all("a", href=True):
         href = a["href"]
         if "wikipedia.org/wiki/" in href:
-            full = urljoin(r.url, href)
-            rr = fetch(full)
-            return rr.url, rr.text
+            return urljoin(base_url, href)
+    return None
 
-    # Si rien trouvé, on retournera quand même la page (peut contenir une infobox)
+def resolve_article(url):
+    """
+    -> (URL de l'article Wikipedia | None, page déjà téléchargée (url, html) | None).
+    Un lien Commons est téléchargé une fois : la page sert à trouver l'article et reste
+    disponible pour le repli (page Commons sans lien, ou redirection directe vers l'article).
+    """
+    if "wikipedia.org" in urlparse(url).netloc:
+        return url, None
+    r = fetch(url)
+    if "wikipedia.org" in urlparse(r.url).netloc:
+        return r.url, (r.url, r.text)
+    return parse_pool.run(wikipedia_link_in, r.text, r.url), (r.url, r.text)
+
+def fetch_lead_section(url):
+    """
+    Section 0 seule (action=parse&section=0&prop=text) : l'infobox sans navigation,
+    sections ni pied de page. Retourne (url de l'article | None, page déjà téléchargée | None,
+    (final_url, html, titre, revid) | None) : le repli réutilise ce qui a déjà été téléchargé.
+    """
+    article, page = resolve_article(url)
+    p = urlparse(article or "")
+    if not article or "/wiki/" not in p.path:
+        return article, page, None
+    title = unquote(p.path.split("/wiki/", 1)[1])
+    params = {"action": "parse", "page": title, "prop": "text|revid", "section": 0, "redirects": 1,
+              "disableeditsection": 1, "disabletoc": 1, "format": "json", "formatversion": 2}
+    try:
+        r = wiki_http.request(session, "GET", f"https://{p.netloc}/w/api.php", params=params,
+                              timeout=REQUEST_TIMEOUT, retries=MAX_RETRIES)
+        parsed = r.json().get("parse")
+    except Exception as e:
+        print(f"  (section 0 indisponible : {e})")
+        return article, page, None
+    if not parsed or not parsed.get("text"):
+        return article, page, None
+    final_title = parsed.get("title", title)
+    final_url = f"https://{p.netloc}/wiki/{quote(final_title.replace(' ', '_'))}"
+    return article, page, (final_url, parsed["text"], final_title, parsed.get("revid"))
+
+def full_page(article, page):
+    """Page complète pour le repli, sans retélécharger ce que fetch_lead_section a déjà."""
+    if page and (not article or "wikipedia.org" in urlparse(page[0]).netloc):
+        return page          # article déjà servi par la redirection, ou page Commons sans lien Wikipedia
+    r = fetch(article)
     return r.url, r.text
 
-def main():
-    all_links = get_local_name_links_from_commons()
-    if TEST_LIMIT:
-        all_links = all_links[:TEST_LIMIT]
-    print(f"Races trouvées dans la 3e colonne : {len(all_links)}")
+# ---------- journal (reprise après crash) ----------
+def load_journal(path=JOURNAL_FILE):
+    """(nom, lien) -> dernière entrée du journal ; ignore une dernière ligne tronquée."""
+    entries = OrderedDict()
+    p = Path(path)
+    if not p.exists():
+        return entries
+    with open(p, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                e = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            entries[(e["name"], e["url"])] = e
+    return entries
 
-    flat_lines = []
-    rows_for_csv = []
+def append_journal(f, entry):
+    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
 
-    for idx, (display_name, commons_href) in enumerate(all_links, 1):
-        print(f"[{idx}/{len(all_links)}] {display_name} -> {commons_href}")
-        try:
-            final_url, html = follow_if_wikipedia(commons_href)
-            info = extract_infobox_pairs(html)
-            # Construire la version "plate" demandée
-            parts = [display_name]
-            for k, v in info.items():
-                parts.append(f"{k}: {v}")
-            flat_line = ", ".join(parts)
-            flat_lines.append(flat_line)
-
-            # Pour le CSV structuré, on met au moins Nom + URL + champs
-            row = OrderedDict()
-            row["Nom"] = display_name
-            row["URL"] = final_url
-            for k, v in info.items():
-                row[k] = v
-            rows_for_csv.append(row)
-        except Exception as e:
-            print(f"  -> ERREUR: {e}")
-        time.sleep(PAUSE_SECONDS)
+def page_revision(final_url, html):
+    """(titre, lastrevid) de la page servie ; revid lu dans la config JS MediaWiki (wgRevisionId)."""
+    m = re.search(r'"wgPageName"\s*:\s*"((?:[^"\\]|\\.)*)"', html)
+    title = json.loads(f'"{m.group(1)}"') if m else unquote(urlparse(final_url).path.split("/wiki/", 1)[-1])
+    m = re.search(r'"wgRevisionId"\s*:\s*(\d+)', html)
+    return title.replace("_", " "), (int(m.group(1)) if m and int(m.group(1)) else None)
+
+def scrape_one(display_name, commons_href):
+    try:
+        info, fetched, resolved = None, "lead", None
+        if LEAD_ONLY:
+            article, page, lead = fetch_lead_section(commons_href)
+            resolved = (article, page)
+            if lead:
+                final_url, html, title, revid = lead
+                info = parse_pool.run(extract_infobox_pairs, html)
+        if not info:
+            # infobox hors de la section 0 (ou pas d'article) : page complète
+            fetched = "full"
+            if resolved and (resolved[0] or resolved[1]):
+                final_url, html = full_page(*resolved)
+            else:
+                final_url, html = follow_if_wikipedia(commons_href)
+            info = parse_pool.run(extract_infobox_pairs, html)
+            title, revid = page_revision(final_url, html)
+        return {"name": display_name, "url": commons_href, "final_url": final_url,
+                "title": title, "lastrevid": revid, "info": list(info.items()), "status": "ok",
+                "fetch": fetched}
+    except Exception as e:
+        return {"name": display_name, "url": commons_href, "final_url": None,
+                "info": [], "status": "error", "error": str(e)}
+
+# ---------- mode incrémental (révisions) ----------
+def load_state(path=STATE_FILE):
+    p = Path(path)
+    if not p.exists():
+        return {"commons_rows": [], "pages": {}}
+    state = json.loads(p.read_text(encoding="utf-8"))
+    state["pages"] = {tuple(e["key"]): e["entry"] for e in state.get("pages", [])}
+    return state
+
+def save_state(rows, journal, path=STATE_FILE):
+    pages = [{"key": list(k), "entry": e} for k, e in journal.items()
+             if e["status"] == "ok" and e.get("lastrevid")]
+    data = {"commons_rows": [h for h, _ in rows], "pages": pages}
+    tmp = Path(path + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+def query_page_info(by_host):
+    """
+    {(hôte, titre demandé): (titre final, lastrevid)} via action=query&prop=info&redirects=1,
+    REVID_BATCH titres par appel. Les titres absents (supprimés, API muette) n'y figurent pas.
+    """
+    out = {}
+    for host, titles in by_host.items():
+        for i in range(0, len(titles), REVID_BATCH):
+            batch = titles[i:i + REVID_BATCH]
+            params = {"action": "query", "prop": "info", "titles": "|".join(batch),
+                      "redirects": 1, "format": "json", "formatversion": 2}
+            try:
+                data = wiki_http.request(session, "GET", f"https://{host}/w/api.php", params=params,
+                                         timeout=REQUEST_TIMEOUT).json()
+            except Exception as ex:
+                print(f"  ⚠️ prop=info {host} : {ex}")
+                continue
+            q = data.get("query", {})
+            # titre demandé -> titre final (normalisation / redirections)
+            alias = {t: t for t in batch}
+            for m in q.get("normalized", []) + q.get("redirects", []):
+                for src, dst in list(alias.items()):
+                    if dst == m.get("from"):
+                        alias[src] = m.get("to")
+            revs = {p.get("title"): p.get("lastrevid") for p in q.get("pages", []) if not p.get("missing")}
+            for t in batch:
+                if revs.get(alias[t]):
+                    out[(host, t)] = (alias[t], revs[alias[t]])
+    return out
+
+def current_revisions(entries):
+    """{(hôte, titre): lastrevid actuel} pour les entrées déjà scrapées."""
+    by_host = OrderedDict()
+    for e in entries:
+        host = urlparse(e["final_url"]).netloc
+        by_host.setdefault(host, [])
+        if e["title"] not in by_host[host]:
+            by_host[host].append(e["title"])
+    return {k: revid for k, (_, revid) in query_page_info(by_host).items()}
+
+# ---------- plan de fetch (une cible canonique = un téléchargement) ----------
+PRESENTATION_PARAMS = {"uselang", "useskin", "useformat", "mobileaction", "variant"}
+
+def canonical_url(url):
+    """
+    Forme canonique d'un lien wiki : https, hôte desktop en minuscules, sans fragment ni
+    paramètres d'affichage (?uselang...), /w/index.php?title=X -> /wiki/X, titre
+    en underscores avec première lettre majuscule et encodage pourcent uniforme.
+    """
+    p = urlparse(url.strip())
+    host = p.netloc.lower().replace(".m.wikipedia.org", ".wikipedia.org")
+    query = [(k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if k not in PRESENTATION_PARAMS]
+    path = p.path
+    if path.endswith("/index.php") and any(k == "title" for k, _ in query) and len(query) == 1:
+        path, query = "/wiki/" + query[0][1], []
+    if path.startswith("/wiki/"):
+        title = unquote(path[len("/wiki/"):]).replace(" ", "_").strip("_")
+        if title:
+            title = title[0].upper() + title[1:]
+        path = "/wiki/" + quote(title, safe="/:(),'!*$@;=&+-._~")
+    return urlunparse(("https", host, path, "", urlencode(query), ""))
+
+def _wiki_title(url):
+    p = urlparse(url)
+    if "wikipedia.org" not in p.netloc or not p.path.startswith("/wiki/"):
+        return None
+    return unquote(p.path[len("/wiki/"):]).replace("_", " ")
+
+def resolve_redirects(urls):
+    """{url canonique: url de la page cible} en résolvant les redirections wiki par lots (redirects=1)."""
+    by_host = OrderedDict()
+    for u in urls:
+        title = _wiki_title(u)
+        if title:
+            by_host.setdefault(urlparse(u).netloc, [])
+            if title not in by_host[urlparse(u).netloc]:
+                by_host[urlparse(u).netloc].append(title)
+    resolved = query_page_info(by_host) if by_host else {}
+    out = {}
+    for u in urls:
+        title = _wiki_title(u)
+        hit = resolved.get((urlparse(u).netloc, title)) if title else None
+        out[u] = canonical_url(f"https://{urlparse(u).netloc}/wiki/{hit[0]}") if hit else u
+    return out
+
+def build_fetch_plan(links):
+    """OrderedDict url cible -> [(nom, lien), ...] : chaque cible n'est scrapée qu'une fois."""
+    canon = OrderedDict((key, canonical_url(key[1])) for key in links)
+    targets = resolve_redirects(list(OrderedDict.fromkeys(canon.values())))
+    plan = OrderedDict()
+    for key, c in canon.items():
+        plan.setdefault(targets[c], []).append(key)
+    return plan
+
+def plan_incremental(rows, state):
+    """
+    Entrées réutilisables telles quelles : lien issu d'une ligne Commons inchangée
+    et page dont le lastrevid n'a pas bougé. Retourne ({(nom, lien): entrée}, stats).
+    """
+    known_rows = set(state.get("commons_rows", []))
+    candidates = OrderedDict()
+    changed_rows = 0
+    for row_hash, links in rows:
+        if row_hash not in known_rows:
+            changed_rows += 1
+            continue
+        for key in links:
+            e = state["pages"].get(key)
+            if e and e.get("lastrevid") and e.get("title"):
+                candidates[key] = e
+    current = current_revisions(candidates.values()) if candidates else {}
+    reuse = OrderedDict()
+    for key, e in candidates.items():
+        if current.get((urlparse(e["final_url"]).netloc, e["title"])) == e["lastrevid"]:
+            reuse[key] = e
+    stats = {"rows_total": len(rows), "rows_new_or_changed": changed_rows,
+             "pages_checked": len(candidates), "pages_unchanged": len(reuse)}
+    return reuse, stats
+
+def write_outputs(all_links, journal, wide=False):
+    """
+    TXT plat depuis le journal (ordre de la liste Commons) ; vue large CSV + XLSX
+    (union des libellés) seulement si `wide`, dérivée du fichier long.
+    """
+    flat_lines = []
+    for key in all_links:
+        e = journal.get(tuple(key))
+        if not e or e["status"] != "ok":
+            continue
+        # Construire la version "plate" demandée
+        parts = [e["name"]]
+        for k, v in e["info"]:
+            parts.append(f"{k}: {v}")
+        flat_lines.append(", ".join(parts))
 
     # Écriture du .txt “plat”
     with open("dog_breeds_flat.txt", "w", encoding="utf-8") as f:
@@ -207,28 +452,125 @@ def main():
             f.write(line + "\n")
     print("✔ dog_breeds_flat.txt écrit.")
 
-    # Écriture du CSV “structuré”
-    # Normaliser l’ensemble des colonnes (union de toutes les clés)
-    all_keys = OrderedDict()
-    for r in rows_for_csv:
-        for k in r.keys():
-            all_keys[k] = True
-    fieldnames = list(all_keys.keys())
-
-    with open("dog_breeds_structured.csv", "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows_for_csv:
-            w.writerow(r)
-    print("✔ dog_breeds_structured.csv écrit.")
-
-    # Bonus: export XLSX
-    try:
-        df = pd.DataFrame(rows_for_csv)
-        df.to_excel("dog_breeds_structured.xlsx", index=False)
-        print("✔ dog_breeds_structured.xlsx écrit.")
-    except Exception as e:
-        print(f"(XLSX facultatif) Impossible d’écrire l’Excel: {e}")
+    if wide:
+        write_wide_csv(LONG_FILE, "dog_breeds_structured.csv")
+        print("✔ dog_breeds_structured.csv écrit.")
+        # Bonus: export XLSX
+        try:
+            import pandas as pd
+            df = pd.read_csv("dog_breeds_structured.csv", dtype=str)
+            df.to_excel("dog_breeds_structured.xlsx", index=False)
+            print("✔ dog_breeds_structured.xlsx écrit.")
+        except Exception as e:
+            print(f"(XLSX facultatif) Impossible d’écrire l’Excel: {e}")
+    return len(flat_lines)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Scrape les infobox des races listées sur Commons.")
+    ap.add_argument("--resume", action="store_true",
+                    help=f"reprendre depuis {JOURNAL_FILE} (les races déjà réussies sont sautées)")
+    ap.add_argument("--incremental", action="store_true",
+                    help=f"ne re-scraper que les lignes Commons et pages modifiées depuis {STATE_FILE}")
+    ap.add_argument("--full-pages", action="store_true",
+                    help="télécharger les articles complets au lieu de la seule section 0")
+    ap.add_argument("--wide", action="store_true",
+                    help="écrire aussi la vue large dog_breeds_structured.csv/.xlsx (dérivée du fichier long)")
+    ap.add_argument("--parse-workers", type=int, default=None,
+                    help="processus d'analyse HTML (défaut : FURIOUS_PARSE_WORKERS ou nb de cœurs ; 0 = sans pool)")
+    args, _ = ap.parse_known_args(argv)
+    global LEAD_ONLY
+    if args.full_pages:
+        LEAD_ONLY = False
+    if args.parse_workers is not None:
+        parse_pool.workers = args.parse_workers
+
+    METRICS.serve_from_env()
+    wiki_http.set_min_interval(PAUSE_SECONDS)
+    prof = StageProfiler("scrape_wiki_dog_infobox")
+    rows = get_commons_rows()
+    all_links = dedupe_links(rows)
+    prof.lap("commons_list")
+    if TEST_LIMIT:
+        all_links = all_links[:TEST_LIMIT]
+    print(f"Races trouvées dans la 3e colonne : {len(all_links)}")
+
+    journal = load_journal() if args.resume else OrderedDict()
+    todo = [k for k in all_links if journal.get(k, {}).get("status") != "ok"]
+    if args.resume:
+        print(f"Reprise : {len(all_links) - len(todo)} déjà faites, {len(todo)} restantes")
+    resumed = len(all_links) - len(todo)
+
+    incremental, reuse = None, {}
+    if args.incremental:
+        reuse, incremental = plan_incremental(rows, load_state())
+        reuse = {k: e for k, e in reuse.items() if k in set(todo)}
+        journal.update(reuse)
+        todo = [k for k in todo if k not in reuse]
+        print(f"Incrémental : {incremental['rows_new_or_changed']} lignes Commons nouvelles/modifiées, "
+              f"{incremental['pages_unchanged']}/{incremental['pages_checked']} pages inchangées, "
+              f"{len(todo)} à scraper")
+        prof.lap("revisions")
+
+    with open(JOURNAL_FILE, "a" if args.resume else "w", encoding="utf-8") as jf, LongWriter(LONG_FILE) as lw:
+        for e in reuse.values():
+            append_journal(jf, e)
+        # races déjà connues (reprise / incrémental) d'abord, puis flux des nouvelles
+        for k in all_links:
+            e = journal.get(k)
+            if e and e["status"] == "ok":
+                lw.write_breed(e["name"], e["final_url"], e["info"])
+        def task(target, keys):
+            entry = scrape_one(keys[0][0], target)
+            # une entrée par nom local pointant sur cette cible (sorties inchangées)
+            return [dict(entry, name=name, url=href) for name, href in keys]
+
+        plan = build_fetch_plan(todo)
+        print(f"Plan : {len(plan)} cibles distinctes pour {len(todo)} liens")
+        # le journal n'est écrit que par ce thread ; les sorties sont reconstruites dans l'ordre Commons
+        with ThreadPoolExecutor(max_workers=max(1, FETCH_WORKERS)) as ex:
+            futures = [ex.submit(task, target, keys) for target, keys in plan.items()]
+            for idx, fut in enumerate(as_completed(futures), 1):
+                entries = fut.result()
+                print(f"[{idx}/{len(plan)}] {', '.join(e['name'] for e in entries)} -> {entries[0]['url']}")
+                if entries[0]["status"] != "ok":
+                    print(f"  -> ERREUR: {entries[0]['error']}")
+                for entry in entries:
+                    append_journal(jf, entry)
+                    journal[(entry["name"], entry["url"])] = entry
+                    if entry["status"] == "ok":
+                        lw.write_breed(entry["name"], entry["final_url"], entry["info"])
+    parse_pool.shutdown()
+
+    prof.lap("scrape")
+
+    scraped_count = write_outputs(all_links, journal, wide=args.wide)
+    save_state(rows, journal)
+    errors = [{"name": e["name"], "url": e["url"], "error": e.get("error")}
+              for e in journal.values() if e["status"] != "ok"]
+
+    # Rapport : compteurs + métriques HTTP
+    report = {
+        "links_total": len(all_links),
+        "scraped_count": scraped_count,
+        "long_file": LONG_FILE,
+        "resumed_count": resumed,
+        "targets_fetched": len(plan),
+        "incremental": incremental,
+        "fetch_modes": {m: sum(1 for e in journal.values() if e.get("fetch") == m) for m in ("lead", "full")},
+        "errors_count": len(errors),
+        "errors_examples": errors[:20],
+        "journal_file": JOURNAL_FILE,
+        "http": METRICS.totals(),
+        "parsing": parse_pool.stats(),
+    }
+    prof.lap("write")
+    prof.attach(report)
+    with open(REPORT_FILE, "w", encoding="utf-8") as f:
+        f.write(json.dumps(report, ensure_ascii=False, indent=2))
+    METRICS.flush()
+    METRICS.print_summary()
+    parse_pool.print_summary()
+    print(f"→ Rapport : {REPORT_FILE}")
 
 if __name__ == "__main__":
     main()
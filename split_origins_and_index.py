@@ -4,6 +4,8 @@ import re
 import unicodedata
 from pathlib import Path
 
+from breed_ids import IdRegistry, assign_sort_rank
+
 INFILE = "breeds_merged.json"            # ou ton fichier modifié
 OUT_BREEDS = "breeds_with_origin_list.json"
 OUT_ORIGINS = "origins_index.json"
@@ -58,10 +60,11 @@ def main():
         if isinstance(it.get("breed"), str):
             it["breed"] = cap_first(it["breed"].strip())
 
-    # 2) tri alphabétique (sans accents) puis réattribution des IDs 1..N
-    breeds.sort(key=lambda x: norm_sort_key(x.get("breed", "")))
-    for i, it in enumerate(breeds, start=1):
-        it["id"] = i
+    # 2) IDs stables (registre) puis tri alphabétique (sans accents) dans sort_rank
+    registry = IdRegistry.load()
+    registry.assign(breeds)
+    assign_sort_rank(breeds)
+    registry.save()
 
     # 3) transformer origin (string -> liste)
     all_origins = set()
@@ -0,0 +1,146 @@
+# stage_profile.py
+"""
+Profilage optionnel des étapes du pipeline.
+
+Activation :
+- argument `--profile` (temps par phase), `--profile=cprofile,mem` ou `--profile=all`
+- ou variable d'environnement FURIOUS_PROFILE=1 | cprofile | mem | all (combinables par virgules)
+
+Usage dans un script :
+    prof = StageProfiler("align_merged_to_links")
+    ...chargement...
+    prof.lap("load")           # temps écoulé depuis le lap précédent
+    with prof.phase("merge"):  # ou en bloc
+        ...
+    prof.attach(report)   # ajoute report["timings"] si le profilage est actif
+"""
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+PROFILE_DIR = Path("profiles")   # sorties cProfile (<stage>.prof) et résumés sans rapport
+TOP_N = 10
+
+def profile_options(argv=None) -> set:
+    """Options actives : {"time", "cprofile", "mem"} (vide = désactivé)."""
+    argv = sys.argv[1:] if argv is None else argv
+    raw = os.environ.get("FURIOUS_PROFILE", "")
+    for a in argv:
+        if a == "--profile":
+            raw = raw or "1"
+        elif a.startswith("--profile="):
+            raw = a.split("=", 1)[1]
+    opts = set()
+    for tok in (t.strip().lower() for t in raw.split(",")):
+        if tok in ("", "0", "off", "no"):
+            continue
+        opts.add("time")
+        if tok in ("cprofile", "all"):
+            opts.add("cprofile")
+        if tok in ("mem", "memory", "tracemalloc", "all"):
+            opts.add("mem")
+    return opts
+
+class StageProfiler:
+    def __init__(self, stage: str, options: set | None = None):
+        self.stage = stage
+        self.options = profile_options() if options is None else set(options)
+        self.enabled = bool(self.options)
+        self.phases: dict[str, float] = {}
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+        self._profiler = None
+        self._finished = None
+        if "mem" in self.options and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if "cprofile" in self.options:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last = time.perf_counter()
+            self.phases[name] = self.phases.get(name, 0.0) + self._last - t
+
+    def lap(self, name: str):
+        """Attribue à `name` le temps écoulé depuis le dernier lap (ou le début)."""
+        now = time.perf_counter()
+        if self.enabled:
+            self.phases[name] = self.phases.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self) -> dict:
+        """Arrête les mesures (idempotent) et retourne le bloc `timings`."""
+        if self._finished is not None:
+            return self._finished
+        out = {
+            "total_s": round(time.perf_counter() - self.t0, 4),
+            "phases_s": {k: round(v, 4) for k, v in self.phases.items()},
+        }
+        if self._profiler is not None:
+            self._profiler.disable()
+            PROFILE_DIR.mkdir(exist_ok=True)
+            prof_file = PROFILE_DIR / f"{self.stage}.prof"
+            self._profiler.dump_stats(str(prof_file))
+            stats = pstats.Stats(self._profiler)
+            top = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:TOP_N]
+            out["cprofile"] = {
+                "file": str(prof_file),
+                "top_cumulative": [
+                    {"func": f"{Path(fn).name}:{line}({name})", "calls": nc, "cum_s": round(ct, 4)}
+                    for (fn, line, name), (_, nc, _, ct, _) in top
+                ],
+            }
+        if "mem" in self.options and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snap = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            out["tracemalloc"] = {
+                "peak_bytes": peak,
+                "current_bytes": current,
+                "top_allocations": [
+                    {"where": f"{Path(s.traceback[0].filename).name}:{s.traceback[0].lineno}",
+                     "bytes": s.size, "count": s.count}
+                    for s in snap.statistics("lineno")[:TOP_N]
+                ],
+            }
+        self._finished = out
+        return out
+
+    def attach(self, report: dict) -> dict:
+        """Ajoute report["timings"] si le profilage est actif."""
+        if self.enabled:
+            report["timings"] = self.finish()
+            self.print_summary()
+        return report
+
+    def dump(self):
+        """Pour les étapes sans rapport JSON : écrit profiles/<stage>_timings.json."""
+        if not self.enabled:
+            return
+        PROFILE_DIR.mkdir(exist_ok=True)
+        path = PROFILE_DIR / f"{self.stage}_timings.json"
+        path.write_text(json.dumps({"stage": self.stage, "timings": self.finish()}, ensure_ascii=False, indent=2),
+                        encoding="utf-8")
+        self.print_summary()
+        print(f"→ Timings : {path}")
+
+    def print_summary(self):
+        t = self.finish()
+        phases = ", ".join(f"{k} {v:.3f}s" for k, v in t["phases_s"].items())
+        print(f"   ⏱ {self.stage} : {t['total_s']:.3f}s ({phases})")
+        if "tracemalloc" in t:
+            print(f"   ⏱ pic mémoire (tracemalloc) : {t['tracemalloc']['peak_bytes'] / 1e6:.1f} Mo")
@@ -0,0 +1,5 @@
+# conftest.py : les scripts sont des modules plats à la racine du dépôt
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,47 @@
+# test_image_phash.py
+import json
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+import image_phash
+
+def _silhouette_png() -> bytes:
+    """Silhouette noire sur fond transparent, comme les placeholders de Commons."""
+    from PIL import ImageDraw
+    im = Image.new("RGBA", (200, 160), (0, 0, 0, 0))
+    d = ImageDraw.Draw(im)
+    d.ellipse((40, 30, 160, 130), fill=(0, 0, 0, 255))
+    d.rectangle((90, 10, 110, 60), fill=(0, 0, 0, 255))
+    buf = BytesIO()
+    im.save(buf, format="PNG")
+    return buf.getvalue()
+
+def _rotated_jpeg() -> bytes:
+    im = Image.new("RGB", (240, 120), (250, 250, 250))
+    im.paste((20, 40, 200), (0, 0, 80, 120))
+    im.paste((200, 30, 30), (160, 0, 240, 60))
+    exif = Image.Exif()
+    exif[0x0112] = 6   # rotation de 90° à l'affichage
+    buf = BytesIO()
+    im.save(buf, format="JPEG", quality=90, exif=exif)
+    return buf.getvalue()
+
+@pytest.fixture
+def blocklist(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image_phash._blocklist_tree.cache_clear()
+    yield tmp_path
+    image_phash._blocklist_tree.cache_clear()
+
+@pytest.mark.parametrize("name, make", [("sil.png", _silhouette_png), ("rot.jpg", _rotated_jpeg)])
+def test_blocked_file_matches_its_own_bytes(blocklist, name, make):
+    data = make()
+    (blocklist / name).write_bytes(data)
+    image_phash.block(name, "placeholder")
+    assert json.loads((blocklist / image_phash.BLOCKLIST_FILE).read_text(encoding="utf-8"))["placeholders"]
+    image_phash._blocklist_tree.cache_clear()
+    assert image_phash.placeholder_match_bytes(data) == "placeholder"
@@ -0,0 +1,147 @@
+# test_wiki_http.py
+import pytest
+
+import wiki_http
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class FakeSession:
+    """Répond 500 sur les chemins commençant par /bad, 200 sinon."""
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, params=None, **kwargs):
+        self.calls.append(url)
+        return FakeResponse(500 if "/bad" in url else 200, b"ok")
+
+POLICY = wiki_http.RetryPolicy(max_retries=4, base_delay=0, max_delay=0)
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    wiki_http._BREAKERS.clear()
+    yield
+    wiki_http._BREAKERS.clear()
+
+def test_one_bad_url_does_not_block_the_host():
+    s = FakeSession()
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            wiki_http.request(s, "GET", "https://fr.wikipedia.org/wiki/bad", policy=POLICY)
+    assert wiki_http.request(s, "GET", "https://fr.wikipedia.org/wiki/good", policy=POLICY).status_code == 200
+    assert s.calls.count("https://fr.wikipedia.org/wiki/bad") == 3 * (POLICY.max_retries + 1)
+
+def test_breaker_opens_after_distinct_failing_urls():
+    s = FakeSession()
+    for i in range(wiki_http.FAILURE_THRESHOLD):
+        with pytest.raises(RuntimeError):
+            wiki_http.request(s, "GET", f"https://fr.wikipedia.org/wiki/bad{i}", policy=POLICY)
+    with pytest.raises(wiki_http.CircuitOpenError):
+        wiki_http.request(s, "GET", "https://fr.wikipedia.org/wiki/good", policy=POLICY)
+    # les autres hôtes ne sont pas concernés
+    assert wiki_http.request(s, "GET", "https://upload.wikimedia.org/good.png", policy=POLICY).status_code == 200
+
+def test_success_resets_failures():
+    s = FakeSession()
+    for i in range(wiki_http.FAILURE_THRESHOLD - 1):
+        with pytest.raises(RuntimeError):
+            wiki_http.request(s, "GET", f"https://fr.wikipedia.org/wiki/bad{i}", policy=POLICY)
+    wiki_http.request(s, "GET", "https://fr.wikipedia.org/wiki/good", policy=POLICY)
+    with pytest.raises(RuntimeError):
+        wiki_http.request(s, "GET", "https://fr.wikipedia.org/wiki/bad-last", policy=POLICY)
+    assert wiki_http.request(s, "GET", "https://fr.wikipedia.org/wiki/good", policy=POLICY).status_code == 200
+
+class EtagSession(FakeSession):
+    """200 + ETag, puis 304 quand If-None-Match correspond."""
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        self.calls.append(url)
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, b"flag", {"Content-Type": "image/png", "ETag": '"v1"'})
+
+def test_disk_cache_records_hits_and_misses(tmp_path, monkeypatch):
+    metrics = wiki_http.METRICS
+    monkeypatch.setattr(metrics, "cache", {"hit": 0, "miss": 0})
+    s, url = EtagSession(), "https://flagcdn.com/64x48/fr.png"
+    cache = wiki_http.DiskCache(tmp_path)
+    assert cache.get(s, url) == (b"flag", "image/png")
+    assert cache.get(s, url) == (b"flag", "image/png")
+    assert cache.get(s, url, revalidate=True) == (b"flag", "image/png")
+    assert len(s.calls) == 2
+    assert cache.stats == {"hit": 1, "miss": 1, "revalidated": 1}
+    assert metrics.cache == {"hit": 2, "miss": 1}
+    cache.save()
+    assert wiki_http.DiskCache(tmp_path).get(s, url) == (b"flag", "image/png")
+    assert len(s.calls) == 2
+
+def _open_breaker(host="https://fr.wikipedia.org"):
+    s = FakeSession()
+    for i in range(wiki_http.FAILURE_THRESHOLD):
+        with pytest.raises(RuntimeError):
+            wiki_http.request(s, "GET", f"{host}/wiki/bad{i}", policy=POLICY)
+    return wiki_http.breaker_for(host.split("//")[1])
+
+def test_half_open_lets_a_single_probe_through():
+    import threading
+    breaker = _open_breaker()
+    breaker.opened_at -= breaker.cooldown   # refroidissement écoulé
+    started, release = threading.Event(), threading.Event()
+
+    class SlowSession(FakeSession):
+        def request(self, method, url, params=None, **kwargs):
+            started.set()
+            release.wait(5)
+            return super().request(method, url, params=params, **kwargs)
+
+    result = {}
+    probe = threading.Thread(target=lambda: result.setdefault(
+        "probe", wiki_http.request(SlowSession(), "GET", "https://fr.wikipedia.org/wiki/good", policy=POLICY)))
+    probe.start()
+    assert started.wait(5)
+    # pendant l'essai, les autres appelants restent refusés
+    with pytest.raises(wiki_http.CircuitOpenError):
+        wiki_http.request(FakeSession(), "GET", "https://fr.wikipedia.org/wiki/other", policy=POLICY)
+    release.set()
+    probe.join(5)
+    assert result["probe"].status_code == 200
+    # essai réussi : circuit refermé pour tous
+    assert wiki_http.request(FakeSession(), "GET", "https://fr.wikipedia.org/wiki/other", policy=POLICY).status_code == 200
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = _open_breaker()
+    breaker.opened_at -= breaker.cooldown
+    s = FakeSession()
+    with pytest.raises(RuntimeError):
+        wiki_http.request(s, "GET", "https://fr.wikipedia.org/wiki/bad-probe", policy=POLICY)
+    assert s.calls.count("https://fr.wikipedia.org/wiki/bad-probe") == POLICY.max_retries + 1
+    with pytest.raises(wiki_http.CircuitOpenError):
+        wiki_http.request(s, "GET", "https://fr.wikipedia.org/wiki/good", policy=POLICY)
+
+def test_min_interval_holds_across_threads(monkeypatch):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    monkeypatch.setattr(wiki_http, "MIN_INTERVAL", 0.05)
+    monkeypatch.setattr(wiki_http, "_PACERS", {})
+    starts, lock = [], threading.Lock()
+
+    class TimedSession(FakeSession):
+        def request(self, method, url, params=None, **kwargs):
+            with lock:
+                starts.append(time.monotonic())
+            return super().request(method, url, params=params, **kwargs)
+
+    s = TimedSession()
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        list(ex.map(lambda i: wiki_http.request(s, "GET", f"https://fr.wikipedia.org/wiki/p{i}", policy=POLICY),
+                    range(8)))
+    starts.sort()
+    # 4 threads, mais un départ par intervalle pour l'hôte
+    assert all(b - a >= 0.045 for a, b in zip(starts, starts[1:]))
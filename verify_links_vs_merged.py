@@ -2,6 +2,8 @@
 import json, re, unicodedata, csv
 from pathlib import Path
 
+from stage_profile import StageProfiler
+
 LINKS_FILE  = "breeds_links_resorted.json"     # source de vérité {breeds:[{id,breed,url?}, ...]}
 MERGED_FILE = "breeds_merged_aligned.json"       # fichier vérifié {breeds:[{id,breed,alias,features...}, ...]}
 OUT_JSON    = "coverage_report2.json"
@@ -17,9 +19,12 @@ def norm_key(s: str) -> str:
     return s
 
 def main():
+    prof = StageProfiler("verify_links_vs_merged")
     links = json.loads(Path(LINKS_FILE).read_text(encoding="utf-8")).get("breeds", [])
     merged = json.loads(Path(MERGED_FILE).read_text(encoding="utf-8")).get("breeds", [])
 
+    prof.lap("load")
+
     # Index par ID
     links_by_id  = {int(b["id"]): b for b in links if b.get("id") is not None}
     merged_by_id = {}
@@ -31,6 +36,7 @@ def main():
         if bid in merged_by_id:
             merged_dupes.append(bid)
         merged_by_id[bid] = b
+    prof.lap("index")
 
     missing_in_merged = []   # dans links mais pas dans merged
     name_mismatches   = []   # même id mais nom différent (normalisation)
@@ -57,6 +63,8 @@ def main():
         if mid not in links_ids:
             extras_in_merged.append({"id": mid, "breed_merged": mrow.get("breed","")})
 
+    prof.lap("compare")
+
     # Résumé
     report = {
         "links_count": len(links_by_id),
@@ -70,6 +78,7 @@ def main():
         "duplicate_ids_in_merged": sorted(list(set(merged_dupes)))[:200],
         "extras_in_merged": sorted(extras_in_merged, key=lambda x: x["id"])[:200],
     }
+    prof.attach(report)
 
     Path(OUT_JSON).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
 
@@ -0,0 +1,417 @@
+# wiki_http.py
+"""
+Couche HTTP partagée des scripts de scraping (Commons / Wikipedia / upload.wikimedia.org).
+
+- relances avec backoff exponentiel + jitter, respect de Retry-After
+- paramètre `maxlag` sur les appels api.php, et attente quand le serveur signale un lag
+- disjoncteur par hôte : après des échecs (relances épuisées) sur FAILURE_THRESHOLD URL distinctes
+  sans succès entre-temps, l'hôte est court-circuité pendant BREAKER_COOLDOWN secondes
+  (CircuitOpenError) ; une seule URL en erreur ne bloque pas les autres
+- cadence par hôte : au plus une tentative tous les set_min_interval() secondes sur un même hôte,
+  quel que soit le nombre de threads (la pause de politesse ne se multiplie pas avec CONCURRENCY)
+- chaque requête logique est enregistrée dans http_metrics.METRICS
+- get_session() : client partagé (keep-alive, pools par hôte dimensionnés sur la concurrence,
+  gzip/br) ; HTTP/2 via httpx si FURIOUS_HTTP2=1 et httpx[http2] installé
+- DiskCache : cache disque des GET de ressources statiques (drapeaux...), revalidation ETag/Last-Modified
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+from http_metrics import METRICS, endpoint_kind, response_size
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAXLAG = 5                 # secondes de lag de réplication tolérées (recommandation MediaWiki)
+FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN = 60.0
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+              "AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/124.0 Safari/537.36 furious-scraper/1.2 +https://example.com")
+CONCURRENCY = int(os.environ.get("FURIOUS_CONCURRENCY", "4"))   # threads / connexions par hôte (le débit, lui, suit MIN_INTERVAL)
+POOL_HOSTS = 8             # commons, upload, fr/en/de/cs... wikipedia
+HTTP2 = os.environ.get("FURIOUS_HTTP2", "") not in ("", "0")
+MIN_INTERVAL = float(os.environ.get("FURIOUS_MIN_INTERVAL", "0"))   # s entre deux tentatives vers un même hôte
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 60.0,
+                 retry_statuses=RETRY_STATUSES, maxlag: int | None = MAXLAG):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = set(retry_statuses)
+        self.maxlag = maxlag
+
+    def backoff(self, attempt: int) -> float:
+        """Backoff exponentiel plafonné, jitter "full" (uniforme sur [0, plafond])."""
+        cap = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, cap)
+
+DEFAULT_POLICY = RetryPolicy()
+
+def retry_after_seconds(resp) -> float | None:
+    """Retry-After en secondes (entier ou date HTTP), None si absent/illisible."""
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+def is_maxlag(resp) -> bool:
+    return resp is not None and resp.headers.get("MediaWiki-API-Error") == "maxlag"
+
+# ---------- disjoncteur ----------
+class CircuitBreaker:
+    """
+    Compte une requête logique en échec (relances épuisées) par URL distincte : les tentatives
+    d'une même requête, ou la même URL cassée redemandée, ne comptent qu'une fois.
+    """
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failed_urls = set()
+        self.opened_at = None
+        self.probe = None        # thread de la requête d'essai en semi-ouvert, None sinon
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            me = threading.get_ident()
+            if self.probe is not None:
+                # semi-ouvert : seul l'essai (et ses relances) passe jusqu'à son issue
+                return self.probe == me
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # fin du refroidissement : on laisse passer un seul essai, les autres restent refusés
+                self.probe = me
+                return True
+            return False
+
+    def success(self):
+        with self.lock:
+            self.failed_urls.clear()
+            self.opened_at = None
+            self.probe = None
+
+    def failure(self, url: str):
+        with self.lock:
+            self.failed_urls.add(url)
+            if self.probe is not None or len(self.failed_urls) >= self.threshold:
+                # essai raté : rouvert pour un nouveau refroidissement
+                self.opened_at = time.monotonic()
+                self.probe = None
+
+_BREAKERS: dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+def breaker_for(host: str) -> CircuitBreaker:
+    with _BREAKERS_LOCK:
+        b = _BREAKERS.get(host)
+        if b is None:
+            b = _BREAKERS[host] = CircuitBreaker()
+        return b
+
+# ---------- cadence par hôte ----------
+class HostPacer:
+    """Intervalle minimal entre deux départs de requête vers un hôte, partagé par tous les threads."""
+    def __init__(self):
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self, interval: float):
+        if interval <= 0:
+            return
+        with self.lock:
+            # réserve le prochain créneau libre ; l'attente se fait hors verrou
+            now = time.monotonic()
+            start = max(now, self.next_at)
+            self.next_at = start + interval
+        METRICS.sleep(start - now, "politeness")
+
+_PACERS: dict[str, HostPacer] = {}
+_PACERS_LOCK = threading.Lock()
+
+def pacer_for(host: str) -> HostPacer:
+    with _PACERS_LOCK:
+        p = _PACERS.get(host)
+        if p is None:
+            p = _PACERS[host] = HostPacer()
+        return p
+
+def set_min_interval(seconds: float):
+    """Pause de politesse des scripts (PAUSE_SECONDS), appliquée par hôte dans request()."""
+    global MIN_INTERVAL
+    MIN_INTERVAL = max(0.0, float(seconds))
+
+# ---------- requête ----------
+def request(session, method: str, url: str, *, params=None, policy: RetryPolicy = DEFAULT_POLICY,
+            retries: int | None = None, kind: str | None = None, cache: str | None = None, **kwargs):
+    """
+    session.request(method, url, ...) avec la politique de relance partagée.
+    `session` peut être une requests.Session ou le module requests lui-même.
+    `cache` ("miss") : requête faite pour un cache (DiskCache) ; une réponse 304 est comptée "hit".
+    Retourne la réponse (2xx/3xx) ; lève l'erreur HTTP / réseau finale sinon.
+    """
+    host = urlparse(url).netloc
+    kind = kind or endpoint_kind(url)
+    max_retries = policy.max_retries if retries is None else retries
+    if kind == "api" and policy.maxlag is not None:
+        params = dict(params or {})
+        params.setdefault("maxlag", policy.maxlag)
+
+    breaker = breaker_for(host)
+    pacer = pacer_for(host)
+    spent = 0.0
+    last_exc = None
+    resp = None
+    for attempt in range(max_retries + 1):
+        if not breaker.allow():
+            METRICS.record(url, 0, 0, spent, retries=attempt, kind=kind)
+            raise CircuitOpenError(f"circuit ouvert pour {host} (trop d'échecs récents)")
+        pacer.wait(MIN_INTERVAL)
+        t0 = time.perf_counter()
+        resp, last_exc = None, None
+        try:
+            resp = session.request(method, url, params=params, **kwargs)
+        except Exception as e:   # réseau / timeout
+            last_exc = e
+        spent += time.perf_counter() - t0
+
+        if resp is not None and not is_maxlag(resp) and resp.status_code not in policy.retry_statuses:
+            breaker.success()
+            if resp.status_code < 400:
+                if cache and resp.status_code == 304:
+                    cache = "hit"
+                METRICS.record(url, resp.status_code, response_size(resp), spent, retries=attempt,
+                               cache=cache, kind=kind)
+                return resp
+            # 4xx "définitive" (404, 403...) : inutile de réessayer
+            METRICS.record(url, resp.status_code, 0, spent, retries=attempt, kind=kind)
+            resp.raise_for_status()
+
+        # maxlag : serveur en retard de réplication, ce n'est pas une panne
+        reason = "maxlag" if is_maxlag(resp) else "retry"
+        if attempt >= max_retries:
+            break
+        delay = retry_after_seconds(resp)
+        if delay is not None:
+            reason = "retry_after" if reason == "retry" else reason
+            delay = min(delay, policy.max_delay)
+        else:
+            delay = policy.backoff(attempt)
+        METRICS.sleep(delay, reason)
+
+    status = resp.status_code if resp is not None else 0
+    METRICS.record(url, status, 0, spent, retries=max_retries, kind=kind)
+    if is_maxlag(resp):
+        breaker.success()      # l'hôte répond (lag de réplication) : libère un éventuel essai semi-ouvert
+    else:
+        breaker.failure(url)   # un échec par requête logique, pas par tentative
+    if last_exc is not None:
+        raise last_exc
+    resp.raise_for_status()
+    raise RuntimeError(f"maxlag persistant sur {host}")
+
+# ---------- client partagé ----------
+def accept_encoding() -> str:
+    """br seulement si urllib3 sait le décoder (paquet brotli/brotlicffi)."""
+    for mod in ("brotli", "brotlicffi"):
+        try:
+            __import__(mod)
+            return "gzip, deflate, br"
+        except ImportError:
+            pass
+    return "gzip, deflate"
+
+def default_headers() -> dict:
+    return {
+        "User-Agent": USER_AGENT,
+        "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
+        "Accept-Encoding": accept_encoding(),
+        "Connection": "keep-alive",
+    }
+
+class _Http2Response:
+    """Façade minimale d'une réponse httpx avec l'interface requests utilisée par les scripts."""
+    def __init__(self, r):
+        self._r = r
+        self.status_code = r.status_code
+        self.headers = r.headers
+        self.url = str(r.url)
+        self.history = r.history
+
+    @property
+    def content(self):
+        return self._r.content
+
+    @property
+    def text(self):
+        return self._r.text
+
+    def json(self):
+        return self._r.json()
+
+    def raise_for_status(self):
+        """Même exception que requests (requests.HTTPError, .response = cette façade)."""
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error: {self._r.reason_phrase} for url: {self.url}",
+                                     response=self)
+
+class _Http2Session:
+    def __init__(self, headers: dict, concurrency: int):
+        import httpx
+        limits = httpx.Limits(max_connections=POOL_HOSTS * concurrency,
+                              max_keepalive_connections=POOL_HOSTS * concurrency)
+        self.client = httpx.Client(http2=True, headers=headers, limits=limits)
+        self.headers = self.client.headers
+
+    def request(self, method, url, params=None, headers=None, timeout=None,
+                allow_redirects=True, stream=False, **kwargs):
+        import httpx
+        import requests
+        if timeout is not None:   # sinon le défaut du client httpx (5 s) s'applique
+            kwargs["timeout"] = timeout
+        try:
+            r = self.client.request(method, url, params=params, headers=headers,
+                                    follow_redirects=allow_redirects, **kwargs)
+        # erreurs réseau traduites dans la hiérarchie requests, attendue par les scripts
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+        return _Http2Response(r)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+class LazySession:
+    """Session créée au premier usage : importer un script ne charge pas requests/httpx."""
+    def __init__(self, headers: dict | None = None, **kwargs):
+        self._args = (headers, kwargs)
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        with self._lock:
+            if self._session is None:
+                headers, kwargs = self._args
+                self._session = get_session(headers, **kwargs)
+            return self._session
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+def lazy_session(headers: dict | None = None, **kwargs) -> LazySession:
+    return LazySession(headers, **kwargs)
+
+def get_session(headers: dict | None = None, concurrency: int = CONCURRENCY, http2: bool = HTTP2):
+    """
+    Client HTTP partagé : connexions keep-alive réutilisées, un pool par hôte
+    (taille = concurrence), relances laissées à request().
+    """
+    h = default_headers()
+    h.update(headers or {})
+    if http2:
+        try:
+            import h2  # noqa: F401  (httpx[http2])
+            return _Http2Session(h, concurrency)
+        except ImportError:
+            print("⚠️  HTTP/2 demandé mais httpx[http2] absent : repli sur requests (HTTP/1.1 keep-alive).")
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=max(1, concurrency), max_retries=0)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update(h)
+    return s
+
+# ---------- cache disque ----------
+class DiskCache:
+    """
+    Réponses GET conservées sur disque, clé = URL : un second passage ne fait aucune requête.
+    revalidate=True renvoie une requête conditionnelle (If-None-Match / If-Modified-Since) ;
+    un 304 garde les octets du cache.
+
+        <dir>/ab/ab12...ef   # corps (nom = blake2b de l'URL)
+        <dir>/index.json     # url -> {file, content_type, etag, last_modified, size}
+    """
+    INDEX_NAME = "index.json"
+
+    def __init__(self, directory):
+        self.dir = Path(directory)
+        p = self.dir / self.INDEX_NAME
+        self.index = json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+        self._lock = threading.Lock()
+        self.stats = {"hit": 0, "miss": 0, "revalidated": 0}
+
+    def _body_path(self, url: str):
+        name = hashlib.blake2b(url.encode("utf-8"), digest_size=16).hexdigest()
+        return self.dir / name[:2] / name
+
+    def get(self, session, url: str, *, revalidate: bool = False, kind: str | None = None, **kwargs):
+        """-> (octets, content-type) ; lève l'erreur HTTP / réseau finale comme request()."""
+        with self._lock:
+            entry = self.index.get(url)
+        body = self._body_path(url)
+        if entry and body.exists():
+            if not revalidate:
+                data = body.read_bytes()
+                with self._lock:
+                    self.stats["hit"] += 1
+                # requête logique servie sans réseau : comptée dans les métriques HTTP comme hit
+                METRICS.record(url, 200, len(data), 0.0, cache="hit", kind=kind)
+                return data, entry.get("content_type")
+            headers = dict(kwargs.pop("headers", None) or {})
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            resp = request(session, "GET", url, kind=kind, cache="miss", headers=headers, **kwargs)
+            if resp.status_code == 304:
+                with self._lock:
+                    self.stats["revalidated"] += 1
+                return body.read_bytes(), entry.get("content_type")
+        else:
+            resp = request(session, "GET", url, kind=kind, cache="miss", **kwargs)
+        data = resp.content
+        body.parent.mkdir(parents=True, exist_ok=True)
+        tmp = body.with_name(body.name + f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, body)
+        ctype = (resp.headers.get("Content-Type") or "").split(";")[0].strip() or None
+        with self._lock:
+            self.stats["miss"] += 1
+            self.index[url] = {"file": body.relative_to(self.dir).as_posix(), "content_type": ctype,
+                               "etag": resp.headers.get("ETag"),
+                               "last_modified": resp.headers.get("Last-Modified"), "size": len(data)}
+        return data, ctype
+
+    def save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        p = self.dir / self.INDEX_NAME
+        tmp = p.with_name(p.name + ".tmp")
+        with self._lock:
+            tmp.write_text(json.dumps(self.index, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, p)